@@ -5,6 +5,9 @@ from core import (
     sidebar,
     data_variables,
     dashboard_plot,
+    rollup as daily_rollup,
+    date_index,
+    figure_cache,
 )
 
 # ==========================================================================================================    
@@ -51,23 +54,25 @@ def dashboard() -> None:
     else:
         # Filter or clean the dataset
         df = utils.filter_the_dataset(df)
+        # Daily rollup cube of the dataset (built once per dataset); the summaries below read from it
+        dataset_rollup = daily_rollup.get_rollup(df)
 
 # ==========================================================================================================    
     # Summary Calculations for Last N Days
 # ==========================================================================================================    
         no_of_days_for_summary  = st.expander("Days Filter", expanded=False).slider("Select Number of Days for Summary Calculations", min_value=7, max_value=365, value=30, step=1, key="days_slider")
-        df_last_n_days = utils.get_last_n_days_data(df, no_of_days_for_summary)
+        rollup_last_n_days = daily_rollup.slice_rollup_last_n_days(dataset_rollup, no_of_days_for_summary)
         
         col1, col2 = st.columns(2)
         with col1:
             st.info(f"### Total Violations (Last {no_of_days_for_summary} Days)")
-            summary = dashboard_summary.get_violations_summary_of_last_n_days(df_last_n_days)
+            summary = dashboard_summary.get_violations_summary_of_last_n_days(rollup_last_n_days)
             
             # Display Charts
             # with st.expander("View Violation Types Distribution Chart"):
             with st.container():    
                 st.markdown("<h3 style='text-align: center;'>Violation Types Distribution</h3>", unsafe_allow_html=True)
-                st.pyplot(summary.get('fig'), width='stretch')
+                st.image(summary.get('fig'), width='stretch')
             # Metrics
             sub_col1, sub_col2, sub_col3 = st.columns(3, border=True)
             with sub_col1:
@@ -76,17 +81,17 @@ def dashboard() -> None:
             with sub_col2:
                 st.metric(label="Violations/Day", value=f"{int(summary.get('total_no_of_violations')/no_of_days_for_summary)}")
             with sub_col3:
-                st.metric(label="Violations/VehicleType", value=f"{int(summary.get('total_no_of_violations')/df_last_n_days['Vehicle_Type'].nunique())}")
+                st.metric(label="Violations/VehicleType", value=f"{int(summary.get('total_no_of_violations')/summary.get('no_of_vehicle_types'))}")
             st.markdown('---')
             
     # ==========================================================================================================
             # --- License Insights ---
             st.info(f"### License Insights (Last {no_of_days_for_summary} Days)")
-            license_insights = dashboard_summary.get_license_insights(df_last_n_days)
+            license_insights = dashboard_summary.get_license_insights(rollup_last_n_days)
             
             with st.container():
                 st.markdown("<h3 style='text-align: center;'>License Validity</h3>", unsafe_allow_html=True)
-                st.pyplot(license_insights.get('validity_fig'), width='stretch')
+                st.image(license_insights.get('validity_fig'), width='stretch')
             
             sub_col_l1, sub_col_l2 = st.columns(2, border=True)
             with sub_col_l1:
@@ -99,13 +104,13 @@ def dashboard() -> None:
     # ==========================================================================================================
         with col2:
             st.info(f"### Total Fines (Last {no_of_days_for_summary} Days)")
-            fine_summary = dashboard_summary.get_total_fines_generated(df_last_n_days)
+            fine_summary = dashboard_summary.get_total_fines_generated(rollup_last_n_days)
             
             # Display Charts
             # with st.expander("View Fines Distribution Chart"):
             with st.container():    
                 st.markdown("<h3 style='text-align: center;'>Fines Distribution</h3>", unsafe_allow_html=True)
-                st.pyplot(fine_summary.get('fig'), width='stretch')
+                st.image(fine_summary.get('fig'), width='stretch')
             # Metrics
             sub_col1, sub_col2 = st.columns(2, border=True)
             with sub_col1:
@@ -116,11 +121,11 @@ def dashboard() -> None:
 
     # ==========================================================================================================
             st.info(f"### Location Insights (Last {no_of_days_for_summary} Days)")
-            location_based_summary = dashboard_summary.get_violations_by_location(df_last_n_days)
+            location_based_summary = dashboard_summary.get_violations_by_location(rollup_last_n_days)
             # with st.expander("View Violations by Location Chart"):
             with st.container():    
                 st.markdown("<h3 style='text-align: center;'>Violations by Location</h3>", unsafe_allow_html=True)
-                st.pyplot(location_based_summary.get('fig'), width='stretch')
+                st.image(location_based_summary.get('fig'), width='stretch')
             # Metrics
             sub_col2, sub_col3 = st.columns(2, border=True)
             
@@ -140,8 +145,7 @@ def dashboard() -> None:
     # Additional Dashboard Metrics Overview
 # ==========================================================================================================  
         # Year Filter for Global Overview
-        min_year = int(df['Date'].dt.year.min())
-        max_year = int(df['Date'].dt.year.max())
+        min_year, max_year = date_index.get_year_bounds(df)
 # ==========================================================================================================  
     # GLOBAL DATA OVERVIEW
 # ==========================================================================================================  
@@ -160,11 +164,10 @@ def dashboard() -> None:
              )
         
         # Filter Data
-        mask_global = (df['Date'].dt.year >= selected_years_global[0]) & (df['Date'].dt.year <= selected_years_global[1])
-        df_global = df[mask_global]
+        rollup_global = daily_rollup.slice_rollup_by_years(dataset_rollup, *selected_years_global)
         
         with st.expander(f"📊 Executive Summary Report ({selected_years_global[0]} - {selected_years_global[1]})", expanded=True):
-             global_metrics = dashboard_summary.get_global_overview_metrics(df_global)
+             global_metrics = dashboard_summary.get_global_overview_metrics(rollup_global)
              
              # Row 1
              c1, c2, c3, c4 = st.columns(4, border=True)
@@ -202,11 +205,10 @@ def dashboard() -> None:
              )
              
         # Filter Data
-        mask_behavior = (df['Date'].dt.year >= selected_years_behavior[0]) & (df['Date'].dt.year <= selected_years_behavior[1])
-        df_behavior = df[mask_behavior]
+        rollup_behavior = daily_rollup.slice_rollup_by_years(dataset_rollup, *selected_years_behavior)
 
         with st.expander(f"Advanced Risk Indicators ({selected_years_behavior[0]} - {selected_years_behavior[1]})", expanded=True):
-             behavior_metrics = dashboard_summary.get_behavioral_analysis(df_behavior)
+             behavior_metrics = dashboard_summary.get_behavioral_analysis(rollup_behavior)
              
              over_speeding_count, over_speeding_pct = behavior_metrics['over_speeding_stats']
              court_count, court_pct = behavior_metrics['court_appearance_stats']
@@ -282,10 +284,9 @@ def dashboard() -> None:
                  )
             
             # Filter
-            mask_vehicle = (df['Date'].dt.year >= years_vehicle[0]) & (df['Date'].dt.year <= years_vehicle[1])
-            df_vehicle = df[mask_vehicle]
+            df_vehicle = date_index.year_range_slice(df, *years_vehicle)
             
-            st.pyplot(dashboard_plot.plot_vehicle_type_vs_violation_type(df_vehicle), width='stretch')
+            figure_cache.show_plot(dashboard_plot.plot_vehicle_type_vs_violation_type, df_vehicle)
             
         st.markdown('---')
         
@@ -304,10 +305,9 @@ def dashboard() -> None:
                  )
             
             # Filter
-            mask_heatmap = (df['Date'].dt.year >= years_heatmap[0]) & (df['Date'].dt.year <= years_heatmap[1])
-            df_heatmap = df[mask_heatmap]
+            df_heatmap = date_index.year_range_slice(df, *years_heatmap)
 
-            st.pyplot(dashboard_plot.plot_severity_heatmap_by_location(df_heatmap), width='stretch')
+            figure_cache.show_plot(dashboard_plot.plot_severity_heatmap_by_location, df_heatmap)
         st.markdown('---')        
     # ------------------------------
     # INFO SECTION
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+from core import dataset_cache
+
+# This module keeps a bitmap index over the low-cardinality columns of a dataset: one packed
+# bit vector (1 bit per row) per distinct value. Categorical filters are then answered with a
+# few bitwise operations over n/8 bytes instead of comparing every row on every rerun.
+
+# ---------------------------------------------------------
+# INDEX CONFIGURATION
+# ---------------------------------------------------------
+# Categorical columns are always indexed; other columns only up to this many distinct values
+# (e.g. Driver_Age or Penalty_Points, but not Fine_Amount or Violation_ID)
+MAX_BITMAP_VALUES = 256
+
+# Every column gets its own artifact, built on first use: "bitmap:<column>"
+BITMAP_ARTIFACT = "bitmap"
+
+
+# ==================================================================================
+# Block 0: Building the Index
+# ==================================================================================
+def build_column_bitmaps(df: pd.DataFrame, column: str) -> dict | None:
+    """
+    Builds the bitmaps of one column: one packed bit vector per distinct value.
+
+    Args:
+        df (pd.DataFrame): The data.
+        column (str): Column to index.
+
+    Returns:
+        dict | None: {'values': Index of the distinct values (NaN last, if any),
+                      'bits': uint8 array of shape (len(values), ceil(rows / 8)),
+                      'rows': number of rows}
+            None when the column has more than MAX_BITMAP_VALUES distinct values.
+    """
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+    else:
+        codes, values = pd.factorize(series, sort=True)
+        values = pd.Index(values)
+        if len(values) > MAX_BITMAP_VALUES:
+            return None
+
+    # Missing values get a bitmap of their own, so str.contains('nan')-style queries still match them
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(values), codes)
+        values = values.insert(len(values), np.nan)
+
+    bits = np.stack([np.packbits(codes == code) for code in range(len(values))]) if len(values) else \
+        np.zeros((0, (len(df) + 7) // 8), dtype=np.uint8)
+    return {'values': values, 'bits': bits, 'rows': len(df)}
+# -------------------------------------------------------------------------------
+def update_column_bitmaps(bitmaps: dict | None, increment: dict, column: str) -> dict | None:
+    """
+    Extends the bitmaps of a column with appended rows (see dataset_cache.get_artifact).
+    Only the bytes from the last old row on are packed again. Returns None (rebuild) when the
+    appended rows are not all after the old rows in the dataset's order.
+    """
+    if bitmaps is None or increment['positions'] is not None:
+        return None
+    series = increment['rows'][column]
+    old_values, rows = bitmaps['values'], bitmaps['rows']
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = pd.Index(series.cat.categories)
+    else:
+        values = old_values.dropna().union(pd.Index(series.dropna().unique()))
+        if len(values) > MAX_BITMAP_VALUES:
+            return None
+    if old_values.hasnans or series.isna().any():
+        values = values.insert(len(values), np.nan)
+
+    # Rows of the last, partly filled byte are unpacked and packed again together with the new rows
+    full_bytes = rows // 8
+    tail = np.zeros((len(values), rows - full_bytes * 8 + len(series)), dtype=bool)
+    slots = values.get_indexer(old_values)
+    tail[slots, :rows - full_bytes * 8] = np.unpackbits(bitmaps['bits'][:, full_bytes:], axis=1)[:, :rows - full_bytes * 8]
+    codes = values.get_indexer(pd.Index(series.astype(object)))
+    tail[codes, np.arange(rows - full_bytes * 8, tail.shape[1])] = True
+
+    bits = np.zeros((len(values), full_bytes + (tail.shape[1] + 7) // 8), dtype=np.uint8)
+    bits[slots, :full_bytes] = bitmaps['bits'][:, :full_bytes]
+    bits[:, full_bytes:] = np.packbits(tail, axis=1)
+    return {'values': values, 'bits': bits, 'rows': rows + len(series)}
+# -------------------------------------------------------------------------------
+def _indexed_frame(df: pd.DataFrame) -> tuple:
+    # Bitmaps cover every row of the cached dataset that df is a view / row subset of;
+    # frames that are not backed by the cache are indexed on their own
+    located = dataset_cache.locate_rows(df)
+    if located is None:
+        return df, None
+    return located
+# -------------------------------------------------------------------------------
+def get_column_bitmaps(df: pd.DataFrame, column: str) -> dict | None:
+    """
+    Returns the bitmaps of a column (see build_column_bitmaps), built once per dataset version
+    when df is backed by the dataset cache.
+    """
+    frame, positions = _indexed_frame(df)
+    if positions is None:
+        return build_column_bitmaps(frame, column)
+    return dataset_cache.get_artifact(frame, f"{BITMAP_ARTIFACT}:{column}", lambda base: build_column_bitmaps(base, column),
+                                      update=lambda bitmaps, increment: update_column_bitmaps(bitmaps, increment, column))
+
+
+# ==================================================================================
+# Block 1: Queries
+# ==================================================================================
+def _values_bitmap(df: pd.DataFrame, column: str, selected) -> np.ndarray:
+    # selected(values: Index) -> boolean array of the values to include; OR of their bitmaps
+    bitmaps = get_column_bitmaps(df, column)
+    if bitmaps is None:
+        # Too many distinct values to index: evaluate the condition row by row
+        frame, _ = _indexed_frame(df)
+        return np.packbits(np.asarray(selected(frame[column]), dtype=bool))
+    chosen = np.flatnonzero(np.asarray(selected(bitmaps['values']), dtype=bool))
+    if len(chosen) == 0:
+        return np.zeros(bitmaps['bits'].shape[1], dtype=np.uint8)
+    return np.bitwise_or.reduce(bitmaps['bits'][chosen], axis=0)
+# -------------------------------------------------------------------------------
+def value_bitmap(df: pd.DataFrame, column: str, values: list) -> np.ndarray:
+    """
+    Bitmap of the rows whose column value is one of values (like df[column].isin(values)).
+
+    Returns:
+        np.ndarray: Packed bits over the rows of the indexed dataset; combine with
+            bitmap_and / bitmap_or / bitmap_not and apply with select_rows.
+    """
+    return _values_bitmap(df, column, lambda labels: pd.Index(labels).isin(values))
+# -------------------------------------------------------------------------------
+def match_bitmap(df: pd.DataFrame, column: str, pattern: str, case: bool = False) -> np.ndarray:
+    """
+    Bitmap of the rows whose value, as text, contains pattern
+    (like df[column].astype(str).str.contains(pattern, case=case, na=False)).
+    Only the distinct values are matched against the pattern.
+    """
+    return _values_bitmap(
+        df, column,
+        lambda labels: pd.Series(labels).astype(str).str.contains(pattern, case=case, na=False).to_numpy(),
+    )
+# -------------------------------------------------------------------------------
+def bitmap_and(*bitmaps: np.ndarray) -> np.ndarray:
+    """
+    Rows set in every bitmap.
+    """
+    return np.bitwise_and.reduce(bitmaps)
+# -------------------------------------------------------------------------------
+def bitmap_or(*bitmaps: np.ndarray) -> np.ndarray:
+    """
+    Rows set in any bitmap.
+    """
+    return np.bitwise_or.reduce(bitmaps)
+# -------------------------------------------------------------------------------
+def bitmap_not(bitmap: np.ndarray) -> np.ndarray:
+    """
+    Rows not set in the bitmap (the padding bits past the last row are ignored by select_rows).
+    """
+    return np.invert(bitmap)
+# -------------------------------------------------------------------------------
+def bitmap_mask(df: pd.DataFrame, bitmap: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask over the rows of df for a bitmap built from df (or from the dataset it is a view of).
+    """
+    _, positions = _indexed_frame(df)
+    if positions is None:
+        return np.unpackbits(bitmap, count=len(df)).view(bool)
+    if len(positions) == 0:
+        return np.zeros(0, dtype=bool)
+
+    # Only unpack the bytes that cover df's rows (a date slice is one contiguous range)
+    first_byte = int(positions.min()) // 8
+    last_byte = int(positions.max()) // 8 + 1
+    window = np.unpackbits(bitmap[first_byte:last_byte]).view(bool)
+    return window[positions - first_byte * 8]
+# -------------------------------------------------------------------------------
+def select_rows(df: pd.DataFrame, bitmap: np.ndarray) -> pd.DataFrame:
+    """
+    Returns the rows of df that are set in a bitmap built from df (or from the dataset it is a view of).
+    """
+    if df.empty:
+        return df
+    return df[bitmap_mask(df, bitmap)]
+# -------------------------------------------------------------------------------
+def filter_rows(df: pd.DataFrame, column: str, values: list) -> pd.DataFrame:
+    """
+    Bitmap-index version of df[df[column].isin(values)].
+    """
+    return select_rows(df, value_bitmap(df, column, values))
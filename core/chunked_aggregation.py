@@ -0,0 +1,372 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from core import dataset_store, dataset_deltas, data_schema
+
+# This module computes grouped aggregates of a dataset that does not fit in memory. The dataset
+# file is streamed in row chunks; every chunk is reduced to mergeable partial aggregates per group
+# (count, sum, sum of squares, min, max), the partials are merged as they pile up, and the final
+# table is built from the merged partials with the same values and dtypes as the in-memory
+# df.groupby(keys, observed=True).agg(...) of core.utils.
+
+# ---------------------------------------------------------
+# CHUNKED AGGREGATION CONFIGURATION
+# ---------------------------------------------------------
+# Rows read (and typed) per chunk
+CHUNK_ROWS = 250_000
+# Partial rows kept before they are merged into one partial (bounds memory for many small groups)
+MERGE_ROWS = 1_000_000
+# Finished tables kept per dataset version, day range and aggregation, so a rerun with the same
+# inputs does not stream the file again (least recently used first)
+MAX_CACHED_RESULTS = 64
+
+_results = OrderedDict()  # result key -> aggregated DataFrame
+_results_lock = threading.Lock()
+
+# Aggregation functions that can be computed from the partials, and the partials each one needs
+SUPPORTED_FUNCS = {
+    'count': ['count'],
+    'sum': ['sum'],
+    'mean': ['count', 'sum'],
+    'min': ['min'],
+    'max': ['max'],
+    'std': ['count', 'sum', 'sumsq'],
+}
+# How partials of two chunks are combined
+MERGE_FUNCS = {'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+ROWS_PARTIAL = '_rows'
+
+
+# ==================================================================================
+# Block 0: Chunk Sources
+# ==================================================================================
+def make_source(path: str, start_day=None, end_day=None, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Describes a dataset file to aggregate chunk by chunk, optionally limited to a range of days.
+
+    Args:
+        path (str): Path of the CSV (or Parquet) dataset.
+        start_day: First day to include (None = no lower bound).
+        end_day: Last day to include, inclusive (None = no upper bound).
+        chunk_rows (int): Rows per chunk.
+
+    Returns:
+        dict: The source, accepted by the table functions of core.utils in place of a DataFrame.
+    """
+    return {'path': path, 'start_day': start_day, 'end_day': end_day, 'chunk_rows': chunk_rows}
+# -------------------------------------------------------------------------------
+def is_source(obj) -> bool:
+    """
+    True for a dataset path or a make_source() dict (as opposed to an in-memory DataFrame).
+    """
+    return isinstance(obj, (str, dict))
+# -------------------------------------------------------------------------------
+def _as_source(source) -> dict:
+    return make_source(source) if isinstance(source, str) else source
+# -------------------------------------------------------------------------------
+def get_source_columns(source) -> list:
+    """
+    Returns the column names of the dataset file, read from its header or metadata only.
+    """
+    path = _as_source(source)['path']
+    if path.endswith(".parquet"):
+        return pq.read_schema(path).names
+    if dataset_store.is_store_current(path):
+        return dataset_store.read_manifest(path)['columns']
+    return list(pd.read_csv(path, nrows=0).columns)
+# -------------------------------------------------------------------------------
+def _day_bounds(source: dict) -> tuple:
+    # Same bounds as date_index.day_range_slice (whole calendar days, both inclusive)
+    start, end = source.get('start_day'), source.get('end_day')
+    if start is not None:
+        start = pd.Timestamp(start).normalize()
+    if end is not None:
+        end = pd.Timestamp(end).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    return start, end
+# -------------------------------------------------------------------------------
+def _iter_frames(path: str, columns: list, chunk_rows: int, years: tuple | None):
+    # Raw (untyped) chunks: Parquet files and the Parquet store are read batch by batch,
+    # CSV files without a current store copy are parsed chunk by chunk. The store is not built
+    # here, since converting a CSV loads it whole.
+    if path.endswith(".parquet"):
+        # The file's rows, then the rows appended to it (see core/dataset_deltas.py)
+        for batch in dataset_deltas.iter_batches(path, columns, batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    if dataset_store.is_store_current(path):
+        manifest = dataset_store.read_manifest(path)
+        dataset = ds.dataset(dataset_store.get_store_path(path), format="parquet", partitioning="hive" if manifest['partitioned'] else None)
+        row_filter = None
+        if years is not None and manifest['partitioned']:
+            # Partition pruning: only the matching `partition_year=` directories are read
+            partition = ds.field(dataset_store.PARTITION_COLUMN)
+            row_filter = (partition >= years[0]) & (partition <= years[1])
+        for batch in dataset.to_batches(columns=columns, filter=row_filter, batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+# -------------------------------------------------------------------------------
+def iter_chunks(source, columns: list):
+    """
+    Streams a dataset as typed DataFrame chunks (see data_schema.apply_schema), keeping only
+    the rows inside the source's day range.
+
+    Args:
+        source: A dataset path or a make_source() dict.
+        columns (list): Columns to read; columns missing from the dataset are skipped.
+
+    Yields:
+        pd.DataFrame: One typed chunk at a time.
+    """
+    source = _as_source(source)
+    header = get_source_columns(source)
+    is_traffic = data_schema.is_traffic_dataset(header)
+    start, end = _day_bounds(source)
+    filtered = (start is not None or end is not None) and data_schema.DATE_COLUMN in header
+
+    read_columns = [col for col in header if col in columns or (filtered and col == data_schema.DATE_COLUMN)]
+    years = None
+    if filtered:
+        years = (start.year if start is not None else -2**15, end.year if end is not None else 2**15 - 1)
+
+    for chunk in _iter_frames(source['path'], read_columns, source.get('chunk_rows') or CHUNK_ROWS, years):
+        chunk = data_schema.apply_schema(chunk, is_traffic)
+        # Text columns left by the schema get the pyarrow-backed `string` dtype of the shared in-memory frame
+        text_columns = chunk.select_dtypes(include='object').columns
+        chunk = chunk.astype({col: pd.StringDtype("pyarrow") for col in text_columns})
+        if filtered:
+            dates = pd.to_datetime(chunk[data_schema.DATE_COLUMN], errors='coerce')
+            mask = dates.notna()
+            if start is not None:
+                mask &= dates >= start
+            if end is not None:
+                mask &= dates <= end
+            chunk = chunk[mask.to_numpy()]
+        yield chunk[[col for col in chunk.columns if col in columns]]
+
+
+# ==================================================================================
+# Block 1: Partial Aggregates
+# ==================================================================================
+def _partial_name(col: str, stat: str) -> str:
+    return f"{col}:{stat}"
+# -------------------------------------------------------------------------------
+def _plain_keys(keys_frame: pd.DataFrame) -> pd.DataFrame:
+    # Categorical keys of different chunks have different categories: merge them as plain labels
+    for col in keys_frame.columns:
+        if isinstance(keys_frame[col].dtype, pd.CategoricalDtype):
+            keys_frame[col] = keys_frame[col].astype(keys_frame[col].cat.categories.dtype)
+    return keys_frame
+# -------------------------------------------------------------------------------
+def partial_aggregate(chunk: pd.DataFrame, keys: list, stats: dict, shifts: dict) -> pd.DataFrame:
+    """
+    Reduces one chunk to its partial aggregates per group.
+
+    Args:
+        chunk (pd.DataFrame): Typed rows.
+        keys (list): Grouping columns.
+        stats (dict): {column: set of partials} with partials from MERGE_FUNCS.
+        shifts (dict): {column: value} subtracted before squaring (keeps sums of squares small,
+            so the standard deviation does not lose precision). Filled on first use.
+
+    Returns:
+        pd.DataFrame: The partials (ROWS_PARTIAL plus "column:partial" columns) with the
+        group keys as plain columns.
+    """
+    work = {ROWS_PARTIAL: np.ones(len(chunk), dtype=np.int64)}
+    agg = {ROWS_PARTIAL: 'sum'}
+    for col, needed in stats.items():
+        values = chunk[col]
+        wide = values.astype(np.int64) if pd.api.types.is_integer_dtype(values) else values.astype(np.float64)
+        if 'count' in needed:
+            work[_partial_name(col, 'count')] = values.notna().to_numpy(dtype=np.int64)
+        if 'sum' in needed:
+            work[_partial_name(col, 'sum')] = wide.to_numpy()
+        if 'sumsq' in needed:
+            if col not in shifts and values.notna().any():
+                shifts[col] = float(values.dropna().iloc[0])
+            work[_partial_name(col, 'sumsq')] = ((wide.astype(np.float64) - shifts.get(col, 0.0)) ** 2).to_numpy()
+        for stat in ('min', 'max'):
+            if stat in needed:
+                work[_partial_name(col, stat)] = values.to_numpy()
+        agg.update({_partial_name(col, stat): MERGE_FUNCS[stat] for stat in needed})
+
+    frame = pd.DataFrame(work, index=chunk.index)
+    for col in keys:
+        frame[col] = chunk[col]
+    partial = frame.groupby(keys, observed=True, sort=False).agg(agg).reset_index()
+    return _plain_keys(partial)
+# -------------------------------------------------------------------------------
+def merge_partials(partials: list, keys: list) -> pd.DataFrame:
+    """
+    Combines partial aggregates of several chunks into one partial per group.
+    """
+    combined = pd.concat(partials, ignore_index=True)
+    agg = {col: 'sum' if col == ROWS_PARTIAL else MERGE_FUNCS[col.rsplit(':', 1)[1]] for col in combined.columns if col not in keys}
+    return combined.groupby(keys, sort=False).agg(agg).reset_index()
+
+
+# ==================================================================================
+# Block 2: Final Tables
+# ==================================================================================
+def _restore_integer(values: pd.Series, dtype) -> pd.Series:
+    # pandas keeps integer sums in the column's own dtype when every sum fits in it
+    if not pd.api.types.is_integer_dtype(dtype) or values.empty:
+        return values
+    info = np.iinfo(dtype)
+    if values.min() >= info.min and values.max() <= info.max:
+        return values.astype(dtype)
+    return values
+# -------------------------------------------------------------------------------
+def _final_value(partial: pd.DataFrame, col: str, func: str, dtype, shift: float) -> pd.Series:
+    if func == 'count':
+        return partial[_partial_name(col, 'count')].astype(np.int64)
+    if func in ('min', 'max'):
+        values = partial[_partial_name(col, func)]
+        return values if values.isna().any() else values.astype(dtype)
+
+    total = partial[_partial_name(col, 'sum')]
+    if func == 'sum':
+        return _restore_integer(total, dtype) if pd.api.types.is_integer_dtype(dtype) else total.astype(dtype)
+
+    count = partial[_partial_name(col, 'count')].astype(np.float64)
+    float_dtype = dtype if pd.api.types.is_float_dtype(dtype) else np.float64
+    if func == 'mean':
+        return (total.astype(np.float64) / count.where(count > 0)).astype(float_dtype)
+
+    # std (ddof=1) from the shifted sum of squares: sum((x - k)^2) - (sum(x) - n*k)^2 / n
+    shifted_total = total.astype(np.float64) - count * shift
+    squares = partial[_partial_name(col, 'sumsq')] - shifted_total ** 2 / count.where(count > 0)
+    variance = squares.clip(lower=0) / (count - 1).where(count > 1)
+    return np.sqrt(variance).astype(float_dtype)
+# -------------------------------------------------------------------------------
+def _result_key(source: dict, keys: list, agg_dict: dict, prepare, columns: list | None) -> tuple | None:
+    # Dataset version (file mtime/size + appended deltas) + day range + aggregation; None when
+    # prepare cannot be named (lambdas / nested functions), so its result is not cached
+    prepare_name = None
+    if prepare is not None:
+        prepare_name = f"{prepare.__module__}.{prepare.__qualname__}"
+        if '<' in prepare_name:
+            return None
+    return (
+        os.path.abspath(source['path']),
+        dataset_deltas.get_state(source['path'])['version'],
+        str(source.get('start_day')),
+        str(source.get('end_day')),
+        tuple(keys),
+        tuple((col, tuple(funcs)) for col, funcs in agg_dict.items()),
+        prepare_name,
+        tuple(columns) if columns is not None else None,
+    )
+# -------------------------------------------------------------------------------
+def aggregate(source, keys: list, agg_dict: dict, prepare=None, columns: list | None = None) -> pd.DataFrame:
+    """
+    Out-of-core df.groupby(keys, observed=True).agg(agg_dict) over a dataset file.
+
+    Integer counts, sums, minimums, maximums and means are identical to the in-memory result;
+    float sums and standard deviations match it up to floating point rounding. Group keys keep
+    the dtype of the dataset's column (categorical keys list the categories seen while reading).
+
+    Args:
+        source: A dataset path or a make_source() dict.
+        keys (list): Grouping columns.
+        agg_dict (dict): {column: [function, ...]} with functions from SUPPORTED_FUNCS.
+            An empty dict only counts the rows of each group (see count_rows).
+        prepare (callable): Optional prepare(chunk) -> DataFrame applied to every typed chunk,
+            e.g. to derive a column or drop rows. It must not depend on other chunks.
+        columns (list): Columns to read. Defaults to the keys and the aggregated columns.
+
+    Returns:
+        pd.DataFrame: The aggregated table indexed by the keys, with (column, function)
+        columns, plus a ROWS_PARTIAL column when agg_dict is empty. Tables are cached per
+        dataset version and day range (see MAX_CACHED_RESULTS).
+    """
+    source = _as_source(source)
+    try:
+        key = _result_key(source, keys, agg_dict, prepare, columns)
+    except OSError:
+        key = None
+    with _results_lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key].copy()
+
+    result = _aggregate_chunks(source, keys, agg_dict, prepare, columns)
+    if key is not None:
+        with _results_lock:
+            _results[key] = result.copy()
+            while len(_results) > MAX_CACHED_RESULTS:
+                _results.popitem(last=False)
+    return result
+# -------------------------------------------------------------------------------
+def _aggregate_chunks(source: dict, keys: list, agg_dict: dict, prepare, columns: list | None) -> pd.DataFrame:
+    for funcs in agg_dict.values():
+        unsupported = [func for func in funcs if func not in SUPPORTED_FUNCS]
+        if unsupported:
+            raise ValueError(f"Unsupported aggregation function(s) for chunked aggregation: {unsupported}")
+    stats = {col: {stat for func in funcs for stat in SUPPORTED_FUNCS[func]} for col, funcs in agg_dict.items()}
+    if columns is None:
+        columns = list(dict.fromkeys(list(keys) + list(agg_dict)))
+
+    shifts, dtypes, categories = {}, {}, {}
+    merged, pending, pending_rows = None, [], 0
+    for chunk in iter_chunks(source, columns):
+        if prepare is not None:
+            chunk = prepare(chunk)
+
+        # Per-chunk dtypes (narrowed by apply_schema) widen to the dtype of the whole column
+        for col in list(keys) + list(agg_dict):
+            dtype = chunk[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                categories[col] = categories.get(col, pd.Index([], dtype=dtype.categories.dtype)).union(dtype.categories)
+            elif col not in dtypes:
+                dtypes[col] = dtype
+            elif dtypes[col] != dtype:
+                dtypes[col] = np.promote_types(dtypes[col], dtype) if isinstance(dtype, np.dtype) else dtype
+        if chunk.empty:
+            continue
+
+        partial = partial_aggregate(chunk, keys, stats, shifts)
+        pending.append(partial)
+        pending_rows += len(partial)
+        if pending_rows >= MERGE_ROWS:
+            merged = merge_partials(([merged] if merged is not None else []) + pending, keys)
+            pending, pending_rows = [], 0
+
+    parts = ([merged] if merged is not None else []) + pending
+    if not parts:
+        return pd.DataFrame()
+
+    partial = pd.concat(parts, ignore_index=True)
+    # Back to the dataset's key dtypes, so the final merge orders the groups like the in-memory groupby
+    for col in keys:
+        if col in categories:
+            partial[col] = pd.Categorical(partial[col], categories=categories[col].sort_values())
+        elif col in dtypes:
+            partial[col] = partial[col].astype(dtypes[col])
+    merge_agg = {col: 'sum' if col == ROWS_PARTIAL else MERGE_FUNCS[col.rsplit(':', 1)[1]] for col in partial.columns if col not in keys}
+    partial = partial.groupby(keys, observed=True).agg(merge_agg)
+
+    if not agg_dict:
+        return partial[[ROWS_PARTIAL]]
+    result = {}
+    for col, funcs in agg_dict.items():
+        dtype = dtypes.get(col, np.float64)
+        for func in funcs:
+            result[(col, func)] = _final_value(partial, col, func, dtype, shifts.get(col, 0.0))
+    return pd.DataFrame(result, index=partial.index)
+# -------------------------------------------------------------------------------
+def count_rows(source, keys: list, prepare=None, columns: list | None = None) -> pd.Series:
+    """
+    Out-of-core df.groupby(keys, observed=True).size() over a dataset file.
+    """
+    counts = aggregate(source, keys, {}, prepare, columns)
+    if counts.empty:
+        return pd.Series(dtype=np.int64)
+    return counts[ROWS_PARTIAL].rename(None)
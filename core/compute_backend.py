@@ -0,0 +1,192 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import polars as pl
+except ImportError:  # Optional dependency: without it every aggregation runs on pandas
+    pl = None
+
+# This module is the grouped-aggregation layer shared by core.utils, the rollup behind the
+# dashboard summaries and the plot modules. Callers pass and get back pandas objects; the
+# aggregation itself runs on Polars' multi-threaded lazy engine when it is installed and the
+# frame is large enough to pay for the hand-over, and on pandas otherwise. Both backends
+# return the same values, dtypes and group order as the pandas groupby they replace.
+
+# ---------------------------------------------------------
+# BACKEND CONFIGURATION
+# ---------------------------------------------------------
+# "auto" (Polars when installed), "polars" or "pandas"; override with the COMPUTE_BACKEND env variable.
+# Polars uses every core by default (limit it with the POLARS_MAX_THREADS env variable).
+COMPUTE_BACKEND = os.environ.get("COMPUTE_BACKEND", "auto").lower()
+# Smaller frames are aggregated by pandas: handing them to Polars costs more than it saves
+POLARS_MIN_ROWS = int(os.environ.get("POLARS_MIN_ROWS", 100_000))
+
+# Aggregation functions both backends support
+AGG_FUNCS = ['size', 'count', 'sum', 'mean', 'min', 'max', 'std']
+
+
+# ==================================================================================
+# Block 0: Backend Selection
+# ==================================================================================
+def get_backend_name() -> str:
+    """
+    Returns the configured backend: "polars" when requested (or "auto") and installed, else "pandas".
+    """
+    if COMPUTE_BACKEND in ("auto", "polars") and pl is not None:
+        return "polars"
+    return "pandas"
+# -------------------------------------------------------------------------------
+def _use_polars(df: pd.DataFrame, backend: str | None) -> bool:
+    if backend == "pandas" or pl is None:
+        return False
+    if backend == "polars":
+        return True
+    return get_backend_name() == "polars" and len(df) >= POLARS_MIN_ROWS
+
+
+# ==================================================================================
+# Block 1: pandas <-> Polars
+# ==================================================================================
+def _to_polars_series(name: str, series: pd.Series):
+    # Categorical columns are handed over as their integer codes (missing = null) and numeric
+    # columns as their NumPy buffers, so no labels are copied or hashed
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        values = pl.Series(name, codes)
+        missing = np.flatnonzero(codes < 0)
+        return values.scatter(missing, None) if len(missing) else values
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufM":
+        return pl.Series(name, series.to_numpy(), nan_to_null=(dtype.kind == "f"))
+    return pl.Series(name, pl.from_arrow(pa.array(series, from_pandas=True)))
+# -------------------------------------------------------------------------------
+def _key_values(values, series: pd.Series):
+    # Group keys back to the dtype of the original column
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = values.fill_null(-1).to_numpy()
+        return pd.Categorical.from_codes(codes, dtype=dtype)
+    if isinstance(dtype, np.dtype):
+        array = values.to_numpy()
+        return array if values.null_count else array.astype(dtype)
+    return pd.array(values.to_arrow(), dtype=dtype) if isinstance(dtype, pd.StringDtype) else pd.array(values.to_list(), dtype=dtype)
+# -------------------------------------------------------------------------------
+def _polars_expr(col: str, func: str, name: str):
+    if func == 'size':
+        return pl.len().alias(name)
+    column = pl.col(col)
+    return {
+        'count': column.count(),
+        'sum': column.sum(),
+        'mean': column.mean(),
+        'min': column.min(),
+        'max': column.max(),
+        'std': column.std(ddof=1),
+    }[func].alias(name)
+# -------------------------------------------------------------------------------
+def _result_values(values, func: str, dtype) -> np.ndarray:
+    # Result dtypes follow pandas groupby: counts are int64, integer sums keep the column dtype
+    # when every sum fits in it, means / stds of integers are float64, min / max keep the dtype
+    if func in ('size', 'count'):
+        return values.to_numpy().astype(np.int64)
+    array = values.to_numpy()
+    if func == 'sum':
+        if dtype.kind == 'b':
+            return array.astype(np.int64)
+        if dtype.kind in 'iu':
+            info = np.iinfo(dtype)
+            if not len(array) or (array.min() >= info.min and array.max() <= info.max):
+                return array.astype(dtype)
+            return array.astype(np.int64)
+        return array.astype(dtype)
+    if func in ('mean', 'std'):
+        return array.astype(dtype if dtype.kind == 'f' else np.float64)
+    return array if values.null_count else array.astype(dtype)
+# -------------------------------------------------------------------------------
+def _polars_group_agg(df: pd.DataFrame, keys: list, aggs: list, dropna: bool) -> tuple:
+    # aggs: [(result name, column, function)] -> (index, {result name: values})
+    columns = list(dict.fromkeys(list(keys) + [col for _, col, func in aggs if func != 'size']))
+    frame = pl.DataFrame([_to_polars_series(col, df[col]) for col in columns])
+
+    query = frame.lazy()
+    if dropna:
+        query = query.drop_nulls(keys)
+    names = [f"_agg{number}" for number in range(len(aggs))]
+    query = query.group_by(keys).agg([_polars_expr(col, func, name) for name, (_, col, func) in zip(names, aggs)])
+    # Same group order as pandas (sort=True): by key values (categories by code), missing keys last
+    result = query.sort(keys, nulls_last=True).collect()
+
+    key_arrays = [_key_values(result[col], df[col]) for col in keys]
+    if len(keys) == 1:
+        index = pd.Index(key_arrays[0], name=keys[0])
+    else:
+        index = pd.MultiIndex.from_arrays(key_arrays, names=keys)
+    values = {
+        result_name: _result_values(result[name], func, np.dtype(np.int64) if func == 'size' else df[col].dtype)
+        for name, (result_name, col, func) in zip(names, aggs)
+    }
+    return index, values
+
+
+# ==================================================================================
+# Block 2: Aggregation API
+# ==================================================================================
+def group_agg(df: pd.DataFrame, keys: list, agg_dict: dict, dropna: bool = True, backend: str | None = None) -> pd.DataFrame:
+    """
+    df.groupby(keys, observed=True, dropna=dropna).agg(agg_dict) on the configured backend.
+
+    Args:
+        df (pd.DataFrame): The data.
+        keys (list): Grouping columns.
+        agg_dict (dict): {column: [function, ...]} with functions from AGG_FUNCS.
+        dropna (bool): Drop groups with a missing key value (pandas default).
+        backend (str): Force "pandas" or "polars" (None = configured backend).
+
+    Returns:
+        pd.DataFrame: One row per group, with (column, function) columns.
+    """
+    keys = list(keys)
+    if not _use_polars(df, backend):
+        return df.groupby(keys, observed=True, dropna=dropna).agg(agg_dict)
+    aggs = [((col, func), col, func) for col, funcs in agg_dict.items() for func in funcs]
+    index, values = _polars_group_agg(df, keys, aggs, dropna)
+    return pd.DataFrame(values, index=index)
+# -------------------------------------------------------------------------------
+def group_named_agg(df: pd.DataFrame, keys: list, named_aggs: dict, dropna: bool = True, backend: str | None = None) -> pd.DataFrame:
+    """
+    df.groupby(keys, observed=True, dropna=dropna).agg(**named_aggs) on the configured backend.
+
+    Args:
+        named_aggs (dict): {result column: (column, function)} with functions from AGG_FUNCS.
+
+    Returns:
+        pd.DataFrame: One row per group, with the named result columns.
+    """
+    keys = list(keys)
+    if not _use_polars(df, backend):
+        return df.groupby(keys, observed=True, dropna=dropna, sort=True).agg(**named_aggs)
+    aggs = [(name, col, func) for name, (col, func) in named_aggs.items()]
+    index, values = _polars_group_agg(df, keys, aggs, dropna)
+    return pd.DataFrame(values, index=index)
+# -------------------------------------------------------------------------------
+def group_reduce(df: pd.DataFrame, keys: list | str, col: str, func: str, backend: str | None = None) -> pd.Series:
+    """
+    df.groupby(keys, observed=True)[col].<func>() on the configured backend.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    if not _use_polars(df, backend):
+        return df.groupby(keys, observed=True)[col].agg(func)
+    index, values = _polars_group_agg(df, keys, [(col, col, func)], dropna=True)
+    return pd.Series(values[col], index=index, name=col)
+# -------------------------------------------------------------------------------
+def group_size(df: pd.DataFrame, keys: list | str, dropna: bool = True, backend: str | None = None) -> pd.Series:
+    """
+    df.groupby(keys, observed=True, dropna=dropna).size() on the configured backend.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    if not _use_polars(df, backend):
+        return df.groupby(keys, observed=True, dropna=dropna).size()
+    index, values = _polars_group_agg(df, keys, [('size', None, 'size')], dropna)
+    return pd.Series(values['size'], index=index)
@@ -1,7 +1,8 @@
-import pandas as pd 
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.ticker as mtick
+from core.data_schema import drop_unused_categories
+from core.severity import calc_severity_scores, SEVERITY_SCORE_COLUMN
 
 # This module handles plots for the Dashboard (Home Page)
 
@@ -46,12 +47,14 @@ apply_plot_style()
 
 # =============================== Dashboard Overview Plots =============================================
 # ----- Amit's Plots -----
-def plot_violation_type_percentage_pie(df):
+def plot_violation_type_percentage_pie(violation_counts):
     """
     Plots the percentage of traffic violation types as a pie chart.
+
+    Args:
+        violation_counts (pd.Series): No of violations indexed by violation type.
     """
     apply_plot_style()
-    violation_counts = df['Violation_Type'].value_counts()
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     wedges, texts, autotexts = ax.pie(
@@ -181,13 +184,15 @@ def plot_violations_by_location(location_based_violations):
     return fig
 # =================================================================================
 # ---- Anshu's Plots ----
-def plot_license_validity_by_gender(df):
+def plot_license_validity_by_gender(validity_gender):
 
     """
     Anshu: License Validity by Gender.
+
+    Args:
+        validity_gender (pd.DataFrame): Counts with License_Validity as index and Driver_Gender as columns.
     """
     apply_plot_style()
-    validity_gender = df.groupby(['License_Validity', 'Driver_Gender']).size().unstack(fill_value=0)
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     validity_gender.plot(
@@ -243,7 +248,7 @@ def plot_vehicle_type_vs_violation_type(df):
     apply_plot_style()
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     sns.countplot(
-        data=df, 
+        data=drop_unused_categories(df, ['Violation_Type', 'Vehicle_Type']), 
         x='Violation_Type',
         hue='Vehicle_Type',
         ax=ax,
@@ -264,34 +269,16 @@ def plot_severity_heatmap_by_location(df):
     Mrunalini: Average Severity Score by Location and Violation Type.
     """
     apply_plot_style()
-    # Helper to calculate severity (Internal logic kept same)
-    def calc_severity_score(row):
-        severity = 0
-        if pd.notnull(row.get('Fine_Amount')): severity += row['Fine_Amount'] / 1000
-        if pd.notnull(row.get('Penalty_Points')): severity += row['Penalty_Points'] 
-        if pd.notnull(row.get('Recorded_Speed')) and pd.notnull(row.get('Speed_Limit')):
-            if row['Recorded_Speed'] > row['Speed_Limit']:
-                severity += (row['Recorded_Speed'] - row['Speed_Limit']) / 10
-        if pd.notnull(row.get('Alcohol_Level')): severity += row['Alcohol_Level'] * 10
-        if row.get('Helmet_Worn') == 'No': severity += 10
-        if row.get('Seatbelt_Worn') == 'No': severity += 10
-        if row.get('Traffic_Light_Status') == 'Red': severity += 15
-        if pd.notnull(row.get('Previous_Violations')): severity += row['Previous_Violations'] * 1.5
-        return severity
-
-    # We need a copy to avoid SettingWithCopyWarning on the original df if modifying
-    # But for dashboard summary df is passed, better to just apply
-    # Optimizing: Calculate on the fly might be slow for full df, but for dashboard summary (last n days) should be fine.
-    
     # We'll use a local copy to be safe
     local_df = df.copy()
-    local_df['Violation_Severity_Score'] = local_df.apply(calc_severity_score, axis=1)
+    local_df[SEVERITY_SCORE_COLUMN] = calc_severity_scores(local_df)
     
     location_heatmap = local_df.pivot_table(
-        values='Violation_Severity_Score',
+        values=SEVERITY_SCORE_COLUMN,
         index='Location',
         columns='Violation_Type',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     )
 
     fig, ax = plt.subplots(figsize=FIG_SIZE)
@@ -1,33 +1,45 @@
 import pandas as pd
 import core.dashboard_plot as dashboard_plot
+from core import rollup as daily_rollup, figure_cache, compute_backend
+
+# The summary functions read from a slice of the daily rollup cube (see core/rollup.py),
+# not from the raw rows, so their cost does not grow with the size of the dataset.
+# Figures are returned as PNG bytes from the figure render cache (see core/figure_cache.py).
 
 # =================================================================================
-def get_violations_summary_of_last_n_days(df_last_n_days: pd.DataFrame) -> dict:
+def get_violations_summary_of_last_n_days(rollup_last_n_days: dict) -> dict:
     # 1. calculate the no of violations in last n days
-    total_no_of_violations = df_last_n_days.shape[0]
+    total_no_of_violations = daily_rollup.total_violations(rollup_last_n_days)
 
     # 2. Generate a figure of pie chart for violation types
-    fig = dashboard_plot.plot_violation_type_percentage_pie(df_last_n_days)
+    violation_counts = daily_rollup.counts_by(rollup_last_n_days, 'Violation_Type').sort_values(ascending=False, kind='stable')
+    fig = figure_cache.render_png(dashboard_plot.plot_violation_type_percentage_pie, violation_counts)
     
     return {
         'total_no_of_violations': total_no_of_violations,
+        'no_of_vehicle_types': len(daily_rollup.counts_by(rollup_last_n_days, 'Vehicle_Type')),
         'fig': fig
     }
 
 # =================================================================================
-def get_total_fines_generated(df_last_n_days: pd.DataFrame) -> dict:
+def get_total_fines_generated(rollup_last_n_days: dict) -> dict:
+    cube = rollup_last_n_days['cube']
     # 1. calculate total fines in last n days
-    total_fines = df_last_n_days['Fine_Amount'].sum()
-    avg_fine_per_violation = total_fines / df_last_n_days.shape[0] if df_last_n_days.shape[0] > 0 else 0
+    total_fines = cube['Fine_Sum'].sum()
+    total_no_of_violations = daily_rollup.total_violations(rollup_last_n_days)
+    avg_fine_per_violation = total_fines / total_no_of_violations if total_no_of_violations > 0 else 0
     # ==============================================================================
     # 2. Prepare data for fines based on violation type
-    df_last_n_days['Fine_Amount'] = pd.to_numeric(df_last_n_days['Fine_Amount'], errors='coerce').fillna(0)
-    df_last_n_days['Fine_Paid'] = df_last_n_days['Fine_Paid'].astype(str).str.upper().str.strip()
-    summary = (df_last_n_days.groupby(['Violation_Type', 'Fine_Paid'])['Fine_Amount'].sum().unstack(fill_value=0))
+    fine_status = pd.DataFrame({
+        'Violation_Type': cube['Violation_Type'],
+        'Fine_Paid': cube['Fine_Paid'].astype(str).str.upper().str.strip(),
+        'Fine_Amount': cube['Fine_Sum'],
+    })
+    summary = compute_backend.group_reduce(fine_status, ['Violation_Type', 'Fine_Paid'], 'Fine_Amount', 'sum').unstack(fill_value=0)
     summary = summary.rename(columns={'YES': 'Paid', 'NO': 'Unpaid'})
     
     # 3. Generate a figure of fines based on violation type
-    fig = dashboard_plot.plot_fines_based_on_violation_type(summary)
+    fig = figure_cache.render_png(dashboard_plot.plot_fines_based_on_violation_type, summary)
     
     return {
         'total_fines': total_fines,
@@ -36,10 +48,13 @@ def get_total_fines_generated(df_last_n_days: pd.DataFrame) -> dict:
     }
 
 # =================================================================================
-def get_violations_by_location(df_last_n_days: pd.DataFrame) -> dict:
+def get_violations_by_location(rollup_last_n_days: dict) -> dict:
     # 1. No Of Violations for the location
-    location_based_violations = df_last_n_days['Location'].value_counts().reset_index()
-    location_based_violations.columns = ['Location', 'No of Violations']
+    location_counts = daily_rollup.counts_by(rollup_last_n_days, 'Location').sort_values(ascending=False, kind='stable')
+    location_based_violations = pd.DataFrame({
+        'Location': location_counts.index.astype(object),
+        'No of Violations': location_counts.to_numpy(),
+    })
 
     # 2. Total No Of Violations
     total_locations = location_based_violations.shape[0]
@@ -57,7 +72,7 @@ def get_violations_by_location(df_last_n_days: pd.DataFrame) -> dict:
         plot_data = location_based_violations
 
     # 5. Plot pie chart for location based violations
-    fig = dashboard_plot.plot_violations_by_location(plot_data)
+    fig = figure_cache.render_png(dashboard_plot.plot_violations_by_location, plot_data)
     
     return {
         'total_locations': total_locations,
@@ -66,28 +81,27 @@ def get_violations_by_location(df_last_n_days: pd.DataFrame) -> dict:
     }
 
 # =================================================================================
-def get_license_insights(df_last_n_days: pd.DataFrame) -> dict:
+def get_license_insights(rollup_last_n_days: dict) -> dict:
     """
     Calculates insights related to License validity and type.
     """
-    if df_last_n_days.empty:
+    total_licenses = daily_rollup.total_violations(rollup_last_n_days)
+    if total_licenses == 0:
         return {}
         
     # 1. Top License Type
-    if 'License_Type' in df_last_n_days.columns:
-        most_common_license_type = df_last_n_days['License_Type'].mode()[0]
-    else:
-        most_common_license_type = "N/A"
+    most_common_license_type = "N/A"
+    if 'License_Type' in rollup_last_n_days['side_counts']:
+        most_common_license_type = daily_rollup.mode_from_counts(daily_rollup.counts_by(rollup_last_n_days, 'License_Type')) or "N/A"
         
     # 2. Percentage of License Validity Expired
-    expired_percentage = 0.0
-    if 'License_Validity' in df_last_n_days.columns:
-        total_licenses = len(df_last_n_days)
-        expired_count = df_last_n_days[df_last_n_days['License_Validity'] == 'Expired'].shape[0]
-        expired_percentage = (expired_count / total_licenses) * 100 if total_licenses > 0 else 0
+    validity_counts = daily_rollup.counts_by(rollup_last_n_days, 'License_Validity')
+    expired_count = validity_counts.get('Expired', 0)
+    expired_percentage = (expired_count / total_licenses) * 100
 
     # 3. Generate License Validity Pie Chart
-    validity_fig = dashboard_plot.plot_license_validity_by_gender(df_last_n_days)
+    validity_gender = daily_rollup.counts_by(rollup_last_n_days, ['License_Validity', 'Driver_Gender']).unstack(fill_value=0)
+    validity_fig = figure_cache.render_png(dashboard_plot.plot_license_validity_by_gender, validity_gender)
     
     return {
         'most_common_license_type': most_common_license_type,
@@ -101,39 +115,31 @@ def get_license_insights(df_last_n_days: pd.DataFrame) -> dict:
 # =======================================================================================================================
 # =======================================================================================================================
 # =======================================================================================================================
-def get_global_overview_metrics(df: pd.DataFrame) -> dict:
+def get_global_overview_metrics(rollup_global: dict) -> dict:
     """
     Generates summary statistics for the Global Data Overview.
     """
+    cube = rollup_global['cube']
     metrics = {}
-    metrics['total_violations'] = len(df)
+    metrics['total_violations'] = daily_rollup.total_violations(rollup_global)
     
-    if 'Violation_Type' in df.columns:
-        metrics['most_common_violation'] = df['Violation_Type'].mode()[0] if not df['Violation_Type'].mode().empty else "N/A"
-    else:
-        metrics['most_common_violation'] = "N/A"
+    metrics['most_common_violation'] = daily_rollup.mode_from_counts(daily_rollup.counts_by(rollup_global, 'Violation_Type')) or "N/A"
     
-    if 'Fine_Amount' in df.columns:
-        metrics['avg_fine'] = df['Fine_Amount'].mean()
-        metrics['max_fine'] = df['Fine_Amount'].max()
-        metrics['min_fine'] = df['Fine_Amount'].min()
-    else:
-        metrics['avg_fine'] = 0
-        metrics['max_fine'] = 0
-        metrics['min_fine'] = 0
+    # Mean / max / min of the raw rows, combined from the per-group measures
+    fine_count = cube['Fine_Count'].sum()
+    metrics['avg_fine'] = cube['Fine_Sum'].sum() / fine_count if fine_count > 0 else float('nan')
+    metrics['max_fine'] = cube['Fine_Max'].max()
+    metrics['min_fine'] = cube['Fine_Min'].min()
     
-    if 'Location' in df.columns:
-        metrics['top_location'] = df['Location'].mode()[0] if not df['Location'].mode().empty else "N/A"
-    else:
-        metrics['top_location'] = "N/A"
+    metrics['top_location'] = daily_rollup.mode_from_counts(daily_rollup.counts_by(rollup_global, 'Location')) or "N/A"
             
-    if 'Issuing_Agency' in df.columns:
-        metrics['top_agency'] = df['Issuing_Agency'].mode()[0] if not df['Issuing_Agency'].mode().empty else "N/A"
+    if 'Issuing_Agency' in rollup_global['side_counts']:
+        metrics['top_agency'] = daily_rollup.mode_from_counts(daily_rollup.counts_by(rollup_global, 'Issuing_Agency')) or "N/A"
     else:
         metrics['top_agency'] = "N/A"
 
-    if 'Payment_Method' in df.columns:
-        metrics['common_payment'] = df['Payment_Method'].mode()[0] if not df['Payment_Method'].mode().empty else "N/A"
+    if 'Payment_Method' in rollup_global['side_counts']:
+        metrics['common_payment'] = daily_rollup.mode_from_counts(daily_rollup.counts_by(rollup_global, 'Payment_Method')) or "N/A"
     else:
         metrics['common_payment'] = "N/A"
              
@@ -141,15 +147,16 @@ def get_global_overview_metrics(df: pd.DataFrame) -> dict:
 
 
 # =======================================================================================================================
-def get_behavioral_analysis(df: pd.DataFrame) -> dict:
+def get_behavioral_analysis(rollup_behavior: dict) -> dict:
     """
-    Computes flags and returns aggregate counts/percentages for:
+    Computes aggregate counts/percentages from the rollup flag counts for:
     - Over Speeding
-    - High Fine (>90th percentile)
-    - Repeat Offenders (>2 violations)
+    - Court Appearance Required
+    - Repeat Offenders
     - Bad Weather Risk
     """
-    total_records = len(df)
+    cube = rollup_behavior['cube']
+    total_records = daily_rollup.total_violations(rollup_behavior)
     analysis_results = {
         'total_count': total_records,
         'over_speeding_stats': (0, 0.0),
@@ -162,40 +169,33 @@ def get_behavioral_analysis(df: pd.DataFrame) -> dict:
     if total_records == 0:
         return analysis_results
 
-    # Helper to calculate count and percentage
-    def calculate_stats(boolean_mask):
-        count = boolean_mask.sum()
+    # Helper to calculate count and percentage from a summed flag measure
+    def calculate_stats(measure):
+        count = int(cube[measure].sum())
         percentage = (count / total_records) * 100
         return (count, percentage)
 
     # 1. Over Speeding
-    analysis_results['over_speeding_stats'] = calculate_stats(df['Recorded_Speed'] > df['Speed_Limit'])
+    analysis_results['over_speeding_stats'] = calculate_stats('Over_Speeding')
 
     # 2. Court Appearance Required
-    if 'Court_Appearance_Required' in df.columns:
-        analysis_results['court_appearance_stats'] = calculate_stats(df['Court_Appearance_Required'] == 'Yes')
+    analysis_results['court_appearance_stats'] = calculate_stats('Court_Required')
 
     # 3. Repeat Offenders (Based on Comments == 'Repeat Offender')
-    if 'Comments' in df.columns:
-        repeat_offender_counts = df[df['Comments'] == 'Repeat Offender'].value_counts().sum()
-        if len(df) > 0:
-            repeat_offender_pct = (repeat_offender_counts / len(df)) * 100
-
-        analysis_results['repeat_offender_stats'] = (repeat_offender_counts, repeat_offender_pct)
-
-    if 'Weather_Condition' in df.columns:
-        adverse_weather_conditions = {'fog', 'rain', 'snow', 'thunderstorm', 'hail', 'mist'}
-        # Case-insensitive check
-        is_adverse_weather = df['Weather_Condition'].astype(str).str.lower().isin(adverse_weather_conditions)
-        analysis_results['bad_weather_stats'] = calculate_stats(is_adverse_weather)
+    analysis_results['repeat_offender_stats'] = calculate_stats('Repeat_Offenders')
+
+    weather_counts = daily_rollup.counts_by(rollup_behavior, 'Weather_Condition')
+    adverse_weather_conditions = {'fog', 'rain', 'snow', 'thunderstorm', 'hail', 'mist'}
+    # Case-insensitive check
+    is_adverse_weather = weather_counts.index.astype(str).str.lower().isin(adverse_weather_conditions)
+    bad_weather_count = int(weather_counts[is_adverse_weather].sum())
+    analysis_results['bad_weather_stats'] = (bad_weather_count, (bad_weather_count / total_records) * 100)
         
-        # Top Weather
-        if not df['Weather_Condition'].empty:
-            weather_mode_result = df['Weather_Condition'].mode()
-            if not weather_mode_result.empty:
-                tps_weather_name = weather_mode_result[0]
-                tps_weather_count = (df['Weather_Condition'] == tps_weather_name).sum()
-                analysis_results['most_frequent_weather_stats'] = (tps_weather_name, tps_weather_count, (tps_weather_count / total_records) * 100)
+    # Top Weather
+    tps_weather_name = daily_rollup.mode_from_counts(weather_counts)
+    if tps_weather_name is not None:
+        tps_weather_count = int(weather_counts[tps_weather_name])
+        analysis_results['most_frequent_weather_stats'] = (tps_weather_name, tps_weather_count, (tps_weather_count / total_records) * 100)
     return analysis_results
 
 
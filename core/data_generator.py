@@ -1,5 +1,13 @@
+import os
 import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from faker import Faker
 
 
@@ -145,4 +153,269 @@ def generate_dataset_by_days(start_date=("2015-01-01"), end_date=(datetime.now()
             records.append(generate_record(violation_counter, current_date))
             violation_counter += 1
         current_date += timedelta(days=1)
-    return records
\ No newline at end of file
+    return records
+
+
+# ====================================================================================
+# COLUMNAR (VECTORIZED) DATASET GENERATOR
+# ====================================================================================
+# Same columns and value rules as generate_record, but each column is drawn for all rows
+# with one NumPy call. Low-cardinality columns come back as `category`.
+
+# Every "HH:MM:SS" of a day (index = second of the day) and every possible Officer_ID
+TIME_STRINGS = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object)
+OFFICER_IDS = np.array([f"OFF{n}" for n in range(1000, 10000)], dtype=object)
+
+
+# -------------------------------------------------------------------------------
+def _choice_category(rng: np.random.Generator, values: list, size: int) -> pd.Categorical:
+    # Uniform pick from a (weighted by repetition) list, like random.choice
+    categories, inverse = np.unique(np.array(values, dtype=object), return_inverse=True)
+    codes = inverse[rng.integers(0, len(values), size)]
+    return pd.Categorical.from_codes(codes, categories=categories)
+# -------------------------------------------------------------------------------
+def _map_category(source: pd.Categorical, mapping: dict, default: str) -> pd.Categorical:
+    # Maps each category once, then broadcasts through the integer codes
+    mapped = np.array([mapping.get(cat, default) for cat in source.categories], dtype=object)
+    categories, inverse = np.unique(mapped, return_inverse=True)
+    return pd.Categorical.from_codes(inverse[source.codes], categories=categories)
+# -------------------------------------------------------------------------------
+def _map_numeric(rng: np.random.Generator, source: pd.Categorical, mapping: dict, default_low: int, default_high: int) -> np.ndarray:
+    # Categories without a mapping get a random integer per row, like mapping.get(key, random.randint(...))
+    mapped = np.array([mapping.get(cat, np.nan) for cat in source.categories], dtype=np.float64)
+    values = mapped[source.codes]
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = rng.integers(default_low, default_high + 1, missing.sum())
+    if np.array_equal(values, np.round(values)):
+        return values.astype(np.int64)
+    return values
+
+
+# -------------------------------------------------------------------------------
+def generate_records_frame(dates, start_idx: int = 1, seed=None) -> pd.DataFrame:
+    """
+    Generates one fake violation per entry of `dates`, column by column.
+
+    Args:
+        dates (array-like): The date of every row (datetime64 values, one per record).
+        start_idx (int): Number used for the first Violation_ID (VLT000001 for 1).
+        seed (int | np.random.Generator): Seed or generator for reproducible output.
+
+    Returns:
+        pd.DataFrame: Records with the same columns as generate_record.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(dates).normalize()
+    n = len(dates)
+
+    violation_ids = np.char.add("VLT", np.char.zfill(np.arange(start_idx, start_idx + n).astype(str), 6)).astype(object)
+
+    violation_type = _choice_category(rng, violation_types_list, n)
+
+    # Vehicle type is picked from the list allowed for each violation type
+    vehicle_categories = sorted({v for vt in violation_type.categories for v in vehicle_types_mapping.get(vt, [])})
+    vehicle_codes = np.empty(n, dtype=np.int16)
+    for vt_code, vt in enumerate(violation_type.categories):
+        allowed = np.array([vehicle_categories.index(v) for v in vehicle_types_mapping.get(vt, [])], dtype=np.int16)
+        rows = np.flatnonzero(violation_type.codes == vt_code)
+        vehicle_codes[rows] = allowed[rng.integers(0, len(allowed), len(rows))]
+    vehicle_type = pd.Categorical.from_codes(vehicle_codes, categories=vehicle_categories)
+
+    breathalyzer_result = _choice_category(rng, breathalyzer_results_list, n)
+
+    # Fine logic: violations older than 6 years are always paid
+    six_year_rule_date = pd.Timestamp.today().normalize() - pd.DateOffset(years=6)
+    fine_paid_codes = np.where(dates < six_year_rule_date, 1, rng.integers(0, 2, n))
+    fine_paid = pd.Categorical.from_codes(fine_paid_codes, categories=["No", "Yes"])
+
+    return pd.DataFrame({
+        "Violation_ID": violation_ids,
+        "Violation_Type": violation_type,
+        "Fine_Amount": _map_numeric(rng, violation_type, fine_mapping, 100, 10000),
+        "Location": _choice_category(rng, states_list, n),
+        "Date": dates,
+        "Time": TIME_STRINGS[rng.integers(0, 86400, n)],
+        "Vehicle_Type": vehicle_type,
+        "Vehicle_Color": _choice_category(rng, vehicle_colors_list, n),
+        "Vehicle_Model_Year": rng.integers(1990, dates.year.to_numpy() + 1),
+        "Registration_State": _choice_category(rng, states_list, n),
+        "Helmet_Worn": _map_category(vehicle_type, helmet_worn_mapping, "NA"),
+        "Seatbelt_Worn": _map_category(vehicle_type, seatbelt_worn_mapping, "NA"),
+        "Driver_Age": rng.integers(18, 81, n),
+        "Driver_Gender": _choice_category(rng, driver_genders_list, n),
+        "Number_of_Passengers": _map_numeric(rng, vehicle_type, no_of_passengers_mapping, 0, 50),
+        "Penalty_Points": rng.integers(0, 9, n),
+        "Weather_Condition": _choice_category(rng, weather_conditions_list, n),
+        "Road_Condition": _choice_category(rng, road_conditions_list, n),
+        "Officer_ID": OFFICER_IDS[rng.integers(0, len(OFFICER_IDS), n)],
+        "License_Type": _choice_category(rng, license_types_list, n),
+        "Issuing_Agency": _choice_category(rng, issuing_agencies_list, n),
+        "License_Validity": _choice_category(rng, license_validity_list, n),
+        "Traffic_Light_Status": _choice_category(rng, ["Red", "Green", "Yellow"], n),
+        "Speed_Limit": rng.integers(20, 121, n),
+        "Recorded_Speed": rng.integers(0, 201, n),
+        "Alcohol_Level": _map_numeric(rng, breathalyzer_result, alcohol_levels_mapping, 0, 0).astype(np.float64),
+        "Breathalyzer_Result": breathalyzer_result,
+        "Towed": _map_category(violation_type, towing_mapping, "No"),
+        "Fine_Paid": fine_paid,
+        "Payment_Method": _map_category(fine_paid, payment_methods_mapping, "NA"),
+        "Court_Appearance_Required": _map_category(violation_type, court_mapping, "No"),
+        "Previous_Violations": rng.integers(0, 21, n),
+        "Comments": _choice_category(rng, comments_list, n),
+    })
+
+
+# -------------------------------------------------------------------------------
+def generate_dataset_frame(start_date="2015-01-01", end_date=datetime.now().date().strftime("%Y-%m-%d"), min_records_per_day=5, max_records_per_day=15, seed=None) -> pd.DataFrame:
+    """
+    Vectorized version of generate_dataset_by_days that returns a DataFrame directly.
+
+    Args:
+        start_date (str): First day, "YYYY-MM-DD".
+        end_date (str): Last day (inclusive), "YYYY-MM-DD".
+        min_records_per_day (int): Minimum number of violations per day.
+        max_records_per_day (int): Maximum number of violations per day.
+        seed (int): Optional seed; the same seed gives the same dataset.
+
+    Returns:
+        pd.DataFrame: The generated dataset.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start_date, end_date, freq="D")
+    daily_counts = rng.integers(min_records_per_day, max_records_per_day + 1, len(days))
+    return generate_records_frame(np.repeat(days.to_numpy(), daily_counts), start_idx=1, seed=rng)
+
+
+# ====================================================================================
+# PARALLEL CHUNKED GENERATION STRAIGHT TO DISK
+# ====================================================================================
+# Rows per chunk handed to one worker process (split on day boundaries)
+GENERATION_CHUNK_ROWS = 500_000
+
+# The mappings in core.data_variables are randomized at import time. Worker processes get the
+# parent's values so that every chunk of one dataset follows the same mapping.
+_MAPPING_NAMES = [
+    "vehicle_types_mapping", "helmet_worn_mapping", "seatbelt_worn_mapping", "no_of_passengers_mapping",
+    "fine_mapping", "alcohol_levels_mapping", "towing_mapping", "court_mapping", "payment_methods_mapping"
+]
+
+
+# -------------------------------------------------------------------------------
+def _init_generation_worker(mappings: dict):
+    globals().update(mappings)
+# -------------------------------------------------------------------------------
+def _generate_chunk_to_file(part_path: str, dates: np.ndarray, start_idx: int, seed_sequence, file_format: str) -> int:
+    df = generate_records_frame(dates, start_idx=start_idx, seed=np.random.default_rng(seed_sequence))
+    if file_format == "parquet":
+        df.to_parquet(part_path, index=False)
+    else:
+        # Arrow's CSV writer is several times faster than DataFrame.to_csv
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.cast(pa.schema([
+            pa.field(field.name, pa.string() if pa.types.is_dictionary(field.type) else pa.date32() if field.name == "Date" else field.type)
+            for field in table.schema
+        ]))
+        pa_csv.write_csv(table, part_path)
+    return len(df)
+# -------------------------------------------------------------------------------
+def _append_part(out_file, part_path: str, file_format: str, is_first: bool, writer):
+    # Appends one finished part to the output file and deletes it. Returns the Parquet writer.
+    if file_format == "parquet":
+        table = pq.read_table(part_path)
+        if writer is None:
+            writer = pq.ParquetWriter(out_file, table.schema)
+        writer.write_table(table.cast(writer.schema))
+    else:
+        with open(part_path, "rb") as part:
+            if not is_first:
+                part.readline()  # skip the repeated header line
+            shutil.copyfileobj(part, out_file)
+    os.remove(part_path)
+    return writer
+
+
+# -------------------------------------------------------------------------------
+def generate_dataset_to_file(file_path: str, start_date: str, end_date: str, min_records_per_day=5, max_records_per_day=15,
+                             seed=None, file_format: str = "csv", max_workers: int | None = None, progress_callback=None) -> int:
+    """
+    Generates a fake dataset in date-range chunks on a process pool and streams it to one file.
+
+    Daily record counts are drawn up front, so every chunk knows its first Violation_ID and
+    IDs stay unique and in order across chunks. Each finished chunk is written to a part file
+    and appended to the output as soon as all earlier chunks are in, so memory use is bounded
+    by a few chunks no matter how long the date range is.
+
+    Args:
+        file_path (str): Output file (.csv or .parquet).
+        start_date (str): First day, "YYYY-MM-DD".
+        end_date (str): Last day (inclusive), "YYYY-MM-DD".
+        min_records_per_day (int): Minimum number of violations per day.
+        max_records_per_day (int): Maximum number of violations per day.
+        seed (int): Optional seed; the same seed gives the same file for any number of workers.
+        file_format (str): "csv" or "parquet".
+        max_workers (int): Worker processes. None uses the number of CPUs.
+        progress_callback (callable): Called as progress_callback(rows_written, total_rows).
+
+    Returns:
+        int: Number of rows written.
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    count_seed, chunk_seed_root = seed_sequence.spawn(2)
+
+    days = pd.date_range(start_date, end_date, freq="D")
+    daily_counts = np.random.default_rng(count_seed).integers(min_records_per_day, max_records_per_day + 1, len(days))
+    total_rows = int(daily_counts.sum())
+
+    # Split on day boundaries into chunks of about GENERATION_CHUNK_ROWS rows
+    days_per_chunk = max(1, GENERATION_CHUNK_ROWS // max(1, max_records_per_day))
+    chunk_starts = list(range(0, len(days), days_per_chunk))
+    chunk_seeds = chunk_seed_root.spawn(len(chunk_starts))
+    row_offsets = np.concatenate([[0], np.cumsum(daily_counts)])
+
+    parts_dir = f"{file_path}.parts-{os.getpid()}"
+    os.makedirs(parts_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+    jobs = []
+    for i, day_start in enumerate(chunk_starts):
+        day_end = min(day_start + days_per_chunk, len(days))
+        dates = np.repeat(days[day_start:day_end].to_numpy(), daily_counts[day_start:day_end])
+        part_path = os.path.join(parts_dir, f"part-{i:05d}.{file_format}")
+        jobs.append((part_path, dates, int(row_offsets[day_start]) + 1, chunk_seeds[i], file_format))
+
+    rows_written = 0
+    writer = None
+    try:
+        with open(file_path, "wb") as out_file:
+            if len(jobs) <= 1 or max_workers == 1:
+                for i, job in enumerate(jobs):
+                    rows_written += _generate_chunk_to_file(*job)
+                    writer = _append_part(out_file, job[0], file_format, i == 0, writer)
+                    if progress_callback:
+                        progress_callback(rows_written, total_rows)
+            else:
+                mappings = {name: globals()[name] for name in _MAPPING_NAMES}
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_generation_worker, initargs=(mappings,)) as pool:
+                    futures = {pool.submit(_generate_chunk_to_file, *job): i for i, job in enumerate(jobs)}
+                    finished = {}
+                    next_part = 0
+                    for future in as_completed(futures):
+                        finished[futures[future]] = future.result()
+                        # Append every part whose predecessors are all written
+                        while next_part in finished:
+                            writer = _append_part(out_file, jobs[next_part][0], file_format, next_part == 0, writer)
+                            rows_written += finished.pop(next_part)
+                            next_part += 1
+                        if progress_callback:
+                            progress_callback(rows_written, total_rows)
+            if writer is not None:
+                writer.close()
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return rows_written
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+from core.data_variables import TRAFFIC_VIOLATION_COLUMNS
+
+# This module defines the typed schema applied to traffic violation datasets at load time
+
+# ====================================================================================
+# Schema Definitions
+# ====================================================================================
+# Low-cardinality text columns, stored as pandas `category` (integer codes + one copy of each label)
+CATEGORICAL_COLUMNS = [
+    'Violation_Type', 'Location', 'Vehicle_Type', 'Vehicle_Color', 'Registration_State',
+    'Driver_Gender', 'License_Type', 'Weather_Condition', 'Road_Condition', 'Issuing_Agency',
+    'License_Validity', 'Helmet_Worn', 'Seatbelt_Worn', 'Traffic_Light_Status',
+    'Breathalyzer_Result', 'Towed', 'Fine_Paid', 'Payment_Method',
+    'Court_Appearance_Required', 'Comments'
+]
+
+# Numeric columns, downcast to the smallest width that holds every value exactly
+INTEGER_COLUMNS = [
+    'Fine_Amount', 'Vehicle_Model_Year', 'Driver_Age', 'Penalty_Points',
+    'Number_of_Passengers', 'Speed_Limit', 'Recorded_Speed', 'Previous_Violations'
+]
+FLOAT_COLUMNS = ['Alcohol_Level']
+
+# Date/Time handling: `Date` becomes datetime64; `Time` stays text and is parsed on demand
+# (see get_time_of_day; time_features.get_time_of_day caches it per dataset version)
+DATE_COLUMN = 'Date'
+TIME_COLUMN = 'Time'
+DATE_FORMAT = '%Y-%m-%d'
+# Fixed formats are tried in order before the (much slower) per-value 'mixed' parser
+DATE_FORMATS = [DATE_FORMAT]
+TIME_FORMATS = ['%H:%M', '%H:%M:%S']
+
+# High-cardinality identifiers stay as plain strings: 'Violation_ID', 'Officer_ID', 'Time'
+
+
+# ====================================================================================
+# Block 0: Helpers
+# ====================================================================================
+def is_traffic_dataset(columns) -> bool:
+    """
+    Checks whether a DataFrame (or a list of column names) has every column of TRAFFIC_VIOLATION_COLUMNS.
+    """
+    return set(TRAFFIC_VIOLATION_COLUMNS).issubset(set(columns))
+# -------------------------------------------------------------------------------
+def to_plain_index(result):
+    """
+    Converts the categorical index of a groupby / value_counts result back to plain labels.
+    Seaborn orders a categorical axis by its categories instead of by the order of the result.
+    """
+    if isinstance(result.index, pd.CategoricalIndex):
+        result.index = result.index.astype(result.index.categories.dtype)
+    return result
+# -------------------------------------------------------------------------------
+def value_counts_observed(series: pd.Series) -> pd.Series:
+    """
+    value_counts() without the zero rows that categorical columns report for unused categories.
+    """
+    counts = series.value_counts()
+    return to_plain_index(counts[counts > 0])
+# -------------------------------------------------------------------------------
+def drop_unused_categories(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """
+    Returns a copy of df where the given categorical columns only keep categories present in the rows.
+    Seaborn draws every category of a categorical column, including empty ones.
+    """
+    df = df.copy()
+    for col in columns:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+# ====================================================================================
+# Block 1: Column Converters
+# ====================================================================================
+def _to_category(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Categories read back from Parquet partitions may come in any order; keep them sorted
+        # so that groupby / pivot results are ordered the same way as plain string columns.
+        if not series.cat.categories.is_monotonic_increasing:
+            series = series.cat.reorder_categories(series.cat.categories.sort_values())
+        return series
+    return series.astype('category')
+# -------------------------------------------------------------------------------
+def _to_smallest_integer(series: pd.Series) -> pd.Series:
+    if not pd.api.types.is_numeric_dtype(series) or series.isnull().any():
+        return series
+    values = series.to_numpy()
+    if not np.array_equal(values, np.round(values)):
+        return series
+    return pd.to_numeric(series, downcast='integer')
+# -------------------------------------------------------------------------------
+def _to_smallest_float(series: pd.Series) -> pd.Series:
+    if not pd.api.types.is_float_dtype(series) or series.dtype == np.float32:
+        return series
+    narrowed = series.astype(np.float32)
+    # Only narrow when float32 holds every value exactly (e.g. 0.03 does not)
+    if np.array_equal(narrowed.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+        return narrowed
+    return series
+# -------------------------------------------------------------------------------
+def parse_unique(series: pd.Series, formats: list) -> pd.Series:
+    """
+    Parses a text column into datetime64, parsing every distinct value only once.
+
+    A dataset has at most a few thousand distinct dates and 86,400 distinct times, so the
+    distinct values are parsed (fixed formats first, then flexible parsing for whatever is
+    left) and the results are mapped back to the rows through their category codes.
+
+    Args:
+        series (pd.Series): Date or time strings (plain or categorical).
+        formats (list): strptime formats to try, in order.
+
+    Returns:
+        pd.Series: datetime64 values (NaT where a value is missing or unparsable).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques).astype(str)
+
+    parsed = pd.Series(pd.NaT, index=uniques, dtype='datetime64[ns]')
+    for fmt in formats:
+        missing = parsed.isnull()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(uniques[missing.to_numpy()], format=fmt, errors='coerce')
+    missing = parsed.isnull()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(uniques[missing.to_numpy()], format='mixed', errors='coerce')
+
+    # Code -1 (missing value) picks the NaT appended at the end
+    values = np.append(parsed.to_numpy(), np.datetime64('NaT', 'ns'))
+    return pd.Series(values[codes], index=series.index, name=series.name)
+# -------------------------------------------------------------------------------
+def parse_time_of_day(series: pd.Series) -> pd.Series:
+    """
+    Parses a `Time` column ('HH:MM' / 'HH:MM:SS') into the time of day as timedelta64.
+    """
+    times = parse_unique(series, TIME_FORMATS)
+    return times - times.dt.normalize()
+# -------------------------------------------------------------------------------
+def get_time_of_day(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the time of day of every row as timedelta64, parsed from `Time` (each distinct value once).
+    """
+    return parse_time_of_day(df[TIME_COLUMN])
+# -------------------------------------------------------------------------------
+def get_hour_of_day(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the hour (0-23) of every row, like pd.to_datetime(df['Time']).dt.hour.
+    """
+    return (pd.Timestamp(0) + get_time_of_day(df)).dt.hour
+# -------------------------------------------------------------------------------
+def parse_date_time(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parses `Date` into datetime64. No derived columns are added, so the typed dataset keeps
+    exactly the columns of the file.
+    """
+    if DATE_COLUMN not in df.columns:
+        return df
+
+    df[DATE_COLUMN] = parse_unique(df[DATE_COLUMN], DATE_FORMATS)
+    return df
+
+
+# ====================================================================================
+# Block 2: Schema Application
+# ====================================================================================
+def apply_schema(df: pd.DataFrame, is_traffic: bool | None = None) -> pd.DataFrame:
+    """
+    Applies the typed traffic violation schema in place and returns the DataFrame.
+
+    - Low-cardinality text columns -> category
+    - Integer / float columns -> smallest width that holds every value exactly
+    - `Date` -> datetime64
+
+    Args:
+        df (pd.DataFrame): The dataset (or a column projection of it).
+        is_traffic (bool): Whether the full dataset is a traffic violation dataset.
+            None checks df itself against TRAFFIC_VIOLATION_COLUMNS.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame. Non-traffic datasets are returned unchanged.
+    """
+    if is_traffic is None:
+        is_traffic = is_traffic_dataset(df)
+    if not is_traffic:
+        return df
+
+    # Already-typed columns are left as they are, so applying the schema twice is cheap
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_category(df[col])
+    for col in INTEGER_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_smallest_integer(df[col])
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_smallest_float(df[col])
+
+    return parse_date_time(df)
@@ -0,0 +1,390 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core import dataset_store, dataset_deltas, date_index
+from core.data_schema import is_traffic_dataset
+
+# This module keeps one shared, read-only copy of every loaded dataset per server process
+
+# ---------------------------------------------------------
+# CACHE CONFIGURATION
+# ---------------------------------------------------------
+# Memory budget for all cached datasets together (override with the DATASET_CACHE_MAX_MB env variable)
+MAX_CACHE_MB = int(os.environ.get("DATASET_CACHE_MAX_MB", 2048))
+
+_cache = OrderedDict()  # key -> {'df': DataFrame, 'nbytes': int, 'artifacts': dict, 'increment': dict | None}, least recently used first
+_cache_lock = threading.Lock()
+_load_locks = {}  # key -> Lock, so concurrent sessions wait for one load instead of loading twice
+
+# Every served frame carries its cache key in `df.attrs`, so derived artifacts can be looked up from it
+DATASET_KEY_ATTR = "dataset_key"
+
+
+# ==================================================================================
+# Block 0: Cache Keys
+# ==================================================================================
+def get_dataset_key(path: str, columns: list | None = None, state: dict | None = None) -> tuple:
+    """
+    Returns the cache key of a dataset: absolute path + mtime + size (+ column projection)
+    + number of appended deltas. Rewriting the file on disk or appending rows changes the key,
+    so stale entries are never returned; compacting appended rows into the file does not
+    (mtime and size are those of the file before the first append, see dataset_deltas.get_state).
+    """
+    mtime, size, seq = (state or dataset_deltas.get_state(path))['version']
+    return (
+        os.path.abspath(path),
+        mtime,
+        size,
+        tuple(columns) if columns is not None else None,
+        seq,
+    )
+
+
+# ==================================================================================
+# Block 1: Eviction
+# ==================================================================================
+def _estimate_nbytes(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, (pd.Index, np.ndarray)):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(_estimate_nbytes(value) for value in obj.values())
+    return 0
+# -------------------------------------------------------------------------------
+def _evict(budget_bytes: int):
+    # Drop least recently used datasets until the budget fits; the newest entry is always kept
+    total = sum(entry['nbytes'] for entry in _cache.values())
+    while total > budget_bytes and len(_cache) > 1:
+        _, entry = _cache.popitem(last=False)
+        total -= entry['nbytes']
+# -------------------------------------------------------------------------------
+def _drop_stale_versions(key: tuple):
+    # Older versions of the same file (different mtime/size or appended rows) can never be hit again
+    for cached_key in [k for k in _cache if k[0] == key[0] and (k[1:3] != key[1:3] or k[4] != key[4])]:
+        del _cache[cached_key]
+# -------------------------------------------------------------------------------
+def clear_cache():
+    """
+    Removes every dataset from the cache.
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+# ==================================================================================
+# Block 2: Shared Dataset Access
+# ==================================================================================
+def _find_parent(key: tuple, state: dict) -> tuple:
+    # A cached older version of the same dataset (same file lineage and projection) whose missing
+    # rows are all in pending delta files: (entry, those delta entries), or (None, None)
+    parents = [k for k in _cache if k[:4] == key[:4] and k[4] < key[4]]
+    if not parents:
+        return None, None
+    parent_key = max(parents, key=lambda k: k[4])
+    deltas = [entry for entry in state['deltas'] if entry['seq'] > parent_key[4]]
+    if len(deltas) != key[4] - parent_key[4]:
+        # Some of the rows were compacted into the file already
+        return None, None
+    return _cache[parent_key], deltas
+# -------------------------------------------------------------------------------
+def _load_increment(path: str, columns: list | None, parent: dict, deltas: list) -> tuple:
+    # Appends only the new rows to the cached older version instead of reloading the dataset
+    old = parent['df']
+    rows = dataset_deltas.read_deltas(path, deltas, columns)
+    df = dataset_deltas.concat_rows(old, rows, is_traffic_dataset(dataset_deltas.get_storage_schema(path).names))
+
+    # The old rows are sorted by Date already; positions[i] = row i's position once the new rows are merged in
+    positions = None
+    if 'Date' in df.columns and (df['Date'].isna().any() or not df['Date'].is_monotonic_increasing):
+        order = df['Date'].sort_values(kind='stable', na_position='last').index.to_numpy()
+        if not np.array_equal(order, np.arange(len(order))):
+            positions = np.empty(len(order), dtype=np.int64)
+            positions[order] = np.arange(len(order))
+    df = date_index.sort_by_date(df)
+
+    new_positions = np.arange(len(old), len(df)) if positions is None else positions[len(old):]
+    increment = {
+        'parent': dict(parent['artifacts']),
+        'parent_rows': len(old),
+        'positions': positions,
+        'rows': df.take(new_positions),
+    }
+    return df, increment
+# -------------------------------------------------------------------------------
+def _make_read_only(df: pd.DataFrame) -> pd.DataFrame:
+    # The cached columns are shared by every served view: an in-place write through a view
+    # (e.g. `df.loc[mask, col] = ...`) raises instead of changing the data of every session.
+    # Memory-mapped columns (see dataset_store.read_ipc) and Arrow-backed columns already are.
+    for block in df._mgr.blocks:
+        values = getattr(block.values, '_ndarray', block.values)  # categorical codes, datetimes
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return df
+# -------------------------------------------------------------------------------
+def _view(df: pd.DataFrame) -> pd.DataFrame:
+    # A new frame over the same (read-only) columns: adding, replacing or dropping columns and
+    # rows only changes the view. The view keeps the cache key in attrs.
+    return df.copy(deep=False)
+# -------------------------------------------------------------------------------
+def get_dataset(path: str, columns: list | None = None) -> pd.DataFrame:
+    """
+    Returns a view of the shared dataset, loading it once per process.
+
+    When rows were appended to a cached dataset (see core/dataset_deltas.py), only the new rows
+    are read and added to the cached frame; artifacts with an update function (see get_artifact)
+    are then updated from the new rows instead of being rebuilt.
+
+    Args:
+        path (str): Path of the dataset file.
+        columns (list): Optional column projection. None loads every column.
+
+    Returns:
+        pd.DataFrame: A view of the cached frame with read-only columns. Columns added or replaced
+            on it are not seen by other sessions; change a column by assigning a new one.
+    """
+    state = dataset_deltas.get_state(path)
+    key = get_dataset_key(path, columns, state)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _view(_cache[key]['df'])
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        # Another session may have finished loading while this one waited
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _view(_cache[key]['df'])
+            parent, deltas = _find_parent(key, state)
+
+        increment = None
+        if parent is not None:
+            df, increment = _load_increment(path, columns, parent, deltas)
+        else:
+            while True:
+                df = dataset_store.load_dataset(path, columns=columns, deltas=state['deltas'])
+                current = dataset_deltas.get_state(path)
+                if current['base'] == state['base']:
+                    break
+                # A compaction replaced the file during the load, so it may already hold listed deltas
+                state = current
+            # Sorted by Date once, so date and year filters are binary searches (see core/date_index.py)
+            df = date_index.sort_by_date(df)
+        lock_key, key = key, get_dataset_key(path, columns, state)
+        df.attrs[DATASET_KEY_ATTR] = key
+        nbytes = _estimate_nbytes(df) + (_estimate_nbytes(increment['parent']) if increment else 0)
+
+        with _cache_lock:
+            _cache[key] = {'df': _make_read_only(df), 'nbytes': nbytes, 'artifacts': {}, 'increment': increment}
+            _drop_stale_versions(key)
+            _evict(MAX_CACHE_MB * 1024 * 1024)
+            _load_locks.pop(lock_key, None)
+
+    return _view(df)
+# -------------------------------------------------------------------------------
+def get_artifact(df: pd.DataFrame, name: str, builder, update=None):
+    """
+    Returns a derived artifact (rollup, index, ...) of the shared dataset that df is a view of.
+
+    The artifact is built once per dataset version with builder(cached_frame), stored next to
+    the cached frame and evicted together with it. Frames that are not a full view of a cached
+    dataset (e.g. a filtered subset) get builder(df) without caching.
+
+    Args:
+        df (pd.DataFrame): A frame returned by get_dataset (or a column-modified view of it).
+        name (str): Artifact name, unique per kind of artifact.
+        builder (callable): Builds the artifact from a DataFrame.
+        update (callable): Optional update(old_artifact, increment) for a version that only adds
+            appended rows to a cached older version: returns the artifact of the new version from
+            the older version's artifact, or None to build it with builder instead.
+            increment = {'parent_rows': number of old rows,
+                         'rows': the appended rows (typed like the new frame, indexed by their position in it),
+                         'positions': position of every old + appended row in the new frame (None when
+                             the old rows come first and the appended rows follow in order)}
+    """
+    key = df.attrs.get(DATASET_KEY_ATTR)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None or len(entry['df']) != len(df):
+            entry = None
+        elif name in entry['artifacts']:
+            return entry['artifacts'][name]
+        else:
+            build_lock = _load_locks.setdefault((key, name), threading.Lock())
+    if entry is None:
+        return builder(df)
+
+    with build_lock:
+        with _cache_lock:
+            if name in entry['artifacts']:
+                return entry['artifacts'][name]
+            increment = entry['increment']
+
+        artifact = None
+        if update is not None and increment is not None and name in increment['parent']:
+            artifact = update(increment['parent'][name], increment)
+        if artifact is None:
+            artifact = builder(entry['df'])
+
+        with _cache_lock:
+            entry['artifacts'][name] = artifact
+            entry['nbytes'] += _estimate_nbytes(artifact)
+            if increment is not None and entry['increment'] is increment and increment['parent'].keys() <= entry['artifacts'].keys():
+                # Every artifact of the older version has been carried over
+                entry['increment'] = None
+                entry['nbytes'] -= _estimate_nbytes(increment['parent'])
+            if key in _cache:
+                _evict(MAX_CACHE_MB * 1024 * 1024)
+            _load_locks.pop((key, name), None)
+    return artifact
+# -------------------------------------------------------------------------------
+def _buffer(column: pd.Series) -> np.ndarray | None:
+    # The NumPy array behind a column without converting it (categories: their codes)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy()
+    if isinstance(column.dtype, np.dtype):
+        return column.to_numpy()
+    return None
+# -------------------------------------------------------------------------------
+def _arrow_chunks(column: pd.Series):
+    # The Arrow chunks behind a pyarrow-backed column (e.g. `string[pyarrow]`), without copying
+    dtype = column.dtype
+    if isinstance(dtype, pd.ArrowDtype) or (isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"):
+        return [chunk for chunk in column.array.__arrow_array__().chunks if len(chunk)]
+    return None
+# -------------------------------------------------------------------------------
+def _chunk_layout(chunk) -> tuple:
+    return chunk.offset, len(chunk), tuple(buf.address if buf is not None else None for buf in chunk.buffers())
+# -------------------------------------------------------------------------------
+def _shares_rows(base_column: pd.Series, column: pd.Series, positions) -> bool:
+    # O(1) check for zero-copy slices: a contiguous row range whose values are still the
+    # cached frame's own memory at those positions (the cached columns are read-only)
+    if len(positions) == 0 or positions[-1] - positions[0] + 1 != len(positions) or base_column.dtype != column.dtype:
+        return False
+    start, stop = positions[0], positions[-1] + 1
+
+    base_values, values = _buffer(base_column), _buffer(column)
+    if base_values is not None and values is not None:
+        if base_values.ndim != 1 or values.ndim != 1:
+            return False
+        expected = base_values[start:stop]
+        return (
+            values.__array_interface__['data'][0] == expected.__array_interface__['data'][0]
+            and values.strides == expected.strides
+        )
+
+    base_chunks, chunks = _arrow_chunks(base_column), _arrow_chunks(column)
+    if base_chunks is None or chunks is None:
+        return False
+    expected = _arrow_chunks(base_column.iloc[start:stop])
+    return [_chunk_layout(chunk) for chunk in chunks] == [_chunk_layout(chunk) for chunk in expected]
+# -------------------------------------------------------------------------------
+def locate_rows(df: pd.DataFrame) -> tuple | None:
+    """
+    Finds the cached dataset that df is a row subset of.
+
+    Returns:
+        tuple | None: (cached_frame, positions) where positions are df's row positions in
+            the cached frame, or None when df cannot be matched to a cached dataset.
+    """
+    if not is_row_subset(df):
+        return None
+    with _cache_lock:
+        entry = _cache.get(df.attrs.get(DATASET_KEY_ATTR))
+    if entry is None:
+        return None
+    base = entry['df']
+    if not base.index.equals(pd.RangeIndex(len(base))):
+        return None
+
+    positions = df.index.to_numpy()
+    if len(positions) and (positions.min() < 0 or positions.max() >= len(base)):
+        return None
+    # The cached dataset has a RangeIndex, so row labels are positions; the Date check catches
+    # frames whose index was reset or reassigned after slicing
+    if 'Date' in base.columns and 'Date' in df.columns and not _shares_rows(base['Date'], df['Date'], positions):
+        if not base['Date'].take(positions).reset_index(drop=True).equals(df['Date'].reset_index(drop=True)):
+            return None
+    return base, positions
+# -------------------------------------------------------------------------------
+def unchanged_columns(df: pd.DataFrame) -> list | None:
+    """
+    Lists the dataset columns of df that are still zero-copy views of the cached dataset's rows
+    (replaced columns and copied rows, e.g. a boolean mask selection, are left out).
+
+    Returns:
+        list | None: The unchanged column names, or None when df is not a row subset of a cached dataset.
+    """
+    located = locate_rows(df)
+    if located is None:
+        return None
+    base, positions = located
+    # Only columns that still are the cached frame's own (read-only) memory count as unchanged;
+    # copies (e.g. rows picked by a boolean mask) may have been changed since
+    return [
+        col for col in base.columns
+        if isinstance(df[col], pd.Series) and _shares_rows(base[col], df[col], positions)
+    ]
+# -------------------------------------------------------------------------------
+def _update_row_artifact(builder):
+    # Row-local artifacts: the old rows' artifact + the artifact of the appended rows, in frame order
+    def update(old, increment):
+        new = builder(increment['rows'])
+        positions = increment['positions']
+        if positions is None:
+            return pd.concat([old, new]).set_axis(pd.RangeIndex(increment['parent_rows'] + len(new)))
+        old = old.set_axis(pd.Index(positions[:increment['parent_rows']]))
+        return pd.concat([old, new]).sort_index()
+    return update
+# -------------------------------------------------------------------------------
+def get_row_artifact(df: pd.DataFrame, name: str, builder, incremental: bool = False):
+    """
+    Like get_artifact, for artifacts with one row per dataset row (a DataFrame on the dataset's
+    index, e.g. derived columns). A row subset of the cached dataset gets the matching rows of
+    the artifact built for the whole dataset; any other frame gets builder(df).
+    With incremental=True the builder is row-local (each row's result only depends on that row),
+    so after an append only the appended rows are built.
+    """
+    located = locate_rows(df)
+    if located is None:
+        return builder(df)
+    base, positions = located
+
+    artifact = get_artifact(base, name, builder, _update_row_artifact(builder) if incremental else None)
+    if len(artifact) == len(df) and artifact.index.equals(df.index):
+        return artifact
+    return artifact.take(positions)
+# -------------------------------------------------------------------------------
+def is_row_subset(df: pd.DataFrame) -> bool:
+    """
+    True when df looks like a subset of the rows of the cached dataset named in its attrs:
+    row labels, every dataset column present, no more rows than the dataset.
+    Aggregates (pivots, describe(), ...) also inherit the attrs but fail this check.
+    """
+    with _cache_lock:
+        entry = _cache.get(df.attrs.get(DATASET_KEY_ATTR))
+        if entry is None:
+            return False
+        base = entry['df']
+    return (
+        pd.api.types.is_integer_dtype(df.index.dtype)
+        and len(df) <= len(base)
+        and base.columns.isin(df.columns).all()
+    )
+# -------------------------------------------------------------------------------
+def get_cache_info() -> list:
+    """
+    Lists the cached datasets (least recently used first) with their size in MB.
+    """
+    with _cache_lock:
+        return [
+            {'path': key[0], 'columns': key[3], 'rows': len(entry['df']), 'size_mb': round(entry['nbytes'] / (1024 * 1024), 2)}
+            for key, entry in _cache.items()
+        ]
@@ -0,0 +1,381 @@
+import os
+import json
+import hashlib
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from core import dataset_store, dataset_deltas
+from core.data_schema import is_traffic_dataset, parse_unique, DATE_COLUMN, DATE_FORMATS
+
+# This module keeps a persistent catalog of every dataset the app can open: one JSON manifest
+# with the path, size, mtime, content hash, row count, Date range and schema of each file.
+# Listing datasets only stats the dataset folders; a file is read again only when it is new or changed.
+
+# ---------------------------------------------------------
+# CATALOG CONFIGURATION
+# ---------------------------------------------------------
+CATALOG_PATH = os.path.join(dataset_store.STORE_ROOT, "catalog.json")
+CATALOG_VERSION = 1
+
+# Dataset folders, in the order they are listed
+SAMPLE_FOLDER = "dataset"
+GENERATED_FOLDER = "generated_fake_traffic_datasets"
+RELATED_UPLOADS_FOLDER = "uploded_file_relateds"
+OTHER_UPLOADS_FOLDER = "uploded_file_others"
+LEGACY_UPLOADS_FOLDER = "uploaded_datasets"
+DATASET_FOLDERS = [SAMPLE_FOLDER, GENERATED_FOLDER, RELATED_UPLOADS_FOLDER, OTHER_UPLOADS_FOLDER, LEGACY_UPLOADS_FOLDER]
+
+# Schema (dtypes) is taken from the first rows of a CSV; the hash reads the file in blocks
+SCHEMA_SAMPLE_ROWS = 10_000
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+_catalog = None  # path -> entry, loaded from CATALOG_PATH on first use
+_hash_index = None  # content hash / row fingerprint -> paths, rebuilt when the catalog changes
+_catalog_lock = threading.Lock()
+
+
+# ==================================================================================
+# Block 0: Folder Scanning
+# ==================================================================================
+def _files(directory: str, extensions: tuple) -> list:
+    # (path, os.stat_result) of the matching files of a directory, sorted by name
+    try:
+        with os.scandir(directory) as entries:
+            found = [(entry.path, entry.stat()) for entry in entries if entry.is_file() and entry.name.endswith(extensions)]
+    except OSError:
+        return []
+    return sorted(found)
+# -------------------------------------------------------------------------------
+def _subdirectories(directory: str) -> list:
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir())
+    except OSError:
+        return []
+# -------------------------------------------------------------------------------
+def scan_folder(folder: str) -> list:
+    """
+    Lists the dataset files of one of DATASET_FOLDERS (without reading them).
+
+    Generated datasets live in one sub-folder per day (newest first); uploads and generated
+    datasets may be CSV or Parquet; legacy uploads are searched recursively.
+
+    Returns:
+        list: (path, group, os.stat_result) tuples; group is the sub-folder name (or None).
+    """
+    if folder in (RELATED_UPLOADS_FOLDER, OTHER_UPLOADS_FOLDER):
+        # Traffic uploads are stored as typed Parquet (see core/upload_ingest.py)
+        return [(path, None, stat) for path, stat in _files(folder, ('.csv', '.parquet'))]
+    if folder == GENERATED_FOLDER:
+        return [
+            (path, date_dir, stat)
+            for date_dir in reversed(_subdirectories(folder))
+            for path, stat in _files(os.path.join(folder, date_dir), ('.csv', '.parquet'))
+        ]
+    if folder == LEGACY_UPLOADS_FOLDER:
+        found = []
+        for root, _, _ in os.walk(folder):
+            found.extend((path, os.path.basename(root), stat) for path, stat in _files(root, ('.csv',)))
+        return found
+    return [(path, None, stat) for path, stat in _files(folder, ('.csv',))]
+
+
+# ==================================================================================
+# Block 1: Profiling a Dataset File
+# ==================================================================================
+def _open_binary(source):
+    # Path or already open binary file (e.g. a Streamlit upload), rewound to the start
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    source.seek(0)
+    return contextlib.nullcontext(source)
+# -------------------------------------------------------------------------------
+def hash_contents(source, row_fingerprint: bool = False) -> tuple:
+    """
+    Streams a file once in blocks of HASH_BLOCK_BYTES and hashes its contents.
+
+    The row fingerprint ignores the order of the data rows (and line endings / blank lines):
+    every row line is hashed on its own and the 64-bit row hashes are summed, so two CSV files
+    with the same header and the same rows in any order get the same fingerprint.
+
+    Args:
+        source: Path of the file, or a binary file object (read from the start, left at its end).
+        row_fingerprint (bool): Also compute the row-order-insensitive fingerprint (CSV only).
+
+    Returns:
+        tuple: (SHA-256 hex digest of the bytes, row fingerprint or None)
+    """
+    digest = hashlib.sha256()
+    header, rows, row_sum, rest = None, 0, np.zeros(1, dtype=np.uint64), b""
+    with _open_binary(source) as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+            if not row_fingerprint:
+                continue
+            # Only whole lines are hashed; the partial last line is carried over to the next block
+            block = (rest + block).replace(b"\r\n", b"\n")
+            cut = block.rfind(b"\n") + 1
+            lines, rest = block[:cut].split(b"\n")[:-1], block[cut:]
+            if header is None and lines:
+                header, lines = lines[0], lines[1:]
+            lines = [line for line in lines if line]
+            if lines:
+                rows += len(lines)
+                row_sum += pd.util.hash_array(np.array(lines, dtype=object)).sum(dtype=np.uint64)
+
+    if not row_fingerprint:
+        return digest.hexdigest(), None
+    rest = rest.rstrip(b"\r")
+    if header is None:
+        header, rest = rest, b""
+    if rest:
+        rows += 1
+        row_sum += pd.util.hash_array(np.array([rest], dtype=object)).sum(dtype=np.uint64)
+    fingerprint = hashlib.sha256(header + b"\n" + str(rows).encode() + b"\n" + row_sum.tobytes()).hexdigest()
+    return digest.hexdigest(), fingerprint
+# -------------------------------------------------------------------------------
+def _date_range(dates: pa.Array) -> tuple:
+    # Min / max of the distinct Date values (parsed once each, like the loader does)
+    parsed = parse_unique(pd.Series(dates.to_pandas()), DATE_FORMATS).dropna()
+    if parsed.empty:
+        return None, None
+    return parsed.min().strftime('%Y-%m-%d'), parsed.max().strftime('%Y-%m-%d')
+# -------------------------------------------------------------------------------
+def profile_file(path: str) -> dict:
+    """
+    Reads the metadata of a dataset file: row count, columns, dtypes and Date range.
+    CSV files are streamed, reading only the Date column (or the first column) after the header.
+
+    Returns:
+        dict: {'rows', 'columns', 'schema': {column: dtype}, 'date_min', 'date_max', 'is_traffic'}
+    """
+    if path.endswith('.parquet'):
+        parquet_file = pq.ParquetFile(path)
+        columns = parquet_file.schema_arrow.names
+        schema = parquet_file.schema_arrow.empty_table().to_pandas().dtypes
+        rows = parquet_file.metadata.num_rows
+        dates = parquet_file.read(columns=[DATE_COLUMN]).column(DATE_COLUMN) if DATE_COLUMN in columns else None
+        if dates is not None:
+            dates = pc.unique(dates.cast(pa.string()) if not pa.types.is_string(dates.type) else dates)
+    else:
+        sample = pd.read_csv(path, nrows=SCHEMA_SAMPLE_ROWS)
+        columns = list(sample.columns)
+        schema = sample.dtypes
+        counted = DATE_COLUMN if DATE_COLUMN in columns else (columns[0] if columns else None)
+        rows, distinct_dates = 0, []
+        if counted is not None:
+            convert_options = pa_csv.ConvertOptions(include_columns=[counted], column_types={counted: pa.string()})
+            for batch in pa_csv.open_csv(path, convert_options=convert_options):
+                rows += batch.num_rows
+                if counted == DATE_COLUMN:
+                    distinct_dates.append(pc.unique(batch.column(0)))
+        dates = pc.unique(pa.concat_arrays(distinct_dates)) if distinct_dates else None
+
+    date_min, date_max = _date_range(dates) if dates is not None else (None, None)
+    return {
+        'rows': rows,
+        'columns': columns,
+        'schema': {col: str(dtype) for col, dtype in schema.items()},
+        'date_min': date_min,
+        'date_max': date_max,
+        'is_traffic': is_traffic_dataset(columns),
+    }
+
+
+# ==================================================================================
+# Block 2: Persistent Catalog
+# ==================================================================================
+def _load_catalog() -> dict:
+    try:
+        with open(CATALOG_PATH, "r") as f:
+            manifest = json.load(f)
+        if manifest.get('catalog_version') == CATALOG_VERSION:
+            return manifest['datasets']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+# -------------------------------------------------------------------------------
+def _save_catalog(catalog: dict):
+    os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+    tmp_path = f"{CATALOG_PATH}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump({'catalog_version': CATALOG_VERSION, 'datasets': catalog}, f, indent=2)
+    os.replace(tmp_path, CATALOG_PATH)
+# -------------------------------------------------------------------------------
+def _build_entry(path: str, folder: str, group, stat, row_fingerprint: str | None = None) -> dict:
+    entry = {
+        'path': path,
+        'folder': folder,
+        'group': group,
+        'name': os.path.basename(path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'content_hash': hash_contents(path)[0],
+        # Computed on demand (see find_duplicates) or when the file was uploaded
+        'row_fingerprint': row_fingerprint,
+    }
+    try:
+        entry.update(profile_file(path))
+    except Exception as e:
+        # Unreadable files are still listed; pages report the error when they are opened
+        print(f"Dataset Catalog Error: could not profile '{path}': {e}")
+        entry.update({'rows': None, 'columns': [], 'schema': {}, 'date_min': None, 'date_max': None, 'is_traffic': False})
+    return entry
+# -------------------------------------------------------------------------------
+def _with_deltas(entry: dict) -> dict:
+    # Rows appended to a Parquet dataset (see core/dataset_deltas.py) are listed as part of it
+    deltas = dataset_deltas.get_deltas(entry['path']) if entry['path'].endswith('.parquet') else []
+    if not deltas:
+        return entry
+    dates = [day for day in [entry['date_min'], entry['date_max']] + [delta[bound] for delta in deltas for bound in ('date_min', 'date_max')] if day]
+    return dict(
+        entry,
+        rows=(entry['rows'] or 0) + sum(delta['rows'] for delta in deltas),
+        date_min=min(dates) if dates else None,
+        date_max=max(dates) if dates else None,
+        pending_deltas=len(deltas),
+    )
+# -------------------------------------------------------------------------------
+def list_datasets(folders: list | None = None) -> list:
+    """
+    Returns the catalog entries of every dataset file in the given folders (default: DATASET_FOLDERS),
+    in listing order. New or changed files (size / mtime) are profiled and saved to the catalog;
+    entries of deleted files are dropped.
+
+    Returns:
+        list: Entry dicts: 'path', 'folder', 'group', 'name', 'size', 'mtime', 'content_hash',
+            'row_fingerprint', 'rows', 'columns', 'schema', 'date_min', 'date_max', 'is_traffic'
+            (+ 'source_hash' for uploads stored as a converted copy, see register_file;
+            + 'pending_deltas' for datasets with appended rows, which are included in 'rows' and the Date range).
+    """
+    global _catalog, _hash_index
+    folders = DATASET_FOLDERS if folders is None else folders
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = _load_catalog()
+
+        changed = False
+        entries, seen = [], set()
+        for folder in folders:
+            for path, group, stat in scan_folder(folder):
+                entry = _catalog.get(path)
+                if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+                    entry = _build_entry(path, folder, group, stat)
+                    _catalog[path] = entry
+                    changed = True
+                entries.append(_with_deltas(entry))
+                seen.add(path)
+
+        for path in [p for p, entry in _catalog.items() if entry['folder'] in folders and p not in seen]:
+            del _catalog[path]
+            changed = True
+        if changed:
+            _save_catalog(_catalog)
+            _hash_index = None
+    return entries
+# -------------------------------------------------------------------------------
+def get_entry(path: str) -> dict | None:
+    """
+    Returns the catalog entry of one dataset file (refreshing its folder), or None if it is not cataloged.
+    """
+    folder = os.path.normpath(path).split(os.sep)[0]
+    for entry in list_datasets([folder] if folder in DATASET_FOLDERS else None):
+        if os.path.normpath(entry['path']) == os.path.normpath(path):
+            return entry
+    return None
+
+# -------------------------------------------------------------------------------
+def remove_entry(path: str) -> None:
+    """
+    Drops the catalog entry of a dataset file (e.g. when the dataset is deleted).
+    """
+    global _catalog, _hash_index
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = _load_catalog()
+        if _catalog.pop(path, None) is not None:
+            _save_catalog(_catalog)
+            _hash_index = None
+
+
+# ==================================================================================
+# Block 3: Duplicate Detection
+# ==================================================================================
+def _get_hash_index() -> dict:
+    # Called with _catalog_lock held
+    global _hash_index
+    if _hash_index is None:
+        _hash_index = {}
+        for path, entry in _catalog.items():
+            for key in ('content_hash', 'source_hash', 'row_fingerprint'):
+                if entry.get(key):
+                    _hash_index.setdefault(entry[key], []).append(path)
+    return _hash_index
+# -------------------------------------------------------------------------------
+def register_file(path: str, source_hash: str, row_fingerprint: str | None = None) -> dict:
+    """
+    Adds a newly saved dataset file to the catalog together with the hashes of the upload it was
+    ingested from (the stored file may be a converted copy, e.g. CSV -> Parquet), so uploading the
+    same file again is still found by find_duplicates.
+
+    Returns:
+        dict: The catalog entry.
+    """
+    global _catalog, _hash_index
+    parts = os.path.normpath(path).split(os.sep)
+    group = parts[-2] if len(parts) > 2 else None
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = _load_catalog()
+        entry = _build_entry(path, parts[0], group, os.stat(path), row_fingerprint)
+        if source_hash != entry['content_hash']:
+            entry['source_hash'] = source_hash
+        _catalog[path] = entry
+        _save_catalog(_catalog)
+        _hash_index = None
+    return entry
+# -------------------------------------------------------------------------------
+def find_duplicates(content_hash: str | None = None, row_fingerprint: str | None = None, columns: list | None = None) -> list:
+    """
+    Finds the cataloged datasets with the same contents: one dictionary lookup per hash.
+
+    Args:
+        content_hash (str): SHA-256 of the file bytes (see hash_contents): exact copies of a
+            stored file or of the upload it was ingested from.
+        row_fingerprint (str): Row-order-insensitive fingerprint: the same rows in any order.
+            Datasets with the same columns that have no fingerprint yet get one first (once).
+        columns (list): Columns of the new file, to limit which datasets need a fingerprint.
+
+    Returns:
+        list: Catalog entries of the duplicates (empty if there are none).
+    """
+    global _hash_index
+    list_datasets()
+    with _catalog_lock:
+        if row_fingerprint is not None:
+            missing = [
+                entry for entry in _catalog.values()
+                if entry.get('row_fingerprint') is None and not entry['path'].endswith('.parquet')
+                and (columns is None or entry['columns'] == list(columns))
+            ]
+            for entry in missing:
+                try:
+                    entry['row_fingerprint'] = hash_contents(entry['path'], row_fingerprint=True)[1]
+                except OSError as e:
+                    print(f"Dataset Catalog Error: could not fingerprint '{entry['path']}': {e}")
+            if missing:
+                _save_catalog(_catalog)
+                _hash_index = None
+
+        index = _get_hash_index()
+        paths = []
+        for key in (content_hash, row_fingerprint):
+            for path in index.get(key, []) if key else []:
+                if path not in paths:
+                    paths.append(path)
+        return [_catalog[path] for path in paths]
@@ -0,0 +1,437 @@
+import os
+import json
+import shutil
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from core.data_schema import apply_schema, is_traffic_dataset, DATE_COLUMN
+
+try:
+    import fcntl
+except ImportError:  # Windows: byte-range locks instead of flock
+    fcntl = None
+    import msvcrt
+
+# This module adds an append mode to Parquet datasets. New rows of an existing (logical) dataset
+# are written to small delta files next to it instead of rewriting the dataset, and readers see
+# base file + deltas as one dataset. A background compaction later merges the deltas into the
+# base file. The dataset version (used by the dataset cache) only changes when rows are appended,
+# not when they are compacted, so cached frames and their artifacts survive a compaction.
+
+# ---------------------------------------------------------
+# DELTA CONFIGURATION
+# ---------------------------------------------------------
+# Delta files live in a folder next to the dataset (the dataset lists only show files):
+#   uploded_file_relateds/violations.parquet
+#       -> uploded_file_relateds/violations.parquet.deltas/delta-000001.parquet
+#       -> uploded_file_relateds/violations.parquet.deltas/_manifest.json
+#       -> uploded_file_relateds/violations.parquet.deltas/_manifest.lock
+DELTA_DIR_SUFFIX = ".deltas"
+DELTA_MANIFEST = "_manifest.json"
+# Every manifest update (append, compaction) holds an exclusive lock on this file, so several
+# server processes can append to and compact the same dataset
+DELTA_LOCK_FILE = "_manifest.lock"
+DELTA_VERSION = 1
+
+# Compaction rewrites the whole base file, so it only runs once enough rows have piled up:
+# after COMPACT_MAX_DELTAS appends or when the deltas hold COMPACT_DELTA_FRACTION of the base rows
+COMPACT_MAX_DELTAS = 8
+COMPACT_DELTA_FRACTION = 0.10
+
+# Rows per batch when the base and delta files are streamed (compaction, exports, chunked reads)
+BATCH_ROWS = 100_000
+
+_manifest_lock = threading.Lock()  # this process's threads (the lock file serializes processes)
+_compaction_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="delta-compaction")
+_pending = set()  # dataset paths queued for compaction
+
+
+# ==================================================================================
+# Block 0: Delta Manifest
+# ==================================================================================
+def get_delta_dir(path: str) -> str:
+    """
+    Returns the folder holding the delta files of a dataset.
+    """
+    return path + DELTA_DIR_SUFFIX
+# -------------------------------------------------------------------------------
+def _signature(path: str) -> dict:
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+# -------------------------------------------------------------------------------
+def _read_manifest(path: str) -> dict | None:
+    try:
+        with open(os.path.join(get_delta_dir(path), DELTA_MANIFEST), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('delta_version') == DELTA_VERSION else None
+# -------------------------------------------------------------------------------
+def _write_manifest(path: str, manifest: dict):
+    manifest_path = os.path.join(get_delta_dir(path), DELTA_MANIFEST)
+    tmp_path = f"{manifest_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+# -------------------------------------------------------------------------------
+def _current_manifest(path: str, base: dict) -> dict | None:
+    """
+    Reads the manifest as it applies to the dataset file with signature base. A compaction is
+    recorded in the manifest before its new base file is swapped in (see compact), so a manifest
+    read between the swap and the final manifest write, or left behind by a crash, is resolved
+    here: swapped -> the merged deltas are gone; not swapped -> the compaction never happened.
+    Returns None when there is no manifest for this file (e.g. the dataset was replaced).
+    """
+    manifest = _read_manifest(path)
+    if manifest is None:
+        return None
+    compaction = manifest.get('compaction')
+    if compaction is not None and compaction['base'] == base:
+        merged = set(compaction['merged'])
+        manifest = {
+            **manifest,
+            'base': compaction['base'],
+            'deltas': [entry for entry in manifest['deltas'] if entry['seq'] not in merged],
+            'retired': manifest['retired'] + [entry['file'] for entry in manifest['deltas'] if entry['seq'] in merged],
+        }
+    manifest = {**manifest, 'compaction': None}
+    return manifest if manifest['base'] == base else None
+# -------------------------------------------------------------------------------
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # gives up after 10 s: keep waiting
+            return
+        except OSError:
+            continue
+# -------------------------------------------------------------------------------
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+# -------------------------------------------------------------------------------
+@contextmanager
+def _manifest_update(path: str):
+    # Exclusive across threads and server processes: every manifest read-modify-write runs inside
+    os.makedirs(get_delta_dir(path), exist_ok=True)
+    with _manifest_lock:
+        with open(os.path.join(get_delta_dir(path), DELTA_LOCK_FILE), "a+") as f:
+            f.seek(0)
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                _unlock_file(f)
+# -------------------------------------------------------------------------------
+def _read_state(path: str) -> tuple:
+    # Lock-free read of (base signature, manifest): retried until the base file did not change
+    # during the manifest read, so the two always belong together
+    base = _signature(path)
+    while True:
+        manifest = _current_manifest(path, base) if os.path.isdir(get_delta_dir(path)) else None
+        current = _signature(path)
+        if current == base:
+            return base, manifest
+        base = current
+# -------------------------------------------------------------------------------
+def get_state(path: str) -> dict:
+    """
+    Reads the append state of a dataset in one manifest read.
+
+    Returns:
+        dict: {'base': signature (size, mtime) of the dataset file,
+               'version': (mtime, size, seq) identifying the logical dataset: the base file as it
+                   was before the first append + the number of the last appended delta,
+               'deltas': entries of the delta files not merged into the base yet, in append order}
+    """
+    base, manifest = _read_state(path)
+    # A manifest written for another file (e.g. the dataset was replaced) does not apply
+    if manifest is None:
+        return {'base': base, 'version': (base['mtime'], base['size'], 0), 'deltas': []}
+    lineage = manifest['lineage']
+    return {
+        'base': base,
+        'version': (lineage['mtime'], lineage['size'], manifest['next_seq'] - 1),
+        'deltas': manifest['deltas'],
+    }
+# -------------------------------------------------------------------------------
+def get_deltas(path: str) -> list:
+    """
+    Returns the entries of the delta files of a dataset that are not compacted yet:
+    {'seq', 'file', 'rows', 'date_min', 'date_max', 'content_hash'}.
+    """
+    return get_state(path)['deltas']
+# -------------------------------------------------------------------------------
+def can_append(path: str) -> bool:
+    """
+    True for datasets that accept appended rows: Parquet traffic violation datasets.
+    """
+    return path.endswith(".parquet") and is_traffic_dataset(pq.read_schema(path).names)
+
+
+# ==================================================================================
+# Block 1: Appending Rows
+# ==================================================================================
+def get_storage_schema(path: str) -> pa.Schema:
+    """
+    Arrow schema of the rows of a dataset: the schema of its file, without pandas metadata and with
+    32-bit dictionary indices, so appended rows can bring new category labels.
+    """
+    schema = pq.read_schema(path).remove_metadata()
+    return pa.schema([
+        pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type)) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ])
+# -------------------------------------------------------------------------------
+def get_delta_tmp_path(path: str) -> str:
+    """
+    Private temporary file in the delta folder for a delta being written (see add_delta).
+    """
+    os.makedirs(get_delta_dir(path), exist_ok=True)
+    return os.path.join(get_delta_dir(path), f"delta.tmp-{os.getpid()}-{threading.get_ident()}")
+# -------------------------------------------------------------------------------
+def _date_range(delta_path: str) -> tuple:
+    if DATE_COLUMN not in pq.read_schema(delta_path).names:
+        return None, None
+    dates = pq.read_table(delta_path, columns=[DATE_COLUMN]).column(DATE_COLUMN)
+    if not pa.types.is_timestamp(dates.type) or dates.null_count == len(dates):
+        return None, None
+    bounds = pc.min_max(dates)
+    return tuple(pd.Timestamp(bounds[key].as_py()).strftime('%Y-%m-%d') for key in ('min', 'max'))
+# -------------------------------------------------------------------------------
+def _claim_delta_file(path: str, seq: int) -> tuple:
+    # Creates the next free delta-NNNNNN.parquet with O_EXCL, so a delta file is never overwritten
+    # (e.g. one left by a crash between moving it in and writing the manifest): (seq, file path)
+    while True:
+        target = os.path.join(get_delta_dir(path), f"delta-{seq:06d}.parquet")
+        try:
+            os.close(os.open(target, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return seq, target
+        except FileExistsError:
+            seq += 1
+# -------------------------------------------------------------------------------
+def add_delta(path: str, delta_path: str, content_hash: str | None = None) -> dict:
+    """
+    Publishes a delta file (written with get_storage_schema into get_delta_tmp_path) as the next
+    append of a dataset. Readers see the new rows as soon as the manifest is replaced.
+
+    Args:
+        path (str): Path of the dataset.
+        delta_path (str): The written delta file (moved into the delta folder).
+        content_hash (str): Hash of the upload the rows came from (see was_appended).
+
+    Returns:
+        dict: The delta entry.
+    """
+    with _manifest_update(path):
+        base = _signature(path)
+        manifest = _current_manifest(path, base)
+        if manifest is None:
+            # First append to this file: the current file is the lineage of every later version
+            manifest = {'delta_version': DELTA_VERSION, 'lineage': base, 'base': base, 'next_seq': 1, 'deltas': [], 'retired': [],
+                        'content_hashes': [], 'compaction': None}
+
+        seq, target = _claim_delta_file(path, manifest['next_seq'])
+        date_min, date_max = _date_range(delta_path)
+        entry = {
+            'seq': seq,
+            'file': os.path.basename(target),
+            'rows': pq.ParquetFile(delta_path).metadata.num_rows,
+            'date_min': date_min,
+            'date_max': date_max,
+            'content_hash': content_hash,
+        }
+        os.replace(delta_path, target)
+        manifest['deltas'].append(entry)
+        if content_hash:
+            manifest['content_hashes'].append(content_hash)
+        manifest['next_seq'] = seq + 1
+        _write_manifest(path, manifest)
+    return entry
+# -------------------------------------------------------------------------------
+def was_appended(path: str, content_hash: str) -> bool:
+    """
+    True when an upload with this content hash was already appended to the dataset (pending or compacted).
+    """
+    manifest = _read_state(path)[1] if content_hash else None
+    return manifest is not None and content_hash in manifest['content_hashes']
+
+
+# ==================================================================================
+# Block 2: Reading Base + Deltas
+# ==================================================================================
+def read_deltas(path: str, deltas: list | None = None, columns: list | None = None) -> pd.DataFrame | None:
+    """
+    Reads the rows of delta files as one typed DataFrame (see data_schema.apply_schema).
+
+    Args:
+        path (str): Path of the dataset.
+        deltas (list): Delta entries to read (None = every pending delta, see get_deltas).
+        columns (list): Optional column projection.
+
+    Returns:
+        pd.DataFrame | None: The appended rows, or None when there are no deltas.
+    """
+    deltas = get_deltas(path) if deltas is None else deltas
+    if not deltas:
+        return None
+    names = pq.read_schema(path).names
+    columns = names if columns is None else [col for col in columns if col in names]
+    tables = [pq.read_table(os.path.join(get_delta_dir(path), entry['file']), columns=columns) for entry in deltas]
+    df = pa.concat_tables(tables).to_pandas()
+    return apply_schema(df, is_traffic_dataset(names))
+# -------------------------------------------------------------------------------
+def concat_rows(df: pd.DataFrame, rows: pd.DataFrame, is_traffic: bool) -> pd.DataFrame:
+    """
+    Appends typed rows to a typed dataset frame. Categorical columns get the sorted union of both
+    category sets and the other columns keep the dataset's dtypes (widened where the new values
+    need it), so the result has the dtypes a fresh load of the whole dataset would have.
+
+    Returns:
+        pd.DataFrame: df's rows followed by rows, with a fresh RangeIndex.
+    """
+    columns = {}
+    for col in df.columns:
+        old = df[col].reset_index(drop=True)
+        # Columns the delta rows do not have stay missing
+        new = rows[col].reset_index(drop=True) if col in rows.columns else old.iloc[:0].reindex(range(len(rows)))
+        if isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype):
+            values = pd.api.types.union_categoricals([old, new], sort_categories=True)
+            columns[col] = pd.Series(values, name=col)
+            continue
+        if isinstance(old.dtype, pd.StringDtype) and not isinstance(new.dtype, pd.StringDtype):
+            new = new.astype(old.dtype)
+        columns[col] = pd.concat([old, new], ignore_index=True)
+    return apply_schema(pd.DataFrame(columns), is_traffic)
+# -------------------------------------------------------------------------------
+def iter_batches(path: str, columns: list | None = None, batch_size: int = BATCH_ROWS, deltas: list | None = None):
+    """
+    Streams the rows of a Parquet dataset (base file, then its delta files) as Arrow record
+    batches in the storage schema (see get_storage_schema).
+    """
+    deltas = get_deltas(path) if deltas is None else deltas
+    schema = get_storage_schema(path)
+    if columns is not None:
+        schema = pa.schema([schema.field(col) for col in columns if col in schema.names])
+    files = [path] + [os.path.join(get_delta_dir(path), entry['file']) for entry in deltas]
+    for file_path in files:
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=batch_size, columns=schema.names):
+            yield batch.cast(schema)
+
+
+# ==================================================================================
+# Block 3: Compaction
+# ==================================================================================
+def needs_compaction(path: str) -> bool:
+    """
+    True when enough rows were appended to a dataset to merge them into its base file.
+    """
+    deltas = get_deltas(path)
+    if not deltas:
+        return False
+    delta_rows = sum(entry['rows'] for entry in deltas)
+    return len(deltas) >= COMPACT_MAX_DELTAS or delta_rows >= COMPACT_DELTA_FRACTION * pq.ParquetFile(path).metadata.num_rows
+# -------------------------------------------------------------------------------
+def compact(path: str) -> int:
+    """
+    Merges the pending deltas of a dataset into its base file (base rows first, then the deltas
+    in append order). The new file is written next to the old one and swapped in; the merged
+    delta files are kept until the next compaction, for readers that listed them just before.
+
+    Returns:
+        int: Number of rows merged into the base file.
+    """
+    with _manifest_update(path):
+        base = _signature(path)
+        manifest = _current_manifest(path, base)
+        if manifest is None or not manifest['deltas']:
+            return 0
+        deltas = list(manifest['deltas'])
+
+    tmp_path = f"{path}.compact-tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        try:
+            with pq.ParquetWriter(tmp_path, get_storage_schema(path)) as writer:
+                for batch in iter_batches(path, deltas=deltas):
+                    writer.write_batch(batch, row_group_size=BATCH_ROWS)
+        except FileNotFoundError:
+            return 0  # another process compacted these deltas meanwhile
+
+        with _manifest_update(path):
+            # Another process compacted (or replaced the dataset) while this one was writing:
+            # what was written may already hold the merged rows
+            if _signature(path) != base:
+                return 0
+            manifest = _current_manifest(path, base)
+            if manifest is None:
+                return 0
+            # 1. Record the compaction first: readers (and a restart after a crash) resolve the
+            #    manifest against whichever base file they find (see _current_manifest).
+            #    os.replace keeps the size and mtime, so the new base signature is known before the swap.
+            manifest['compaction'] = {'base': _signature(tmp_path), 'merged': [entry['seq'] for entry in deltas]}
+            _write_manifest(path, manifest)
+            # 2. Swap the base file
+            os.replace(tmp_path, path)
+            # 3. Settle the manifest; deltas retired by the previous compaction are no longer listed by any reader
+            delta_dir = get_delta_dir(path)
+            for file_name in manifest['retired']:
+                if os.path.exists(os.path.join(delta_dir, file_name)):
+                    os.remove(os.path.join(delta_dir, file_name))
+            manifest = _current_manifest(path, manifest['compaction']['base'])
+            manifest['retired'] = [entry['file'] for entry in deltas]
+            _write_manifest(path, manifest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return sum(entry['rows'] for entry in deltas)
+# -------------------------------------------------------------------------------
+def _compaction_task(path: str, on_done):
+    try:
+        if compact(path) and on_done is not None:
+            on_done(path)
+    except Exception as e:
+        print(f"Dataset Deltas Error: compacting '{path}' failed: {e}")
+    finally:
+        with _manifest_lock:
+            _pending.discard(path)
+# -------------------------------------------------------------------------------
+def schedule_compaction(path: str, on_done=None) -> bool:
+    """
+    Queues the compaction of a dataset in the background thread. Does nothing if it is already queued.
+
+    Args:
+        path (str): Path of the dataset.
+        on_done (callable): Optional on_done(path), called in the background after a compaction
+            (e.g. to refresh copies derived from the base file).
+
+    Returns:
+        bool: True if a compaction was queued.
+    """
+    with _manifest_lock:
+        if path in _pending:
+            return False
+        _pending.add(path)
+    _compaction_pool.submit(_compaction_task, path, on_done)
+    return True
+# -------------------------------------------------------------------------------
+def is_compacting(path: str) -> bool:
+    """
+    True while a compaction of the dataset is queued or running.
+    """
+    with _manifest_lock:
+        return path in _pending
+# -------------------------------------------------------------------------------
+def clear_deltas(path: str) -> None:
+    """
+    Removes the delta files of a dataset (e.g. before the dataset itself is deleted).
+    """
+    shutil.rmtree(get_delta_dir(path), ignore_errors=True)
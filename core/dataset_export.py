@@ -0,0 +1,188 @@
+import os
+import json
+import gzip
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from core import dataset_store, dataset_deltas
+
+# This module builds the downloadable copies of a dataset. An export is only encoded when it is
+# requested, is written to disk chunk by chunk (never the whole file in memory), and is kept next
+# to the dataset's columnar copy, so later downloads of the same dataset version reuse it.
+
+# ---------------------------------------------------------
+# EXPORT CONFIGURATION
+# ---------------------------------------------------------
+EXPORT_FORMATS = {
+    'CSV': {'extension': '.csv', 'mime': 'text/csv'},
+    'CSV (gzip)': {'extension': '.csv.gz', 'mime': 'application/gzip'},
+    'Parquet': {'extension': '.parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+EXPORT_VERSION = 1
+
+# Rows per encoded chunk and bytes per copied block
+CHUNK_ROWS = 100_000
+COPY_BLOCK_BYTES = 8 * 1024 * 1024
+
+#   dataset/Indian_Traffic_Violations.csv
+#       -> .dataset_store/dataset/Indian_Traffic_Violations/_exports/Indian_Traffic_Violations.csv.gz
+EXPORT_DIR = "_exports"
+
+
+# ==================================================================================
+# Block 0: Export Paths
+# ==================================================================================
+def get_export_path(path: str, export_format: str) -> str:
+    """
+    Returns the path of the cached export of a dataset in one of EXPORT_FORMATS.
+    """
+    name = os.path.splitext(os.path.basename(path))[0] + EXPORT_FORMATS[export_format]['extension']
+    return os.path.join(dataset_store.get_store_path(path), EXPORT_DIR, name)
+# -------------------------------------------------------------------------------
+def _get_deltas(path: str) -> list:
+    # Rows appended to a Parquet dataset are exported with it (see core/dataset_deltas.py)
+    return dataset_deltas.get_deltas(path) if path.endswith(".parquet") else []
+# -------------------------------------------------------------------------------
+def _export_signature(path: str, export_format: str, deltas: list) -> dict:
+    return {'export_version': EXPORT_VERSION, 'format': export_format, 'source': dataset_store._source_signature(path),
+            'deltas': [delta['seq'] for delta in deltas]}
+# -------------------------------------------------------------------------------
+def is_export_current(path: str, export_format: str) -> bool:
+    """
+    Checks whether the cached export exists and was built from the current version of the dataset.
+    """
+    try:
+        with open(get_export_path(path, export_format) + ".json", "r") as f:
+            return json.load(f) == _export_signature(path, export_format, _get_deltas(path))
+    except (OSError, ValueError):
+        return False
+
+
+# ==================================================================================
+# Block 1: Chunked Encoding
+# ==================================================================================
+def _copy_file(source_path: str, target, progress) -> None:
+    # Byte-for-byte copy in blocks (the original file is already in the requested format)
+    total = os.path.getsize(source_path)
+    copied = 0
+    with open(source_path, "rb") as source:
+        while block := source.read(COPY_BLOCK_BYTES):
+            target.write(block)
+            copied += len(block)
+            progress(copied / total if total else 1.0)
+# -------------------------------------------------------------------------------
+def _iter_parquet_chunks(path: str, progress, deltas: list):
+    total = pq.ParquetFile(path).metadata.num_rows + sum(delta['rows'] for delta in deltas)
+    done = 0
+    for batch in dataset_deltas.iter_batches(path, batch_size=CHUNK_ROWS, deltas=deltas):
+        done += batch.num_rows
+        yield batch
+        progress(done / total if total else 1.0)
+# -------------------------------------------------------------------------------
+def _iter_csv_batches(path: str, progress, as_text: bool = False):
+    # Streaming CSV reader: column types come from the first block (or all text, see _write_parquet)
+    total = os.path.getsize(path)
+    convert_options = None
+    if as_text:
+        header = pd.read_csv(path, nrows=0).columns
+        convert_options = pa_csv.ConvertOptions(column_types={col: pa.string() for col in header})
+    with pa.OSFile(path, "rb") as source:
+        for batch in pa_csv.open_csv(source, convert_options=convert_options):
+            yield batch
+            # The reader runs at most one block ahead of the batches it has returned
+            progress(min(source.tell() / total, 1.0) if total else 1.0)
+# -------------------------------------------------------------------------------
+def _write_csv(path: str, target, progress, deltas: list) -> None:
+    if not path.endswith(".parquet"):
+        _copy_file(path, target, progress)
+        return
+    for number, batch in enumerate(_iter_parquet_chunks(path, progress, deltas)):
+        target.write(batch.to_pandas().to_csv(index=False, header=(number == 0)).encode("utf-8"))
+# -------------------------------------------------------------------------------
+def _write_parquet(path: str, target_path: str, progress, deltas: list) -> None:
+    if path.endswith(".parquet") and deltas:
+        _write_batches(_iter_parquet_chunks(path, progress, deltas), target_path)
+        return
+    if path.endswith(".parquet"):
+        with open(target_path, "wb") as target:
+            _copy_file(path, target, progress)
+        return
+    try:
+        _write_batches(_iter_csv_batches(path, progress), target_path)
+    except pa.ArrowInvalid as e:
+        # A later block did not fit the types inferred from the first one: keep every column as text
+        print(f"Dataset Export Error: typed Parquet export of '{path}' failed, exporting as text: {e}")
+        _write_batches(_iter_csv_batches(path, progress, as_text=True), target_path)
+# -------------------------------------------------------------------------------
+def _write_batches(batches, target_path: str) -> None:
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(target_path, batch.schema)
+            writer.write_batch(batch, row_group_size=CHUNK_ROWS)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# ==================================================================================
+# Block 2: Cached Exports
+# ==================================================================================
+def build_export(path: str, export_format: str, progress_callback=None) -> str:
+    """
+    Encodes a dataset into one of EXPORT_FORMATS, chunk by chunk, and caches the result on disk.
+    Returns the cached file right away when it is still current.
+
+    Args:
+        path (str): Path of the CSV (or Parquet) dataset.
+        export_format (str): Key of EXPORT_FORMATS.
+        progress_callback (callable): Optional progress_callback(fraction_done).
+
+    Returns:
+        str: The path of the encoded file.
+    """
+    export_path = get_export_path(path, export_format)
+    if is_export_current(path, export_format):
+        return export_path
+
+    progress = progress_callback or (lambda fraction: None)
+    deltas = _get_deltas(path)
+    signature = _export_signature(path, export_format, deltas)
+    os.makedirs(os.path.dirname(export_path), exist_ok=True)
+
+    # Encode into a private temporary file, so concurrent downloads never see half an export
+    tmp_path = f"{export_path}.tmp-{os.getpid()}"
+    try:
+        if export_format == 'Parquet':
+            _write_parquet(path, tmp_path, progress, deltas)
+        elif export_format == 'CSV (gzip)':
+            with gzip.open(tmp_path, "wb", compresslevel=6) as target:
+                _write_csv(path, target, progress, deltas)
+        else:
+            with open(tmp_path, "wb") as target:
+                _write_csv(path, target, progress, deltas)
+        os.replace(tmp_path, export_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    with open(f"{export_path}.json.tmp-{os.getpid()}", "w") as f:
+        json.dump(signature, f, indent=2)
+    os.replace(f"{export_path}.json.tmp-{os.getpid()}", export_path + ".json")
+    progress(1.0)
+    return export_path
+# -------------------------------------------------------------------------------
+def get_download_name(path: str, export_format: str) -> str:
+    """
+    File name offered to the browser for an export.
+    """
+    return os.path.splitext(os.path.basename(path))[0] + EXPORT_FORMATS[export_format]['extension']
+# -------------------------------------------------------------------------------
+def clear_exports(path: str) -> None:
+    """
+    Removes every cached export of a dataset (e.g. before the dataset itself is deleted).
+    """
+    shutil.rmtree(os.path.join(dataset_store.get_store_path(path), EXPORT_DIR), ignore_errors=True)
@@ -0,0 +1,322 @@
+import os
+import json
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+
+from core import dataset_deltas
+from core.data_schema import apply_schema, is_traffic_dataset
+from core.date_index import year_range_slice, sort_by_date
+
+# This module handles the columnar (Parquet) and shared Arrow IPC copies of every dataset
+
+# ---------------------------------------------------------
+# STORE CONFIGURATION
+# ---------------------------------------------------------
+# Each CSV is converted once into a Parquet dataset partitioned by the year of `Date`.
+# The converted copy mirrors the CSV's relative path under STORE_ROOT:
+#   dataset/Indian_Traffic_Violations.csv
+#       -> .dataset_store/dataset/Indian_Traffic_Violations/partition_year=2023/part-0.parquet
+STORE_ROOT = ".dataset_store"
+STORE_VERSION = 3
+PARTITION_COLUMN = "partition_year"
+MANIFEST_FILE = "_source.json"
+
+# ---------------------------------------------------------
+# SHARED FRAME (ARROW IPC) CONFIGURATION
+# ---------------------------------------------------------
+# Next to the columnar copy, every dataset also gets one normalized Arrow IPC (Feather v2) file:
+# typed, sorted by Date, uncompressed and written as a single record batch. Server processes
+# memory-map it, so pandas columns are zero-copy views of the OS page cache (shared by every
+# worker) and a new worker loads a dataset in milliseconds instead of re-parsing it.
+#   dataset/Indian_Traffic_Violations.csv
+#       -> .dataset_store/dataset/Indian_Traffic_Violations/_Indian_Traffic_Violations.csv.arrow
+IPC_VERSION = 2
+
+
+# ==================================================================================
+# Block 0: Store Paths and Manifest
+# ==================================================================================
+def get_store_path(csv_path: str) -> str:
+    """
+    Returns the directory holding the converted Parquet copy of a CSV dataset.
+    """
+    relative_path = os.path.relpath(os.path.abspath(csv_path), os.getcwd())
+    if relative_path.startswith(".."):
+        # Datasets outside the project are keyed by their absolute path instead
+        relative_path = os.path.abspath(csv_path).lstrip(os.sep)
+    return os.path.join(STORE_ROOT, os.path.splitext(relative_path)[0])
+# -------------------------------------------------------------------------------
+def _source_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+# -------------------------------------------------------------------------------
+def read_manifest(csv_path: str) -> dict | None:
+    """
+    Reads the manifest of a converted dataset. Returns None if there is no converted copy.
+    """
+    manifest_path = os.path.join(get_store_path(csv_path), MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+# -------------------------------------------------------------------------------
+def is_store_current(csv_path: str) -> bool:
+    """
+    Checks whether the converted copy exists and still matches the CSV (size, mtime and store version).
+    """
+    manifest = read_manifest(csv_path)
+    if manifest is None:
+        return False
+    return (
+        manifest.get('store_version') == STORE_VERSION
+        and manifest.get('source') == _source_signature(csv_path)
+    )
+
+
+# ==================================================================================
+# Block 1: CSV -> Parquet Conversion
+# ==================================================================================
+def convert_to_store(csv_path: str) -> str:
+    """
+    Converts a CSV dataset into a Parquet dataset partitioned by the year of `Date`.
+    Datasets without a `Date` column are stored as a single unpartitioned file.
+
+    Returns:
+        str: The directory of the converted dataset.
+    """
+    store_path = get_store_path(csv_path)
+    signature = _source_signature(csv_path)
+
+    df = pd.read_csv(csv_path)
+    # Store the typed schema (categories, narrow numerics, parsed dates) so loads skip re-typing
+    is_traffic = is_traffic_dataset(df)
+    df = apply_schema(df, is_traffic)
+    columns = list(df.columns)
+
+    # Write into a private temporary directory first so that concurrent readers never see half a dataset
+    tmp_path = f"{store_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path, exist_ok=True)
+
+    partitioned = 'Date' in df.columns
+    try:
+        if partitioned:
+            df[PARTITION_COLUMN] = pd.to_datetime(df['Date'], errors='coerce').dt.year.astype('Int16')
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            ds.write_dataset(
+                table,
+                tmp_path,
+                format="parquet",
+                partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int16())]), flavor="hive"),
+                existing_data_behavior="overwrite_or_ignore",
+                preserve_order=True,
+            )
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            ds.write_dataset(table, tmp_path, format="parquet", preserve_order=True)
+
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump({
+                'store_version': STORE_VERSION,
+                'source': signature,
+                'columns': columns,
+                'partitioned': partitioned,
+                'is_traffic': is_traffic,
+                'rows': len(df),
+            }, f, indent=2)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    # Swap the new copy in place of any stale one
+    old_path = f"{store_path}.old-{os.getpid()}"
+    if os.path.exists(store_path):
+        os.replace(store_path, old_path)
+    os.replace(tmp_path, store_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return store_path
+
+
+# ==================================================================================
+# Block 2: Dataset Loading
+# ==================================================================================
+def _read_store(csv_path: str, manifest: dict, columns: list | None, years: tuple | None) -> pd.DataFrame:
+    store_path = get_store_path(csv_path)
+    dataset = ds.dataset(store_path, format="parquet", partitioning="hive" if manifest['partitioned'] else None)
+
+    if columns is None:
+        columns = manifest['columns']
+    else:
+        columns = [col for col in columns if col in manifest['columns']]
+
+    row_filter = None
+    if years is not None and manifest['partitioned']:
+        # Partition pruning: only the matching `partition_year=` directories are read
+        row_filter = (ds.field(PARTITION_COLUMN) >= years[0]) & (ds.field(PARTITION_COLUMN) <= years[1])
+
+    df = dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+    # Restores sorted categories (dictionaries are unified across partitions in read order)
+    return apply_schema(df, manifest.get('is_traffic', False))
+# -------------------------------------------------------------------------------
+def _load_columnar(path: str, columns: list | None = None, years: tuple | None = None) -> pd.DataFrame:
+    # The CSV is converted to Parquet on first use and every later load reads the
+    # Parquet copy, decoding only the requested columns (and years, if given).
+    # The CSV itself is only read when no converted copy exists and one cannot be written.
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=columns)
+        return apply_schema(df, is_traffic_dataset(pq.read_schema(path).names))
+
+    if not is_store_current(path):
+        try:
+            convert_to_store(path)
+        except Exception as e:
+            print(f"Dataset Store Error: could not convert '{path}': {e}")
+
+    if is_store_current(path):
+        return _read_store(path, read_manifest(path), columns, years)
+
+    # Fallback: no converted copy available
+    df = pd.read_csv(path, usecols=(lambda col: col in columns) if columns is not None else None)
+    header = pd.read_csv(path, nrows=0).columns if columns is not None else df.columns
+    df = apply_schema(df, is_traffic_dataset(header))
+    if years is not None and 'Date' in df.columns:
+        df = year_range_slice(df, *years)
+    return df
+
+
+# ==================================================================================
+# Block 3: Shared Arrow IPC Frame
+# ==================================================================================
+def get_ipc_path(path: str) -> str:
+    """
+    Returns the path of the memory-mappable Arrow IPC copy of a dataset.
+    """
+    return os.path.join(get_store_path(path), f"_{os.path.basename(path)}.arrow")
+# -------------------------------------------------------------------------------
+def _ipc_signature(path: str) -> dict:
+    return {'ipc_version': IPC_VERSION, 'store_version': STORE_VERSION, 'source': _source_signature(path)}
+# -------------------------------------------------------------------------------
+def is_ipc_current(path: str) -> bool:
+    """
+    Checks whether the Arrow IPC copy exists and still matches the dataset file.
+    """
+    try:
+        with open(get_ipc_path(path) + ".json", "r") as f:
+            return json.load(f) == _ipc_signature(path)
+    except (OSError, ValueError):
+        return False
+# -------------------------------------------------------------------------------
+def write_ipc(path: str) -> str:
+    """
+    Writes the normalized Arrow IPC copy of a dataset (typed, sorted by Date, one record batch).
+
+    Returns:
+        str: The path of the IPC file.
+    """
+    ipc_path = get_ipc_path(path)
+    signature = _ipc_signature(path)
+    df = sort_by_date(_load_columnar(path))
+    # One record batch keeps every column contiguous, which pandas needs for zero-copy columns
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+
+    os.makedirs(os.path.dirname(ipc_path), exist_ok=True)
+    tmp_path = f"{ipc_path}.tmp-{os.getpid()}"
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed", chunksize=max(table.num_rows, 1))
+        os.replace(tmp_path, ipc_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    with open(f"{ipc_path}.json.tmp-{os.getpid()}", "w") as f:
+        json.dump(signature, f, indent=2)
+    os.replace(f"{ipc_path}.json.tmp-{os.getpid()}", ipc_path + ".json")
+    return ipc_path
+# -------------------------------------------------------------------------------
+def read_ipc(path: str, columns: list | None = None) -> pd.DataFrame:
+    """
+    Memory-maps the Arrow IPC copy of a dataset and returns it as a DataFrame.
+
+    Numeric, date and categorical columns without missing values are zero-copy views of the
+    mapped file; plain text columns become pyarrow-backed `string` columns (also zero-copy).
+    The columns are read-only; callers replace a column instead of changing it in place (see dataset_cache.get_dataset).
+    """
+    table = pa.ipc.open_file(pa.memory_map(get_ipc_path(path), "r")).read_all()
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    string_dtypes = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+    return table.to_pandas(split_blocks=True, types_mapper=string_dtypes.get)
+# -------------------------------------------------------------------------------
+def load_dataset(path: str, columns: list | None = None, years: tuple | None = None, deltas: list | None = None) -> pd.DataFrame:
+    """
+    Loads a dataset through the columnar store.
+
+    The first load writes a memory-mappable Arrow IPC copy of the dataset (see Block 3);
+    every later load, in any server process, maps that file instead of parsing the data.
+    If the IPC copy cannot be used, the Parquet store (or the file itself) is read.
+    Rows appended to a Parquet dataset (see core/dataset_deltas.py) follow the rows of the file.
+
+    Args:
+        path (str): Path of the CSV (or Parquet) dataset.
+        columns (list): Optional column projection. None loads every column.
+        years (tuple): Optional inclusive (start_year, end_year) range on `Date`.
+        deltas (list): Appended delta files to include (None = every pending delta, see dataset_deltas.get_deltas).
+
+    Returns:
+        pd.DataFrame: The loaded dataset.
+    """
+    if deltas is None:
+        deltas = dataset_deltas.get_deltas(path) if path.endswith(".parquet") else []
+    try:
+        if not is_ipc_current(path):
+            write_ipc(path)
+        df = read_ipc(path, columns)
+    except Exception as e:
+        print(f"Dataset Store Error: could not use the Arrow IPC copy of '{path}': {e}")
+        if not deltas:
+            return _load_columnar(path, columns, years)
+        df = _load_columnar(path, columns)
+
+    if deltas:
+        rows = dataset_deltas.read_deltas(path, deltas, columns)
+        df = dataset_deltas.concat_rows(df, rows, is_traffic_dataset(pq.read_schema(path).names))
+    if years is not None and 'Date' in df.columns:
+        df = year_range_slice(sort_by_date(df), *years)
+    return df
+
+
+# ==================================================================================
+# Block 4: Cleanup
+# ==================================================================================
+def clear_store(path: str) -> None:
+    """
+    Removes the columnar (Parquet) and Arrow IPC copies of a dataset (e.g. before the dataset
+    itself is deleted). Copies of other datasets sharing the store folder (same name, other
+    extension) are kept.
+    """
+    ipc_path = get_ipc_path(path)
+    for file_path in (ipc_path + ".json", ipc_path):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    store_path = get_store_path(path)
+    if path.endswith(".csv") and os.path.isdir(store_path):
+        # The manifest goes first, so a half-removed copy is never taken for a current one
+        if os.path.exists(os.path.join(store_path, MANIFEST_FILE)):
+            os.remove(os.path.join(store_path, MANIFEST_FILE))
+        for name in os.listdir(store_path):
+            item = os.path.join(store_path, name)
+            if name.startswith(f"{PARTITION_COLUMN}=") and os.path.isdir(item):
+                shutil.rmtree(item, ignore_errors=True)
+            elif name.endswith(".parquet") and os.path.isfile(item):
+                os.remove(item)
+    try:
+        os.rmdir(store_path)  # only once nothing else is left in it
+    except OSError:
+        pass
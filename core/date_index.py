@@ -0,0 +1,156 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+# This module keeps datasets sorted by Date so that date and year filters become
+# binary searches (O(log n)) returning zero-copy row slices instead of full-frame boolean masks.
+
+# ---------------------------------------------------------
+# SORT MARKER
+# ---------------------------------------------------------
+# Frames sorted by sort_by_date carry the sorted column in `df.attrs`. Row subsets and
+# column changes keep the marker (pandas copies attrs), so the marker alone does not prove the
+# order: a frame re-sorted by another column (even with a fresh index) still has it. The column
+# itself is checked; the result is kept per read-only column buffer (the cached datasets), so
+# views and slices of a cached dataset are checked once.
+SORTED_BY_ATTR = "sorted_by"
+
+_sorted_buffers = {}  # (address, rows, stride) -> (weakref to the array owning the buffer, sorted?)
+MAX_SORTED_BUFFERS = 256
+
+
+# ==================================================================================
+# Block 0: Sorting
+# ==================================================================================
+def sort_by_date(df: pd.DataFrame, column: str = 'Date') -> pd.DataFrame:
+    """
+    Sorts a frame by a datetime column once (missing dates last) and marks it as sorted.
+    Frames without a datetime column are returned unchanged.
+
+    Returns:
+        pd.DataFrame: The sorted frame with a fresh RangeIndex.
+    """
+    if column not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[column]):
+        return df
+    if df[column].isna().any() or not df[column].is_monotonic_increasing:
+        df = df.sort_values(column, kind='stable', na_position='last', ignore_index=True)
+    elif not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index(drop=True)
+    df.attrs[SORTED_BY_ATTR] = column
+    return df
+# -------------------------------------------------------------------------------
+def _is_sorted(values: np.ndarray) -> bool:
+    # Ascending dates followed by the missing ones (the order of sort_by_date)
+    missing = np.isnat(values)
+    valid_rows = len(values) - int(missing.sum())
+    if missing[:valid_rows].any():
+        return False
+    valid = values[:valid_rows]
+    return bool((valid[1:] >= valid[:-1]).all())
+# -------------------------------------------------------------------------------
+def _column_is_sorted(column: pd.Series) -> bool:
+    if not isinstance(column.dtype, np.dtype):  # timezone-aware dates are filtered with a mask
+        return False
+    values = column.to_numpy()
+    owner = values
+    while isinstance(owner.base, np.ndarray):
+        owner = owner.base
+    # Only buffers nobody can write to keep their order, so only their result is kept
+    if values.flags.writeable or owner.flags.writeable:
+        return _is_sorted(values)
+    key = (values.__array_interface__['data'][0], len(values), values.strides)
+    known = _sorted_buffers.get(key)
+    if known is not None and known[0]() is owner:
+        return known[1]
+    result = _is_sorted(values)
+    if len(_sorted_buffers) >= MAX_SORTED_BUFFERS:
+        _sorted_buffers.clear()
+    _sorted_buffers[key] = (weakref.ref(owner), result)
+    return result
+# -------------------------------------------------------------------------------
+def is_sorted_by(df: pd.DataFrame, column: str = 'Date') -> bool:
+    """
+    True when df is marked by sort_by_date and its column is still in that order (missing dates
+    last). The order check is O(n) once per read-only column buffer and O(1) after that.
+    """
+    return (
+        df.attrs.get(SORTED_BY_ATTR) == column
+        and column in df.columns
+        and pd.api.types.is_datetime64_any_dtype(df[column])
+        and _column_is_sorted(df[column])
+    )
+
+
+# ==================================================================================
+# Block 1: Range Slicing
+# ==================================================================================
+def searchsorted_bounds(values: np.ndarray, start=None, end=None) -> tuple:
+    """
+    Returns the (lo, hi) positions of start <= value <= end in a sorted datetime64 array.
+    NaT values sort last, so they are never inside a range. None means an open bound.
+    """
+    unit = np.datetime_data(values.dtype)[0]
+    lo = 0 if start is None else int(np.searchsorted(values, np.datetime64(pd.Timestamp(start), unit), side='left'))
+    if end is None:
+        hi = int(np.searchsorted(values, np.datetime64('NaT', unit), side='left'))
+    else:
+        hi = int(np.searchsorted(values, np.datetime64(pd.Timestamp(end), unit), side='right'))
+    return lo, max(lo, hi)
+# -------------------------------------------------------------------------------
+def date_range_slice(df: pd.DataFrame, start=None, end=None, column: str = 'Date') -> pd.DataFrame:
+    """
+    Returns the rows with start <= df[column] <= end (both inclusive timestamps).
+
+    On a frame sorted by sort_by_date this is a binary search plus a zero-copy row slice;
+    other frames fall back to a boolean mask with the same result.
+
+    Args:
+        df (pd.DataFrame): The data.
+        start: First timestamp to keep (None = no lower bound).
+        end: Last timestamp to keep (None = no upper bound).
+        column (str): Datetime column to filter on.
+    """
+    if is_sorted_by(df, column):
+        lo, hi = searchsorted_bounds(df[column].to_numpy(), start, end)
+        return df.iloc[lo:hi]
+
+    dates = pd.to_datetime(df[column], errors='coerce')
+    mask = dates.notna()
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start)
+    if end is not None:
+        mask &= dates <= pd.Timestamp(end)
+    return df[mask]
+# -------------------------------------------------------------------------------
+def day_range_slice(df: pd.DataFrame, start_day, end_day, column: str = 'Date') -> pd.DataFrame:
+    """
+    Returns the rows dated from start_day through end_day (whole calendar days, both inclusive),
+    like `df[column].dt.date >= start_day & df[column].dt.date <= end_day`.
+    """
+    start = pd.Timestamp(start_day).normalize()
+    end = pd.Timestamp(end_day).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    return date_range_slice(df, start, end, column)
+# -------------------------------------------------------------------------------
+def year_range_slice(df: pd.DataFrame, start_year: int, end_year: int, column: str = 'Date') -> pd.DataFrame:
+    """
+    Returns the rows dated in the calendar years start_year..end_year (both inclusive),
+    like `df[column].dt.year >= start_year & df[column].dt.year <= end_year`.
+    """
+    return day_range_slice(df, pd.Timestamp(year=start_year, month=1, day=1), pd.Timestamp(year=end_year, month=12, day=31), column)
+# -------------------------------------------------------------------------------
+def get_year_bounds(df: pd.DataFrame, column: str = 'Date') -> tuple | None:
+    """
+    Returns (min_year, max_year) of a datetime column, or None when it has no valid dates.
+    O(1) on a frame sorted by sort_by_date.
+    """
+    if is_sorted_by(df, column):
+        values = df[column].to_numpy()
+        lo, hi = searchsorted_bounds(values)
+        if hi == 0:
+            return None
+        return pd.Timestamp(values[0]).year, pd.Timestamp(values[hi - 1]).year
+
+    dates = pd.to_datetime(df[column], errors='coerce')
+    if dates.isna().all():
+        return None
+    return int(dates.dt.year.min()), int(dates.dt.year.max())
@@ -0,0 +1,228 @@
+import os
+import io
+import sys
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import streamlit as st
+from core.dataset_cache import DATASET_KEY_ATTR, unchanged_columns
+
+# This module caches rendered matplotlib/seaborn figures as PNG bytes.
+# A rerun with the same plot inputs serves the stored image without calling matplotlib at all.
+
+# ---------------------------------------------------------
+# CACHE CONFIGURATION
+# ---------------------------------------------------------
+# Memory budget for all rendered images together (override with the FIGURE_CACHE_MAX_MB env variable)
+FIGURE_CACHE_MAX_MB = int(os.environ.get("FIGURE_CACHE_MAX_MB", 128))
+
+# Same output settings as st.pyplot, so cached images look exactly like the figures they replace
+SAVEFIG_OPTIONS = {"format": "png", "bbox_inches": "tight", "dpi": 200}
+
+_cache = OrderedDict()  # key -> PNG bytes, least recently used first
+_cache_lock = threading.Lock()
+
+# pyplot keeps global state (current figure, rcParams), so only one figure is drawn at a time.
+# Background pre-rendering therefore uses a single worker; it still takes the work off the page run.
+_render_lock = threading.RLock()
+_prerender_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="figure-prerender")
+_pending = set()  # keys queued for pre-rendering
+
+# Index objects are immutable, so each one is hashed once: id(index) -> (weak reference, digest)
+_index_digests = {}
+
+
+# ==================================================================================
+# Block 0: Fingerprints
+# ==================================================================================
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode())
+    return h.hexdigest()
+# -------------------------------------------------------------------------------
+def _index_fingerprint(index: pd.Index) -> str:
+    if isinstance(index, pd.RangeIndex):
+        return _digest('range', index.start, index.stop, index.step)
+    with _cache_lock:
+        cached = _index_digests.get(id(index))
+    if cached is not None and cached[0]() is index:
+        return cached[1]
+    digest = _digest(pd.util.hash_pandas_object(index, index=False).to_numpy().tobytes())
+    # The entry is dropped when the index is garbage collected (its id may then be reused)
+    key = id(index)
+    ref = weakref.ref(index, lambda _: _index_digests.pop(key, None))
+    with _cache_lock:
+        _index_digests[key] = (ref, digest)
+    return digest
+# -------------------------------------------------------------------------------
+def fingerprint(obj) -> str:
+    """
+    Returns a short fingerprint of a plot input.
+
+    Rows of a cached dataset (e.g. a date slice of it) are identified by dataset version +
+    row index + column layout; only columns that no longer hold the cached values (changed
+    in place or added by the page) are hashed. Aggregated inputs (pivots, counts, small
+    frames) are hashed by content.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        layout = (
+            list(obj.columns) if isinstance(obj, pd.DataFrame) else obj.name,
+            [str(dtype) for dtype in (obj.dtypes if isinstance(obj, pd.DataFrame) else [obj.dtype])],
+            obj.shape,
+        )
+        unchanged = unchanged_columns(obj) if isinstance(obj, pd.DataFrame) else None
+        if unchanged is not None:
+            changed = obj.loc[:, ~obj.columns.isin(unchanged)]
+            values = pd.util.hash_pandas_object(changed, index=False).to_numpy().tobytes() if len(changed.columns) else b''
+            return _digest('rows', obj.attrs[DATASET_KEY_ATTR], layout, _index_fingerprint(obj.index), values)
+        values = pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes()
+        return _digest('frame', layout, list(obj.index.names), values)
+    if isinstance(obj, np.ndarray):
+        return _digest('array', obj.dtype.str, obj.shape, np.ascontiguousarray(obj).tobytes())
+    if isinstance(obj, (list, tuple)):
+        return _digest('seq', [fingerprint(item) for item in obj])
+    if isinstance(obj, dict):
+        return _digest('dict', [(key, fingerprint(value)) for key, value in obj.items()])
+    return _digest(type(obj).__name__, obj)
+# -------------------------------------------------------------------------------
+def _style_fingerprint(plot_func) -> str:
+    # The plot modules define their style as UPPER_CASE constants (sizes, palettes, figure size)
+    module = sys.modules.get(plot_func.__module__)
+    constants = {
+        name: value for name, value in vars(module).items()
+        if name.isupper() and isinstance(value, (int, float, str, tuple, list, dict))
+    } if module else {}
+    return _digest(sorted(constants.items()))
+# -------------------------------------------------------------------------------
+def _current_theme() -> str:
+    try:
+        return st.context.theme.type or "light"
+    except Exception:
+        return "light"
+
+
+# ==================================================================================
+# Block 1: Rendering
+# ==================================================================================
+def _evict(budget_bytes: int):
+    total = sum(len(png) for png in _cache.values())
+    while total > budget_bytes and len(_cache) > 1:
+        _, png = _cache.popitem(last=False)
+        total -= len(png)
+# -------------------------------------------------------------------------------
+def _render_key(plot_func, args: tuple, kwargs: dict) -> tuple | None:
+    # Plot function name + input fingerprint + style constants + Streamlit theme
+    try:
+        return (
+            f"{plot_func.__module__}.{plot_func.__qualname__}",
+            fingerprint(args),
+            fingerprint(kwargs),
+            _style_fingerprint(plot_func),
+            _current_theme(),
+        )
+    except Exception as e:
+        # Inputs that cannot be fingerprinted are rendered without caching
+        print(f"Figure Cache Error: {e}")
+        return None
+# -------------------------------------------------------------------------------
+def _cached_png(key: tuple | None) -> bytes | None:
+    if key is None:
+        return None
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+# -------------------------------------------------------------------------------
+def _render_and_store(key: tuple | None, plot_func, args: tuple, kwargs: dict) -> bytes | None:
+    with _render_lock:
+        # A queued pre-render may have finished while this call waited for the lock
+        png = _cached_png(key)
+        if png is not None:
+            return png
+
+        fig = plot_func(*args, **kwargs)
+        if fig is None:
+            return None
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **SAVEFIG_OPTIONS)
+        plt.close(fig)
+        png = buffer.getvalue()
+
+    if key is not None:
+        with _cache_lock:
+            _cache[key] = png
+            _evict(FIGURE_CACHE_MAX_MB * 1024 * 1024)
+    return png
+# -------------------------------------------------------------------------------
+def render_png(plot_func, *args, **kwargs) -> bytes | None:
+    """
+    Returns plot_func(*args, **kwargs) rendered as PNG bytes, from the cache when possible.
+
+    The cache key is the plot function name + a fingerprint of its inputs + the plot style
+    constants of its module + the current Streamlit theme.
+
+    Returns:
+        bytes | None: The PNG image, or None when the plot function returned no figure.
+    """
+    key = _render_key(plot_func, args, kwargs)
+    png = _cached_png(key)
+    if png is not None:
+        return png
+    return _render_and_store(key, plot_func, args, kwargs)
+# -------------------------------------------------------------------------------
+def _prerender_task(key: tuple, plot_func, args: tuple, kwargs: dict):
+    try:
+        _render_and_store(key, plot_func, args, kwargs)
+    except Exception as e:
+        print(f"Figure Cache Error: pre-rendering {key[0]} failed: {e}")
+    finally:
+        with _cache_lock:
+            _pending.discard(key)
+# -------------------------------------------------------------------------------
+def prerender(plot_func, *args, **kwargs):
+    """
+    Queues plot_func(*args, **kwargs) for rendering in the background thread pool, so the image
+    is already cached when the plot is shown. Does nothing if it is cached or already queued.
+    """
+    key = _render_key(plot_func, args, kwargs)
+    if key is None:
+        return
+    with _cache_lock:
+        if key in _cache or key in _pending:
+            return
+        _pending.add(key)
+    _prerender_pool.submit(_prerender_task, key, plot_func, args, kwargs)
+# -------------------------------------------------------------------------------
+def show_plot(plot_func, *args, **kwargs) -> bool:
+    """
+    Renders a plot through the cache and shows it full width (replacement for st.pyplot(plot_func(...))).
+
+    Returns:
+        bool: False when the plot function returned no figure.
+    """
+    png = render_png(plot_func, *args, **kwargs)
+    if png is None:
+        return False
+    st.image(png, width='stretch')
+    return True
+# -------------------------------------------------------------------------------
+def clear_cache():
+    """
+    Removes every rendered image from the cache.
+    """
+    with _cache_lock:
+        _cache.clear()
+# -------------------------------------------------------------------------------
+def get_cache_info() -> dict:
+    """
+    Returns the number of cached images and their total size in MB.
+    """
+    with _cache_lock:
+        return {'images': len(_cache), 'size_mb': round(sum(len(png) for png in _cache.values()) / (1024 * 1024), 2)}
@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from core import bitmap_index, search_index
+from core.figure_cache import fingerprint
+
+# This module renders large tables one page at a time. Filtering and sorting run on the server
+# (sort orders are cached), and only the rows of the visible page are serialized and sent to the
+# browser, instead of the whole frame.
+
+# ---------------------------------------------------------
+# TABLE CONFIGURATION
+# ---------------------------------------------------------
+DEFAULT_PAGE_SIZE = 100
+PAGE_SIZE_OPTIONS = [25, 50, 100, 250, 500, 1000]
+
+# Cached filter results / sort orders (row positions) and rendered pages, over all tables
+ORDER_CACHE_SIZE = 32
+PAGE_CACHE_SIZE = 64
+
+_orders = OrderedDict()  # (frame fingerprint, filter, sort column, ascending) -> row positions
+_pages = OrderedDict()   # (frame fingerprint, filter, sort column, ascending, page size, page) -> DataFrame
+_cache_lock = threading.Lock()
+
+
+# ==================================================================================
+# Block 0: Server-Side Filter, Sort and Paging
+# ==================================================================================
+def _lru_get(cache: OrderedDict, key):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+# -------------------------------------------------------------------------------
+def _lru_put(cache: OrderedDict, key, value, max_entries: int):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+# -------------------------------------------------------------------------------
+def get_row_order(df: pd.DataFrame, query: str = "", sort_column: str | None = None, ascending: bool = True) -> np.ndarray:
+    """
+    Returns the row positions of df to show, after filtering with a search query
+    (see search_index.query_bitmap) and a stable sort on one column (missing values last).
+
+    Raises:
+        ValueError: Invalid search query.
+    """
+    key = (fingerprint(df), query.strip(), sort_column, ascending)
+    order = _lru_get(_orders, key)
+    if order is not None:
+        return order
+
+    positions = np.arange(len(df))
+    if query.strip():
+        bitmap = search_index.query_bitmap(df, query)
+        if bitmap is not None:
+            positions = np.flatnonzero(bitmap_index.bitmap_mask(df, bitmap))
+    if sort_column is not None and sort_column in df.columns:
+        values = df[sort_column].iloc[positions].reset_index(drop=True)
+        positions = positions[values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()]
+
+    _lru_put(_orders, key, positions, ORDER_CACHE_SIZE)
+    return positions
+# -------------------------------------------------------------------------------
+def _arrow_safe(page: pd.DataFrame) -> pd.DataFrame:
+    # Object columns holding mixed types cannot be serialized to Arrow; show them as text
+    for col in page.columns:
+        if page[col].dtype == object and pd.api.types.infer_dtype(page[col], skipna=True).startswith('mixed'):
+            page[col] = page[col].astype(str)
+    return page
+# -------------------------------------------------------------------------------
+def get_page(df: pd.DataFrame, page: int, page_size: int = DEFAULT_PAGE_SIZE, query: str = "",
+             sort_column: str | None = None, ascending: bool = True) -> pd.DataFrame:
+    """
+    Returns one page (1-based) of the filtered and sorted rows of df.
+
+    The neighbouring pages are cached with it, so paging back and forth does not touch df again.
+
+    Raises:
+        ValueError: Invalid search query.
+    """
+    base_key = (fingerprint(df), query.strip(), sort_column, ascending, page_size)
+    cached = _lru_get(_pages, base_key + (page,))
+    if cached is not None:
+        return cached
+
+    order = get_row_order(df, query, sort_column, ascending)
+    page_count = max(1, -(-len(order) // page_size))
+    result = None
+    for number in (page, page - 1, page + 1):
+        if number < 1 or number > page_count:
+            continue
+        rows = order[(number - 1) * page_size:number * page_size]
+        page_df = _arrow_safe(df.iloc[rows])
+        _lru_put(_pages, base_key + (number,), page_df, PAGE_CACHE_SIZE)
+        if number == page:
+            result = page_df
+    return result if result is not None else df.iloc[:0]
+# -------------------------------------------------------------------------------
+def clear_cache():
+    """
+    Removes every cached sort order and page.
+    """
+    with _cache_lock:
+        _orders.clear()
+        _pages.clear()
+
+
+# ==================================================================================
+# Block 1: Table Component
+# ==================================================================================
+def show_paginated_table(df: pd.DataFrame, key: str, page_size: int = DEFAULT_PAGE_SIZE, columns: list | None = None,
+                         hide_index: bool = False, editor: bool = False, show_filter: bool = True):
+    """
+    Shows df as a paginated table: sort / filter / page controls and only the visible page of rows.
+
+    Args:
+        df (pd.DataFrame): The rows to show (may have millions of rows).
+        key (str): Unique widget key prefix for this table.
+        page_size (int): Default number of rows per page.
+        columns (list): Columns to show (None = all). Filtering and sorting still see every column.
+        hide_index (bool): Hide the row index.
+        editor (bool): Show the page with st.data_editor instead of st.dataframe.
+        show_filter (bool): Show the row filter box (search_index query syntax).
+    """
+    columns = [col for col in (columns or df.columns) if col in df.columns]
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    with c1:
+        query = st.text_input(
+            "Filter rows", key=f"{key}_filter", placeholder="e.g. Location:delhi Driver_Age:25-40",
+            help="`Column:value` terms and plain words, all of which must match."
+        ) if show_filter else ""
+    with c2:
+        sort_column = st.selectbox("Sort by", [None] + columns, key=f"{key}_sort",
+                                   format_func=lambda col: "(original order)" if col is None else str(col))
+    with c3:
+        ascending = st.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Ascending"
+    with c4:
+        default_size = page_size if page_size in PAGE_SIZE_OPTIONS else DEFAULT_PAGE_SIZE
+        page_size = st.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(default_size), key=f"{key}_size")
+
+    try:
+        order = get_row_order(df, query or "", sort_column, ascending)
+    except ValueError as e:
+        st.error(f"Invalid filter: {e}")
+        return
+
+    total_rows = len(order)
+    page_count = max(1, -(-total_rows // page_size))
+    # Go back to the first page when the rows or their order change
+    view_signature = (fingerprint(df), query, sort_column, ascending, page_size)
+    if st.session_state.get(f"{key}_view") != view_signature:
+        st.session_state[f"{key}_view"] = view_signature
+        st.session_state[f"{key}_page"] = 1
+    st.session_state[f"{key}_page"] = min(max(1, st.session_state.get(f"{key}_page", 1)), page_count)
+
+    page_df = get_page(df, st.session_state[f"{key}_page"], page_size, query or "", sort_column, ascending)[columns]
+    if editor:
+        st.data_editor(page_df, width='stretch', hide_index=hide_index, key=f"{key}_editor")
+    else:
+        st.dataframe(page_df, width='stretch', hide_index=hide_index)
+
+    p1, p2 = st.columns([1, 3])
+    with p1:
+        st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, step=1, key=f"{key}_page")
+    with p2:
+        first_row = (st.session_state[f"{key}_page"] - 1) * page_size
+        st.caption(f"Showing rows {min(first_row + 1, total_rows):,}–{min(first_row + page_size, total_rows):,} of {total_rows:,}")
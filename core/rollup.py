@@ -0,0 +1,225 @@
+import pandas as pd
+from core import dataset_cache, date_index, compute_backend
+
+# This module pre-aggregates a traffic violation dataset into a daily rollup cube.
+# The Dashboard summaries read from the cube, so moving the "last n days" or year sliders
+# costs O(days x groups) instead of re-scanning every row of the dataset.
+
+# ---------------------------------------------------------
+# ROLLUP LAYOUT
+# ---------------------------------------------------------
+# One cube row per (day, Location, Violation_Type, ...) combination that occurs in the data
+ROLLUP_KEYS = [
+    'Date',
+    'Location',
+    'Violation_Type',
+    'Vehicle_Type',
+    'Fine_Paid',
+    'License_Validity',
+    'Driver_Gender',
+    'Weather_Condition',
+]
+
+# Measures of every cube row; counts and sums can be added up over any slice of the cube
+ROLLUP_MEASURES = [
+    'Violations',        # number of rows
+    'Fine_Sum',          # sum of Fine_Amount
+    'Fine_Count',        # non-missing Fine_Amount values (for the mean)
+    'Fine_Min',
+    'Fine_Max',
+    'Over_Speeding',     # Recorded_Speed > Speed_Limit
+    'Court_Required',    # Court_Appearance_Required == 'Yes'
+    'Repeat_Offenders',  # Comments == 'Repeat Offender'
+]
+
+# Columns only needed for "most common value" metrics get a small (day, value) count table each
+SIDE_COUNT_COLUMNS = ['License_Type', 'Issuing_Agency', 'Payment_Method']
+
+ROLLUP_ARTIFACT = "daily_rollup"
+
+
+# ==================================================================================
+# Block 0: Building the Rollup
+# ==================================================================================
+def _flag_counts(df: pd.DataFrame, col: str, value: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(False, index=df.index)
+    return (df[col] == value).fillna(False).astype(bool)
+# -------------------------------------------------------------------------------
+def build_rollup(df: pd.DataFrame) -> dict:
+    """
+    Builds the daily rollup cube of a traffic violation dataset in one grouped pass.
+
+    Args:
+        df (pd.DataFrame): Traffic violation data with the ROLLUP_KEYS columns.
+
+    Returns:
+        dict: {'cube': DataFrame of ROLLUP_KEYS + ROLLUP_MEASURES sorted by Date,
+               'side_counts': {column: DataFrame of Date, column, Violations}}
+    """
+    date = pd.to_datetime(df['Date'], errors='coerce').dt.normalize()
+    fine = pd.to_numeric(df['Fine_Amount'], errors='coerce')
+
+    if 'Recorded_Speed' in df.columns and 'Speed_Limit' in df.columns:
+        over_speeding = (df['Recorded_Speed'] > df['Speed_Limit']).fillna(False).astype(bool)
+    else:
+        over_speeding = pd.Series(False, index=df.index)
+
+    data = pd.DataFrame({
+        'Date': date,
+        **{col: df[col] for col in ROLLUP_KEYS[1:]},
+        'Fine_Amount': fine,
+        'Over_Speeding': over_speeding,
+        'Court_Required': _flag_counts(df, 'Court_Appearance_Required', 'Yes'),
+        'Repeat_Offenders': _flag_counts(df, 'Comments', 'Repeat Offender'),
+    })
+
+    # dropna=False keeps rows with a missing key value, so cube totals equal the row counts
+    cube = compute_backend.group_named_agg(data, ROLLUP_KEYS, {
+        'Violations': ('Fine_Amount', 'size'),
+        'Fine_Sum': ('Fine_Amount', 'sum'),
+        'Fine_Count': ('Fine_Amount', 'count'),
+        'Fine_Min': ('Fine_Amount', 'min'),
+        'Fine_Max': ('Fine_Amount', 'max'),
+        'Over_Speeding': ('Over_Speeding', 'sum'),
+        'Court_Required': ('Court_Required', 'sum'),
+        'Repeat_Offenders': ('Repeat_Offenders', 'sum'),
+    }, dropna=False).reset_index()
+    cube = date_index.sort_by_date(cube)
+
+    side_counts = {}
+    for col in SIDE_COUNT_COLUMNS:
+        if col not in df.columns:
+            continue
+        counts = pd.DataFrame({'Date': date, col: df[col]})
+        side_counts[col] = date_index.sort_by_date(
+            compute_backend.group_size(counts, ['Date', col])
+            .rename('Violations')
+            .reset_index()
+        )
+
+    return {'cube': cube, 'side_counts': side_counts}
+# -------------------------------------------------------------------------------
+def _merge_days(old: pd.DataFrame, part: pd.DataFrame, keys: list, named_aggs: dict, dropna: bool) -> pd.DataFrame:
+    # Old rollup table + the table of the appended rows: only the days the appended rows fall on
+    # (and missing dates) are aggregated again, every other day of the old table is kept as it is
+    old = old.assign(**{
+        col: old[col].cat.set_categories(part[col].cat.categories)
+        for col in keys if isinstance(part[col].dtype, pd.CategoricalDtype) and isinstance(old[col].dtype, pd.CategoricalDtype)
+    })
+    days = part['Date'].dropna()
+    dates = old['Date'].to_numpy()
+    nat = date_index.searchsorted_bounds(dates)[1]
+    lo, hi = date_index.searchsorted_bounds(dates, days.min(), days.max()) if len(days) else (nat, nat)
+    touched = pd.concat([old.iloc[lo:hi], old.iloc[nat:], part], ignore_index=True)
+    merged = compute_backend.group_named_agg(touched, keys, named_aggs, dropna=dropna).reset_index()
+    return date_index.sort_by_date(pd.concat([old.iloc[:lo], old.iloc[hi:nat], merged], ignore_index=True))
+# -------------------------------------------------------------------------------
+def update_rollup(rollup: dict, increment: dict) -> dict:
+    """
+    Updates a rollup with appended rows (see dataset_cache.get_artifact): the appended rows are
+    rolled up on their own and merged into the days they fall on, so an append costs
+    O(new rows + days touched) instead of a pass over the whole dataset.
+    """
+    part = build_rollup(increment['rows'])
+    cube = _merge_days(rollup['cube'], part['cube'], ROLLUP_KEYS, {
+        'Violations': ('Violations', 'sum'),
+        'Fine_Sum': ('Fine_Sum', 'sum'),
+        'Fine_Count': ('Fine_Count', 'sum'),
+        'Fine_Min': ('Fine_Min', 'min'),
+        'Fine_Max': ('Fine_Max', 'max'),
+        'Over_Speeding': ('Over_Speeding', 'sum'),
+        'Court_Required': ('Court_Required', 'sum'),
+        'Repeat_Offenders': ('Repeat_Offenders', 'sum'),
+    }, dropna=False)
+    side_counts = {
+        col: _merge_days(rollup['side_counts'][col], counts, ['Date', col], {'Violations': ('Violations', 'sum')}, dropna=True)
+        if col in rollup['side_counts'] else counts
+        for col, counts in part['side_counts'].items()
+    }
+    return {'cube': cube, 'side_counts': side_counts}
+# -------------------------------------------------------------------------------
+def get_rollup(df: pd.DataFrame) -> dict:
+    """
+    Returns the daily rollup of the dataset that df is a view of, built once per dataset version
+    (and updated from the appended rows when rows are appended, see update_rollup).
+    """
+    return dataset_cache.get_artifact(df, ROLLUP_ARTIFACT, build_rollup, update=update_rollup)
+
+
+# ==================================================================================
+# Block 1: Slicing the Rollup
+# ==================================================================================
+def slice_rollup(rollup: dict, start: pd.Timestamp, end: pd.Timestamp) -> dict:
+    """
+    Restricts a rollup to the days between start and end (both inclusive).
+
+    Args:
+        rollup (dict): A rollup returned by build_rollup / get_rollup.
+        start (pd.Timestamp): First day to keep.
+        end (pd.Timestamp): Last day to keep.
+
+    Returns:
+        dict: A rollup with the same layout covering only the selected days.
+    """
+    # Rollup tables are sorted by Date, so a range is two binary searches per table
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    return {
+        'cube': date_index.date_range_slice(rollup['cube'], start, end),
+        'side_counts': {col: date_index.date_range_slice(counts, start, end) for col, counts in rollup['side_counts'].items()},
+    }
+# -------------------------------------------------------------------------------
+def slice_rollup_last_n_days(rollup: dict, n: int) -> dict:
+    """
+    Restricts a rollup to the last n days up to today (same window as utils.get_last_n_days_data).
+    """
+    today = pd.Timestamp.now().normalize()
+    return slice_rollup(rollup, today - pd.Timedelta(days=n), today)
+# -------------------------------------------------------------------------------
+def slice_rollup_by_years(rollup: dict, start_year: int, end_year: int) -> dict:
+    """
+    Restricts a rollup to the calendar years start_year..end_year (both inclusive).
+    """
+    return slice_rollup(rollup, pd.Timestamp(year=start_year, month=1, day=1), pd.Timestamp(year=end_year, month=12, day=31))
+
+
+# ==================================================================================
+# Block 2: Aggregating a Rollup Slice
+# ==================================================================================
+def total_violations(rollup: dict) -> int:
+    """
+    Returns the number of violations covered by a rollup (slice).
+    """
+    return int(rollup['cube']['Violations'].sum())
+# -------------------------------------------------------------------------------
+def counts_by(rollup: dict, columns: list | str, measure: str = 'Violations') -> pd.Series:
+    """
+    Sums a measure of the cube (or of a side count table) by one or more key columns.
+    Combinations without violations and missing key values are left out.
+
+    Args:
+        rollup (dict): A rollup (slice).
+        columns (list | str): ROLLUP_KEYS or one SIDE_COUNT_COLUMNS column to group by.
+        measure (str): One of ROLLUP_MEASURES.
+
+    Returns:
+        pd.Series: Summed measure indexed by the group values (in sorted order).
+    """
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    if len(columns) == 1 and columns[0] in rollup['side_counts']:
+        frame = rollup['side_counts'][columns[0]]
+    else:
+        frame = rollup['cube']
+    sums = compute_backend.group_named_agg(frame, columns, {col: (col, 'sum') for col in dict.fromkeys(['Violations', measure])})
+    return sums.loc[sums['Violations'] > 0, measure]
+# -------------------------------------------------------------------------------
+def mode_from_counts(counts: pd.Series):
+    """
+    Returns the most frequent value of a counts_by result, like Series.mode()[0]:
+    ties go to the smallest value. Returns None when there are no counts.
+    """
+    counts = counts[counts > 0]
+    if counts.empty:
+        return None
+    return counts[counts == counts.max()].sort_index().index[0]
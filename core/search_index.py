@@ -0,0 +1,273 @@
+import re
+import shlex
+import bisect
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core import dataset_cache, bitmap_index
+
+# This module is the search backend of the View Dataset page. Text columns get inverted
+# indexes over their distinct values (word tokens and character n-grams), numeric columns a
+# sorted index for range queries. Query results are packed row bitmaps (see core/bitmap_index.py),
+# cached per dataset version, so repeating or refining a search does not scan the rows again.
+
+# ---------------------------------------------------------
+# SEARCH CONFIGURATION
+# ---------------------------------------------------------
+NGRAM_SIZE = 3
+
+# Token / n-gram indexes are only built for columns with at most this many distinct values;
+# identifiers (Violation_ID, Officer_ID, ...) are matched with one vectorized scan of their distinct values
+MAX_INDEXED_VALUES = 50_000
+
+# Number of cached query results (row bitmaps) over all datasets
+POSTING_CACHE_SIZE = 512
+
+SEARCH_INDEX_ARTIFACT = "search_index"
+
+_postings = OrderedDict()  # (dataset key, column, query) -> packed row bitmap, least recently used first
+_postings_lock = threading.Lock()
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_RANGE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)?\s*(-)?\s*(\d+(?:\.\d+)?)?\s*$")
+
+
+# ==================================================================================
+# Block 0: Building the Indexes
+# ==================================================================================
+def build_text_index(df: pd.DataFrame, column: str) -> dict:
+    """
+    Builds the inverted index of a text column over its distinct values.
+
+    Returns:
+        dict: {'labels': lower-case distinct values (pyarrow string Series),
+               'codes': int array, the distinct value of every row (-1 = missing),
+               'ngrams': {n-gram: sorted value ids} or None for high-cardinality columns,
+               'tokens': sorted list of (word, value ids) or None}
+    """
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series)
+    # Vectorized (Arrow) lower-casing: identifier columns have one distinct value per row
+    labels = pd.Series(values).astype("string[pyarrow]").str.lower()
+
+    ngrams, tokens = None, None
+    if len(labels) <= MAX_INDEXED_VALUES:
+        ngrams, words = {}, {}
+        for value_id, label in enumerate(labels.tolist()):
+            for gram in {label[i:i + NGRAM_SIZE] for i in range(len(label) - NGRAM_SIZE + 1)}:
+                ngrams.setdefault(gram, []).append(value_id)
+            for word in set(_TOKEN_PATTERN.findall(label)):
+                words.setdefault(word, []).append(value_id)
+        ngrams = {gram: np.array(ids, dtype=np.int64) for gram, ids in ngrams.items()}
+        tokens = sorted((word, np.array(ids, dtype=np.int64)) for word, ids in words.items())
+
+    return {'labels': labels, 'codes': codes, 'ngrams': ngrams, 'tokens': tokens}
+# -------------------------------------------------------------------------------
+def build_numeric_index(df: pd.DataFrame, column: str) -> dict:
+    """
+    Builds the sorted index of a numeric column: row positions in value order (missing values last).
+
+    Returns:
+        dict: {'order': row positions sorted by value, 'values': the sorted values}
+    """
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+    order = np.argsort(values, kind='stable')
+    return {'order': order, 'values': values[order]}
+# -------------------------------------------------------------------------------
+def update_numeric_index(index: dict, increment: dict, column: str) -> dict | None:
+    """
+    Merges appended rows into the sorted index of a numeric column (see dataset_cache.get_artifact):
+    the new rows are sorted on their own and merged with the old run. Returns None (rebuild) when
+    the appended rows are not all after the old rows in the dataset's order.
+    """
+    if increment['positions'] is not None or 'order' not in index:
+        return None
+    part = build_numeric_index(increment['rows'], column)
+    values = np.concatenate([index['values'], part['values']])
+    # A stable sort of two sorted runs is a single merge; ties keep the old rows first
+    merged = np.argsort(values, kind='stable')
+    order = np.concatenate([index['order'], part['order'] + increment['parent_rows']])[merged]
+    return {'order': order, 'values': values[merged]}
+# -------------------------------------------------------------------------------
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+# -------------------------------------------------------------------------------
+def _get_index(frame: pd.DataFrame, positions, column: str) -> dict:
+    builder = build_numeric_index if _is_numeric(frame[column]) else build_text_index
+    if positions is None:
+        return builder(frame, column)
+    # Numeric indexes are merged with appended rows; text indexes are rebuilt (value ids follow
+    # the sorted categories, so new labels renumber the ids of every row)
+    update = (lambda index, increment: update_numeric_index(index, increment, column)) if builder is build_numeric_index else None
+    return dataset_cache.get_artifact(frame, f"{SEARCH_INDEX_ARTIFACT}:{column}", lambda base: builder(base, column), update=update)
+
+
+# ==================================================================================
+# Block 1: Matching
+# ==================================================================================
+def _rows_of_values(index: dict, value_ids) -> np.ndarray:
+    # Rows whose distinct value is one of value_ids, as a packed bitmap (one gather over the codes)
+    selected = np.zeros(len(index['labels']) + 1, dtype=bool)  # last slot: missing values (code -1)
+    selected[np.asarray(value_ids, dtype=np.int64)] = True
+    return np.packbits(selected[index['codes']])
+# -------------------------------------------------------------------------------
+def _substring_values(index: dict, text: str) -> np.ndarray:
+    # Distinct values containing text: intersect the n-gram postings, then confirm the candidates
+    labels = index['labels']
+    if index['ngrams'] is None or len(text) < NGRAM_SIZE:
+        return np.flatnonzero(labels.str.contains(text, regex=False).to_numpy(dtype=bool, na_value=False))
+
+    candidates = None
+    for gram in {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}:
+        ids = index['ngrams'].get(gram)
+        if ids is None:
+            return np.array([], dtype=np.int64)
+        candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+    return np.array([value_id for value_id in candidates if text in labels.iat[value_id]], dtype=np.int64)
+# -------------------------------------------------------------------------------
+def _prefix_values(index: dict, word: str) -> np.ndarray:
+    # Distinct values with a word starting with `word` (binary search in the sorted token list)
+    tokens = index['tokens']
+    lo = bisect.bisect_left(tokens, (word,))
+    hi = bisect.bisect_left(tokens, (word + "\uffff",))
+    if lo == hi:
+        return np.array([], dtype=np.int64)
+    return np.unique(np.concatenate([ids for _, ids in tokens[lo:hi]]))
+# -------------------------------------------------------------------------------
+def parse_range(text: str) -> tuple:
+    """
+    Parses a numeric search value: "30" (exact), "25-40", "25-" or "-40" (open ranges).
+
+    Returns:
+        tuple: (low, high), both inclusive; None for an open end.
+    """
+    match = _RANGE_PATTERN.match(text)
+    if not match or (match.group(1) is None and match.group(3) is None):
+        raise ValueError(f"'{text}' is not a number or a range like 25-40")
+    low, dash, high = match.groups()
+    if dash is None:
+        if low is not None and high is None:
+            return float(low), float(low)
+        raise ValueError(f"'{text}' is not a number or a range like 25-40")
+    return (float(low) if low is not None else None), (float(high) if high is not None else None)
+# -------------------------------------------------------------------------------
+def _range_rows(index: dict, low, high, rows: int) -> np.ndarray:
+    values = index['values']
+    start = 0 if low is None else int(np.searchsorted(values, low, side='left'))
+    # NaN sorts last, so an open upper end stops before the missing values
+    stop = int(np.searchsorted(values, np.inf if high is None else high, side='right'))
+    selected = np.zeros(rows, dtype=bool)
+    selected[index['order'][start:max(start, stop)]] = True
+    return np.packbits(selected)
+# -------------------------------------------------------------------------------
+def _cached_posting(frame: pd.DataFrame, positions, column: str, query: tuple, compute) -> np.ndarray:
+    if positions is None:
+        return compute()
+    key = (frame.attrs.get(dataset_cache.DATASET_KEY_ATTR), column, query)
+    with _postings_lock:
+        if key in _postings:
+            _postings.move_to_end(key)
+            return _postings[key]
+    bitmap = compute()
+    with _postings_lock:
+        _postings[key] = bitmap
+        while len(_postings) > POSTING_CACHE_SIZE:
+            _postings.popitem(last=False)
+    return bitmap
+
+
+# ==================================================================================
+# Block 2: Queries
+# ==================================================================================
+def field_bitmap(df: pd.DataFrame, column: str, text: str) -> np.ndarray:
+    """
+    Bitmap of the rows matching one field search.
+
+    Text columns: case-insensitive substring of the value (e.g. "drunk" in "Drunk Driving").
+    Numeric columns: exact value or inclusive range ("30", "25-40", "25-", "-40").
+
+    Raises:
+        ValueError: Unknown column or invalid numeric range.
+    """
+    frame, positions = bitmap_index._indexed_frame(df)
+    if column not in frame.columns:
+        raise ValueError(f"Unknown column '{column}'")
+    text = text.strip()
+    index = _get_index(frame, positions, column)
+
+    if 'order' in index:
+        low, high = parse_range(text)
+        return _cached_posting(frame, positions, column, ('range', low, high), lambda: _range_rows(index, low, high, len(frame)))
+    text = text.lower()
+    return _cached_posting(frame, positions, column, ('substring', text), lambda: _rows_of_values(index, _substring_values(index, text)))
+# -------------------------------------------------------------------------------
+def word_bitmap(df: pd.DataFrame, word: str) -> np.ndarray:
+    """
+    Bitmap of the rows where any text column has a word starting with `word`.
+    Identifier-like columns (more than MAX_INDEXED_VALUES distinct values) are not searched.
+    """
+    frame, positions = bitmap_index._indexed_frame(df)
+    word = word.strip().lower()
+    bitmaps = []
+    for column in frame.select_dtypes(include=['object', 'string', 'category']).columns:
+        index = _get_index(frame, positions, column)
+        if index['tokens'] is None:
+            continue
+        bitmaps.append(_cached_posting(frame, positions, column, ('prefix', word), lambda: _rows_of_values(index, _prefix_values(index, word))))
+    if not bitmaps:
+        return np.zeros((len(frame) + 7) // 8, dtype=np.uint8)
+    return bitmap_index.bitmap_or(*bitmaps)
+# -------------------------------------------------------------------------------
+def parse_query(query: str) -> list:
+    """
+    Splits a search query into terms: `column:value` field searches and free-text words.
+    Values with spaces can be quoted: Violation_Type:"Drunk Driving".
+
+    Returns:
+        list: (column or None, value) tuples.
+    """
+    terms = []
+    for part in shlex.split(query):
+        column, sep, value = part.partition(":")
+        if sep and column and value:
+            terms.append((column, value))
+        elif part.strip(":"):
+            terms.append((None, part.strip(":")))
+    return terms
+# -------------------------------------------------------------------------------
+def query_bitmap(df: pd.DataFrame, query: str) -> np.ndarray | None:
+    """
+    Bitmap of the rows matching every term of a search query (see parse_query).
+    Returns None for an empty query.
+
+    Example:
+        'Driver_Age:25-40 Location:delhi "drunk driv"' -> drivers aged 25 to 40, in a location
+        containing "delhi", with words starting with "drunk" and "driv" in the text columns.
+
+    Raises:
+        ValueError: Unknown column, invalid range or unbalanced quotes.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return None
+    bitmaps = []
+    for column, value in terms:
+        if column is not None:
+            bitmaps.append(field_bitmap(df, column, value))
+        else:
+            # A quoted phrase needs every one of its words
+            bitmaps.extend(word_bitmap(df, word) for word in _TOKEN_PATTERN.findall(value.lower()))
+    if not bitmaps:
+        return None
+    return bitmap_index.bitmap_and(*bitmaps)
+# -------------------------------------------------------------------------------
+def clear_cache():
+    """
+    Removes every cached query result.
+    """
+    with _postings_lock:
+        _postings.clear()
@@ -1,60 +1,28 @@
 import streamlit as st
 import pandas as pd
-import os
 from streamlit_local_storage import LocalStorage
+from core import dataset_cache, dataset_catalog
 
-def render_sidebar() -> pd.DataFrame:
+def render_sidebar(columns: list | None = None) -> pd.DataFrame:
     """
     Renders the sidebar components including the dataset selector.
     Returns the selected and loaded pandas DataFrame.
+
+    Args:
+        columns (list): Optional column projection; only these columns are read from the columnar store.
     """
     st.sidebar.header("Dataset Selector")
     
-    # Get the list of available datasets
-    dataset_folder = "dataset"
-    uploaded_dataset_folder = "uploaded_datasets"
-    related_uploads_folder = "uploded_file_relateds"
-    generated_dataset_folder = "generated_fake_traffic_datasets"
-    other_party_uploads_folder = "uploded_file_others"
-    
-    dataset_options = {}
-
-    # Add datasets from the 'dataset' folder
-    if os.path.exists(dataset_folder):
-        for filename in os.listdir(dataset_folder):
-            if filename.endswith(".csv"):
-                dataset_options[f"{filename} [Sample]"] = os.path.join(dataset_folder, filename)
-
-    # Function to scan a directory and add to options
-    def scan_and_add_datasets(directory, prefix):
-        if os.path.exists(directory):
-            # Scan for date-based directories (for generated data)
-            if "generated" in directory:
-                for date_dir in sorted(os.listdir(directory), reverse=True):
-                    full_date_dir = os.path.join(directory, date_dir)
-                    if os.path.isdir(full_date_dir):
-                        for file_name in sorted(os.listdir(full_date_dir)):
-                            if file_name.endswith('.csv'):
-                                display_name = f"{file_name} [{prefix} - {date_dir}]"
-                                dataset_options[display_name] = os.path.join(full_date_dir, file_name)
-            else: # Original logic for other directories
-                for file_name in sorted(os.listdir(directory)):
-                    if file_name.endswith('.csv'):
-                        dataset_options[f"{file_name} [{prefix}]"] = os.path.join(directory, file_name)
-
-    # Scan new directories in the desired order
-    scan_and_add_datasets(generated_dataset_folder, "Fake Generated")
-    scan_and_add_datasets(related_uploads_folder, "Legacy")
-    scan_and_add_datasets(other_party_uploads_folder, "Other CSVs")
-
-    # Add datasets from the 'uploaded_datasets' folder (legacy)
-    if os.path.exists(uploaded_dataset_folder):
-        for root, dirs, files in os.walk(uploaded_dataset_folder):
-            for filename in files:
-                if filename.endswith(".csv"):
-                    # Get the parent directory name for context
-                    parent_dir = os.path.basename(root)
-                    dataset_options[f"[Legacy] {parent_dir}/{filename}"] = os.path.join(root, filename)
+    # Get the list of available datasets from the catalog (only new or changed files are read)
+    dataset_labels = {
+        dataset_catalog.SAMPLE_FOLDER: lambda entry: f"{entry['name']} [Sample]",
+        dataset_catalog.GENERATED_FOLDER: lambda entry: f"{entry['name']} [Fake Generated - {entry['group']}]",
+        dataset_catalog.RELATED_UPLOADS_FOLDER: lambda entry: f"{entry['name']} [Legacy]",
+        dataset_catalog.OTHER_UPLOADS_FOLDER: lambda entry: f"{entry['name']} [Other CSVs]",
+        dataset_catalog.LEGACY_UPLOADS_FOLDER: lambda entry: f"[Legacy] {entry['group']}/{entry['name']}",
+    }
+    dataset_entries = {dataset_labels[entry['folder']](entry): entry for entry in dataset_catalog.list_datasets()}
+    dataset_options = {name: entry['path'] for name, entry in dataset_entries.items()}
 
     # ==========================================================================================================    
     # Persistence with Local Storage
@@ -80,6 +48,8 @@ def render_sidebar() -> pd.DataFrame:
         "Choose a dataset", 
         options_list,
         index=default_index,
+        # Datasets without the traffic violation columns are flagged before anyone loads them
+        format_func=lambda name: name if dataset_entries[name]['is_traffic'] else f"{name} ⚠️ (not a traffic dataset)",
         width="stretch"
     )
 
@@ -93,16 +63,15 @@ def render_sidebar() -> pd.DataFrame:
 
     # 3. Get Selected Dataset Path  
     selected_dataset_path = dataset_options[selected_dataset_display_name]
+    if not dataset_entries[selected_dataset_display_name]['is_traffic']:
+        st.sidebar.warning("This dataset does not have every traffic violation column; some analyses will not work.")
 
     # 4. Load the selected dataset
-    @st.cache_data
-    def load_data(path):
-        df = pd.read_csv(path)
-        return df.copy() # Return a copy to prevent mutation of cached data
-    df = load_data(selected_dataset_path)
+    # One shared frame per dataset for the whole server process; each rerun gets a view with read-only columns
+    df = dataset_cache.get_dataset(selected_dataset_path, columns)
     
     # 4. Display Success Message
     st.sidebar.success(f"Loaded dataset: **{selected_dataset_display_name}**")
     
     # 5. Return the loaded dataset
-    return df.copy()
+    return df
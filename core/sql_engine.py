@@ -0,0 +1,239 @@
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+from core import dataset_store, dataset_deltas, date_index
+
+try:
+    import duckdb
+except ImportError:  # Optional dependency: without it the pandas path of core.utils is used
+    duckdb = None
+
+# This module runs SQL over the shared Arrow IPC copy of a dataset with an in-process DuckDB engine.
+# The memory-mapped file is handed to DuckDB without copying; the date filter is applied as a
+# binary search on the Date-sorted file before the scan, and DuckDB only reads the columns a
+# query uses, so a grouping touches a fraction of the data pandas would.
+
+# ---------------------------------------------------------
+# SQL ENGINE CONFIGURATION
+# ---------------------------------------------------------
+# Name of the dataset (restricted to the selected date range) in queries
+SQL_TABLE_NAME = "violations"
+# Free-form queries: rows returned at most, seconds before a query is interrupted
+MAX_RESULT_ROWS = 100_000
+QUERY_TIMEOUT_SECONDS = 10
+# Memory DuckDB may use per query, in DuckDB's size syntax (override with the SQL_MEMORY_LIMIT env variable)
+SQL_MEMORY_LIMIT = os.environ.get("SQL_MEMORY_LIMIT", "2GB")
+# Every query gets a fresh in-memory database that cannot touch files or change its own settings
+CONNECTION_CONFIG = {'enable_external_access': False, 'memory_limit': SQL_MEMORY_LIMIT}
+
+# Aggregation functions of the custom grouping (see utils.get_custom_grouping) in SQL
+SQL_AGG_FUNCS = {
+    'count': 'count({col})',
+    'sum': 'sum({col})',
+    'mean': 'avg({col})',
+    'min': 'min({col})',
+    'max': 'max({col})',
+    'std': 'stddev_samp({col})',
+}
+
+EXAMPLE_QUERY = f"""SELECT Violation_Type, Weather_Condition, count(*) AS Violations, avg(Fine_Amount) AS Avg_Fine
+FROM {SQL_TABLE_NAME}
+GROUP BY ALL
+ORDER BY Violations DESC"""
+
+
+# ==================================================================================
+# Block 0: Dataset Tables
+# ==================================================================================
+def is_available() -> bool:
+    """
+    True when the optional `duckdb` package is installed.
+    """
+    return duckdb is not None
+# -------------------------------------------------------------------------------
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+# -------------------------------------------------------------------------------
+def get_dataset_table(path: str, start_day=None, end_day=None, columns: list | None = None) -> pa.Table:
+    """
+    Memory-maps the Arrow IPC copy of a dataset (writing it first if it is stale) and returns
+    the rows dated start_day..end_day as a zero-copy Arrow table (plus the appended rows, if any).
+
+    Args:
+        path (str): Path of the CSV (or Parquet) dataset.
+        start_day: First day to include (None = no lower bound).
+        end_day: Last day to include, inclusive (None = no upper bound).
+        columns (list): Optional column projection.
+
+    Returns:
+        pa.Table: The selected rows and columns.
+    """
+    if not dataset_store.is_ipc_current(path):
+        dataset_store.write_ipc(path)
+    table = pa.ipc.open_file(pa.memory_map(dataset_store.get_ipc_path(path), "r")).read_all()
+
+    if (start_day is not None or end_day is not None) and 'Date' in table.column_names:
+        if not pa.types.is_timestamp(table.schema.field('Date').type):
+            raise ValueError("The 'Date' column of this dataset is not a date column")
+        # The IPC copy is sorted by Date (missing dates last): the range is a binary search
+        start = pd.Timestamp(start_day).normalize() if start_day is not None else None
+        end = pd.Timestamp(end_day).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns') if end_day is not None else None
+        lo, hi = date_index.searchsorted_bounds(table.column('Date').to_numpy(), start, end)
+        table = table.slice(lo, hi - lo)
+
+    rows = dataset_deltas.read_deltas(path) if path.endswith(".parquet") else None
+    if rows is not None:
+        # Appended rows (see core/dataset_deltas.py) are not sorted into the IPC copy: filtered by mask
+        if (start_day is not None or end_day is not None) and 'Date' in rows.columns:
+            rows = date_index.date_range_slice(rows, start, end)
+        appended = pa.Table.from_pandas(rows, preserve_index=False).select(table.column_names)
+        table = pa.concat_tables([table, appended], promote_options="permissive")
+
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    return table
+# -------------------------------------------------------------------------------
+def _connect(table: pa.Table):
+    connection = duckdb.connect(config=dict(CONNECTION_CONFIG))
+    connection.register(SQL_TABLE_NAME, table)
+    # Settings are locked after setup, so a query cannot re-enable file access
+    connection.execute("SET lock_configuration = true")
+    return connection
+# -------------------------------------------------------------------------------
+def _run(connection, sql: str, params: list | None = None, timeout: float | None = None) -> pd.DataFrame:
+    # DuckDB has no statement timeout: a timer interrupts the running query instead
+    timer = None
+    if timeout:
+        timer = threading.Timer(timeout, connection.interrupt)
+        timer.daemon = True
+        timer.start()
+    try:
+        return connection.execute(sql, params or []).df()
+    except duckdb.InterruptException:
+        raise TimeoutError(f"The query ran longer than {timeout:g} seconds and was stopped")
+    finally:
+        if timer is not None:
+            timer.cancel()
+        connection.close()
+
+
+# ==================================================================================
+# Block 1: Custom Grouping
+# ==================================================================================
+def _encode_keys(table: pa.Table, group_cols: list) -> tuple:
+    # Categorical (dictionary) keys are grouped by their integer codes instead of their labels,
+    # which is several times faster; the labels are put back on the (small) result.
+    # Only sorted dictionaries qualify (the schema sorts categories), so code order = label order.
+    dictionaries = {}
+    table = table.unify_dictionaries()
+    for col in group_cols:
+        if not pa.types.is_dictionary(table.schema.field(col).type):
+            continue
+        column = table.column(col)
+        dictionary = column.chunk(0).dictionary if column.num_chunks else None
+        if dictionary is None or not pd.Index(dictionary.to_pandas()).is_monotonic_increasing:
+            continue
+        codes = pa.chunked_array([chunk.indices for chunk in column.chunks], type=table.schema.field(col).type.index_type)
+        table = table.set_column(table.column_names.index(col), col, codes)
+        dictionaries[col] = dictionary.to_pandas()
+    return table, dictionaries
+# -------------------------------------------------------------------------------
+def compile_custom_grouping(group_cols: list, agg_cols: list, agg_funcs: list) -> str:
+    """
+    Compiles the custom grouping options into one SQL query over SQL_TABLE_NAME.
+
+    Same result as utils.get_custom_grouping: groups with a missing key are dropped, groups
+    are ordered by their keys and the columns are named "<column>_<function>".
+    """
+    keys = ", ".join(_quote(col) for col in group_cols)
+    measures = ", ".join(
+        f"{SQL_AGG_FUNCS[func].format(col=_quote(col))} AS {_quote(f'{col}_{func}')}"
+        for col in agg_cols for func in agg_funcs
+    )
+    not_null = " AND ".join(f"{_quote(col)} IS NOT NULL" for col in group_cols)
+    return f"SELECT {keys}, {measures} FROM {SQL_TABLE_NAME} WHERE {not_null} GROUP BY {keys} ORDER BY {keys}"
+# -------------------------------------------------------------------------------
+def get_custom_grouping(path: str, group_cols: list, agg_cols: list, agg_funcs: list, start_day=None, end_day=None) -> pd.DataFrame:
+    """
+    utils.get_custom_grouping computed by the SQL engine on the dataset file.
+
+    Only the rows dated start_day..end_day and the grouping/aggregated columns are scanned.
+    Integer sums come back as int64; categorical keys stay categorical, other keys are plain labels.
+
+    Args:
+        path (str): Path of the CSV (or Parquet) dataset.
+        group_cols (list): Grouping columns.
+        agg_cols (list): Numeric columns to aggregate.
+        agg_funcs (list): Functions from SQL_AGG_FUNCS.
+        start_day: First day to include (None = no lower bound).
+        end_day: Last day to include, inclusive (None = no upper bound).
+
+    Returns:
+        pd.DataFrame: The grouped table (empty if an option is missing).
+
+    Raises:
+        ValueError: If a function is not supported or the date range cannot be applied.
+    """
+    if not group_cols or not agg_cols or not agg_funcs:
+        return pd.DataFrame()
+    unsupported = [func for func in agg_funcs if func not in SQL_AGG_FUNCS]
+    if unsupported:
+        raise ValueError(f"Unsupported aggregation function(s) for the SQL engine: {unsupported}")
+
+    table = get_dataset_table(path, start_day, end_day, columns=list(group_cols) + list(agg_cols))
+    table, dictionaries = _encode_keys(table, group_cols)
+    result = _run(_connect(table), compile_custom_grouping(group_cols, agg_cols, agg_funcs))
+    for col, dictionary in dictionaries.items():
+        result[col] = pd.Categorical.from_codes(result[col].to_numpy(), categories=dictionary)
+
+    # DuckDB sums integers into 128-bit integers (returned as floats): back to int64 like pandas
+    for col in agg_cols:
+        if 'sum' in agg_funcs and pa.types.is_integer(table.schema.field(col).type):
+            result[f"{col}_sum"] = result[f"{col}_sum"].astype('int64')
+    return result
+
+
+# ==================================================================================
+# Block 2: Free-form Queries
+# ==================================================================================
+def run_query(path: str, sql: str, start_day=None, end_day=None, max_rows: int = MAX_RESULT_ROWS, timeout: float = QUERY_TIMEOUT_SECONDS) -> tuple:
+    """
+    Runs one read-only SELECT statement over the dataset (available as SQL_TABLE_NAME).
+
+    The query runs in a throwaway in-memory database without file access, so it can only read
+    the dataset. At most max_rows rows are returned and the query is stopped after timeout seconds.
+
+    Args:
+        path (str): Path of the CSV (or Parquet) dataset.
+        sql (str): The SELECT statement.
+        start_day: First day of the dataset to expose (None = no lower bound).
+        end_day: Last day to expose, inclusive (None = no upper bound).
+        max_rows (int): Row limit of the result.
+        timeout (float): Seconds before the query is interrupted.
+
+    Returns:
+        tuple: (result DataFrame, truncated) where truncated is True if the row limit was hit.
+
+    Raises:
+        ValueError: If the text is not exactly one SELECT statement, or the query fails.
+        TimeoutError: If the query runs longer than timeout seconds.
+    """
+    table = get_dataset_table(path, start_day, end_day)
+    connection = _connect(table)
+    try:
+        statements = connection.extract_statements(sql)
+    except duckdb.Error as e:
+        connection.close()
+        raise ValueError(f"SQL Error: {e}")
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        connection.close()
+        raise ValueError("Only a single read-only SELECT statement can be run")
+
+    # One extra row tells whether the result was cut at the limit
+    limited = f"SELECT * FROM ({statements[0].query}) LIMIT {int(max_rows) + 1}"
+    try:
+        result = _run(connection, limited, timeout=timeout)
+    except duckdb.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    return result.head(max_rows), len(result) > max_rows
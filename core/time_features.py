@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from core import dataset_cache
+from core import data_schema
+from core.data_schema import DATE_COLUMN, DATE_FORMATS, TIME_COLUMN, parse_unique
+
+# This module derives the calendar features the pages group by (year, month, weekday, hour, ...)
+# once per dataset, as compact integer / categorical columns, instead of on every rerun.
+
+# ---------------------------------------------------------
+# FEATURE LAYOUT
+# ---------------------------------------------------------
+TIME_FEATURE_COLUMNS = [
+    'Year',          # int16
+    'Month',         # category of month names, in calendar order
+    'Year_Month',    # datetime64, first day of the month
+    'DayOfWeek',     # category of weekday names, Monday first
+    'Hour',          # int8 (0-23), from `Time`
+    'Date_ordinal',  # int32 proleptic Gregorian ordinal, like date.toordinal()
+]
+
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+TIME_FEATURES_ARTIFACT = "time_features"
+TIME_OF_DAY_ARTIFACT = "time_of_day"
+
+# date(1970, 1, 1).toordinal()
+_EPOCH_ORDINAL = 719163
+
+
+# ==================================================================================
+# Block 0: Building the Features
+# ==================================================================================
+def _narrow(values: pd.Series) -> pd.Series:
+    # Smallest integer width when there are no missing values (missing dates/times keep floats)
+    if values.isnull().any():
+        return values
+    return pd.to_numeric(values, downcast='integer')
+# -------------------------------------------------------------------------------
+def _named_category(numbers: pd.Series, names: list, first: int) -> pd.Series:
+    # Builds the categorical straight from its codes, without creating one string per row
+    codes = (numbers - first).fillna(-1).astype(np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=names, ordered=True), index=numbers.index)
+# -------------------------------------------------------------------------------
+def _build_time_of_day(df: pd.DataFrame) -> pd.DataFrame:
+    return data_schema.get_time_of_day(df).to_frame(TIME_COLUMN)
+# -------------------------------------------------------------------------------
+def build_time_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derives the TIME_FEATURE_COLUMNS of a dataset in one vectorized pass.
+
+    Args:
+        df (pd.DataFrame): Data with a `Date` column (and optionally `Time`).
+
+    Returns:
+        pd.DataFrame: The features, one row per row of df (same index). Features whose
+            source column is missing are left out.
+    """
+    features = {}
+    if DATE_COLUMN in df.columns:
+        dates = parse_unique(df[DATE_COLUMN], DATE_FORMATS)
+        features['Year'] = _narrow(dates.dt.year)
+        features['Month'] = _named_category(dates.dt.month, MONTH_NAMES, first=1)
+        features['Year_Month'] = pd.Series(
+            dates.to_numpy().astype('datetime64[M]').astype('datetime64[ns]'), index=df.index
+        )
+        features['DayOfWeek'] = _named_category(dates.dt.dayofweek, DAY_NAMES, first=0)
+        days = dates.dt.normalize().to_numpy().astype('datetime64[D]')
+        ordinals = pd.Series(days.astype(np.int64) + _EPOCH_ORDINAL, index=df.index, dtype='float64')
+        features['Date_ordinal'] = _narrow(ordinals.where(~np.isnat(days)))
+    if TIME_COLUMN in df.columns:
+        features['Hour'] = _narrow((pd.Timestamp(0) + get_time_of_day(df)).dt.hour)
+
+    return pd.DataFrame({col: features[col] for col in TIME_FEATURE_COLUMNS if col in features}, index=df.index)
+
+
+# ==================================================================================
+# Block 1: Using the Features
+# ==================================================================================
+def get_time_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the time features of df's rows. Views and row subsets (e.g. a date slice) of a
+    cached dataset read them from the features built once for the whole dataset.
+    """
+    # The features are row-local, so appended rows only need their own features built
+    return dataset_cache.get_row_artifact(df, TIME_FEATURES_ARTIFACT, build_time_features, incremental=True)
+# -------------------------------------------------------------------------------
+def get_time_of_day(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the time of day of df's rows as timedelta64 (see data_schema.get_time_of_day).
+    `Time` is parsed once per dataset version; views and row subsets of a cached dataset reuse it.
+    """
+    return dataset_cache.get_row_artifact(df, TIME_OF_DAY_ARTIFACT, _build_time_of_day, incremental=True)[TIME_COLUMN]
+# -------------------------------------------------------------------------------
+def add_time_features(df: pd.DataFrame, columns: list | None = None) -> pd.DataFrame:
+    """
+    Returns df with the requested time feature columns added (columns df already has are kept).
+
+    Args:
+        df (pd.DataFrame): The data.
+        columns (list): Feature names out of TIME_FEATURE_COLUMNS. None adds all of them.
+
+    Returns:
+        pd.DataFrame: A view of df with the extra columns.
+    """
+    columns = [col for col in (columns or TIME_FEATURE_COLUMNS) if col not in df.columns]
+    if not columns:
+        return df
+    features = get_time_features(df)
+    return df.assign(**{col: features[col] for col in columns if col in features.columns})
@@ -1,8 +1,10 @@
 import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
-import pandas as pd
 import matplotlib.ticker as mtick
+from core.data_schema import to_plain_index
+from core.time_features import add_time_features
+from core import compute_backend
 
 # This module handles plots for Trend Analysis
 
@@ -163,18 +165,16 @@ def plot_categorical_heatmap(percent_pivot, annot, x_label, y_label):
 
 def plot_peak_hour_traffic(df):
     apply_trend_plot_style()
-    df = df.copy()
     if 'Time' in df.columns:
         try:
-            df['hour'] = pd.to_datetime(df['Time'], format='%H:%M:%S', errors='coerce').dt.hour
-            if df['hour'].isnull().any():
-                 df['hour'] = pd.to_datetime(df['Time'], format='%H:%M', errors='coerce').dt.hour
-            if df['hour'].isnull().all():
-                 df['hour'] = df['Time'].astype(str).str.split(':').str[0].astype(float)
+            # Hour comes from the per-dataset time features (see core/time_features.py)
+            hours = add_time_features(df, ['Hour'])['Hour']
+            if hours.isnull().all():
+                 hours = df['Time'].astype(str).str.split(':').str[0].astype(float)
         except:
              return None
 
-        hour_counts = df['hour'].value_counts().sort_index()
+        hour_counts = hours.value_counts().sort_index()
         fig, ax = plt.subplots(figsize=TREND_FIG_SIZE)
         sns.lineplot(x=hour_counts.index, y=hour_counts.values, marker="o", linewidth=3, color="teal", ax=ax)
         ax.set_title("Peak Hour Traffic Violations", fontsize=TREND_TITLE_SIZE, fontweight='bold')
@@ -189,11 +189,9 @@ def plot_peak_hour_traffic(df):
 
 def plot_fines_per_year(df):
     apply_trend_plot_style()
-    df = df.copy()
     if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df['Year'] = df['Date'].dt.year
-        fines_per_year = df.groupby('Year')['Fine_Amount'].sum()
+        df = add_time_features(df, ['Year'])
+        fines_per_year = compute_backend.group_reduce(df, 'Year', 'Fine_Amount', 'sum')
         
         fig, ax = plt.subplots(figsize=TREND_FIG_SIZE)
         ax.plot(fines_per_year.index, fines_per_year.values, marker='o', linewidth=3, markersize=8, color="skyblue")
@@ -210,7 +208,7 @@ def plot_fines_per_year(df):
 
 def plot_avg_fine_location_line(df):
     apply_trend_plot_style()
-    fine_location = df.groupby('Location')['Fine_Amount'].mean().reset_index()
+    fine_location = to_plain_index(compute_backend.group_reduce(df, 'Location', 'Fine_Amount', 'mean')).reset_index()
     fig, ax = plt.subplots(figsize=TREND_FIG_SIZE)
     ax.plot(
         fine_location['Location'],
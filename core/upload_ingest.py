@@ -0,0 +1,363 @@
+import os
+import gzip
+import shutil
+import zipfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from core import dataset_catalog, dataset_deltas, dataset_store
+from core.data_schema import (
+    is_traffic_dataset, parse_unique, parse_time_of_day,
+    INTEGER_COLUMNS, FLOAT_COLUMNS, DATE_COLUMN, TIME_COLUMN, DATE_FORMATS, TIME_FORMATS
+)
+
+# This module ingests uploaded datasets in chunks. The upload is decompressed and parsed as a
+# stream, every chunk of a traffic dataset is validated against the typed schema (rows with
+# invalid values are counted and skipped) and written straight into a typed Parquet file, so
+# the whole file is never held as a DataFrame and never re-parsed as CSV afterwards.
+# New rows of an existing dataset can also be appended as a delta file (see core/dataset_deltas.py),
+# so a daily upload only costs as much as its own rows.
+
+# ---------------------------------------------------------
+# INGEST CONFIGURATION
+# ---------------------------------------------------------
+# Accepted upload types: plain CSV, gzip-compressed CSV, a zip archive holding one CSV, Parquet
+UPLOAD_TYPES = ["csv", "gz", "zip", "parquet"]
+
+# Rows per validated / written chunk (CSV input is read in blocks of CSV_BLOCK_BYTES)
+INGEST_CHUNK_ROWS = 100_000
+CSV_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Number of invalid values kept as examples in the report
+MAX_REPORTED_EXAMPLES = 20
+
+
+# ==================================================================================
+# Block 0: Reading Uploads
+# ==================================================================================
+def get_upload_format(file_name: str) -> str:
+    """
+    Returns the format of an upload from its name: "csv", "gz", "zip" or "parquet".
+
+    Raises:
+        ValueError: Unsupported file type.
+    """
+    extension = os.path.splitext(file_name.lower())[1].lstrip(".")
+    if extension not in UPLOAD_TYPES:
+        raise ValueError(f"Unsupported file type '.{extension}' (expected one of: {', '.join(UPLOAD_TYPES)})")
+    return extension
+# -------------------------------------------------------------------------------
+def open_csv_stream(upload, file_name: str):
+    """
+    Returns a binary stream of the CSV text of an upload, decompressing gzip / zip uploads on the fly.
+    Returns None for Parquet uploads.
+
+    Raises:
+        ValueError: A zip archive that does not hold exactly one CSV file.
+    """
+    upload_format = get_upload_format(file_name)
+    upload.seek(0)
+    if upload_format == "parquet":
+        return None
+    if upload_format == "gz":
+        return gzip.GzipFile(fileobj=upload, mode="rb")
+    if upload_format == "zip":
+        archive = zipfile.ZipFile(upload)
+        members = [name for name in archive.namelist() if name.lower().endswith(".csv") and not name.startswith("__MACOSX")]
+        if len(members) != 1:
+            raise ValueError(f"The zip archive must contain exactly one CSV file (found {len(members)})")
+        return archive.open(members[0])
+    return upload
+# -------------------------------------------------------------------------------
+def read_preview(upload, file_name: str, rows: int = 5) -> pd.DataFrame:
+    """
+    Reads the first rows of an upload (any of UPLOAD_TYPES) without reading the rest.
+    """
+    stream = open_csv_stream(upload, file_name)
+    if stream is None:
+        parquet_file = pq.ParquetFile(upload)
+        batch = next(parquet_file.iter_batches(batch_size=rows), None) if rows else None
+        preview = batch.to_pandas() if batch is not None else parquet_file.schema_arrow.empty_table().to_pandas()
+    else:
+        preview = pd.read_csv(stream, nrows=rows)
+    upload.seek(0)
+    return preview
+# -------------------------------------------------------------------------------
+def iter_chunks(upload, file_name: str, columns: list):
+    """
+    Yields the rows of an upload as Arrow record batches of about INGEST_CHUNK_ROWS rows
+    (CSV values stay text, so the reader never fails on a badly typed value).
+    """
+    stream = open_csv_stream(upload, file_name)
+    if stream is None:
+        yield from pq.ParquetFile(upload).iter_batches(batch_size=INGEST_CHUNK_ROWS)
+        return
+    yield from pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(column_types={col: pa.string() for col in columns}, strings_can_be_null=True),
+    )
+
+
+# ==================================================================================
+# Block 1: Schema Validation
+# ==================================================================================
+def get_traffic_arrow_schema(columns: list) -> pa.Schema:
+    """
+    Parquet schema of an ingested traffic dataset: typed numeric and Date columns, text elsewhere
+    (categories are applied when the dataset is loaded, see data_schema.apply_schema).
+    """
+    def column_type(col):
+        if col in INTEGER_COLUMNS:
+            return pa.int64()
+        if col in FLOAT_COLUMNS:
+            return pa.float64()
+        if col == DATE_COLUMN:
+            return pa.timestamp("ns")
+        return pa.string()
+    return pa.schema([pa.field(col, column_type(col)) for col in columns])
+# -------------------------------------------------------------------------------
+def _distinct_values(array: pa.Array) -> tuple:
+    # (codes: int array, -1 = missing; distinct values as a pandas Series)
+    encoded = array if pa.types.is_dictionary(array.type) else pc.dictionary_encode(array)
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+    return codes, encoded.dictionary.to_pandas()
+# -------------------------------------------------------------------------------
+def _validate_column(col: str, array: pa.Array) -> tuple:
+    # Every distinct value is converted / checked once; results are mapped back to the rows by code
+    codes, uniques = _distinct_values(array)
+    if col in INTEGER_COLUMNS or col in FLOAT_COLUMNS:
+        numbers = pd.to_numeric(uniques, errors='coerce').to_numpy(dtype=np.float64)
+        bad = np.isnan(numbers)
+        if col in INTEGER_COLUMNS:
+            bad |= ~bad & (numbers != np.round(numbers))
+        values = np.append(numbers, np.nan)[codes]
+        valid = ~np.append(bad, True)[codes]
+        if col in INTEGER_COLUMNS:
+            typed = pa.array(np.where(valid, values, 0).astype(np.int64), mask=~valid)
+        else:
+            typed = pa.array(values, mask=~valid)
+    elif col == DATE_COLUMN:
+        dates = parse_unique(uniques, DATE_FORMATS).to_numpy(dtype='datetime64[ns]')
+        bad = np.isnat(dates)
+        typed = pa.array(np.append(dates, np.datetime64('NaT', 'ns'))[codes], type=pa.timestamp("ns"), from_pandas=True)
+    elif col == TIME_COLUMN:
+        # Fixed formats are checked with Arrow's strptime; only the rest go through the flexible parser
+        labels = pa.array(uniques, type=pa.string(), from_pandas=True)
+        bad = np.ones(len(uniques), dtype=bool)
+        for fmt in TIME_FORMATS:
+            bad &= ~pc.strptime(labels, format=fmt, unit='s', error_is_null=True).is_valid().to_numpy(zero_copy_only=False)
+        if bad.any():
+            bad[bad] = parse_time_of_day(uniques[bad]).isna().to_numpy()
+        typed = array.cast(pa.string())
+    else:
+        return array.cast(pa.string()), None
+    # Missing values (code -1) are allowed
+    invalid = np.append(bad, False)[codes]
+    return typed, invalid if invalid.any() else None
+# -------------------------------------------------------------------------------
+def validate_chunk(batch: pa.RecordBatch) -> tuple:
+    """
+    Converts one chunk of a traffic dataset to the typed schema and finds the invalid values:
+    non-numeric or fractional integers, non-numeric floats, unparsable Date / Time values.
+    Missing values are allowed.
+
+    Returns:
+        tuple: (typed pa.Table, {column: boolean array of the invalid rows})
+    """
+    typed, invalid = {}, {}
+    for col in batch.schema.names:
+        typed[col], bad = _validate_column(col, batch.column(col))
+        if bad is not None:
+            invalid[col] = bad
+    table = pa.table(typed)
+    return table.cast(get_traffic_arrow_schema(batch.schema.names)), invalid
+
+
+# ==================================================================================
+# Block 2: Ingest Pipeline
+# ==================================================================================
+def _copy_upload(upload, file_name: str, target_path: str) -> None:
+    # Non-traffic uploads are stored as they are (decompressed), without parsing them
+    stream = open_csv_stream(upload, file_name)
+    with open(target_path, "wb") as target:
+        shutil.copyfileobj(stream if stream is not None else upload, target, 8 * 1024 * 1024)
+# -------------------------------------------------------------------------------
+def hash_upload(upload, file_name: str, row_fingerprint: bool = False) -> tuple:
+    """
+    Hashes an upload for duplicate detection (see dataset_catalog.hash_contents): the SHA-256 of the
+    uploaded bytes and, optionally, the row fingerprint of its (decompressed) CSV text.
+
+    Returns:
+        tuple: (content hash, row fingerprint or None)
+    """
+    stream = open_csv_stream(upload, file_name)
+    if stream is upload:
+        # Plain CSV: both hashes in one pass
+        return dataset_catalog.hash_contents(upload, row_fingerprint)
+    content_hash, _ = dataset_catalog.hash_contents(upload)
+    fingerprint = None
+    if row_fingerprint and stream is not None:
+        _, fingerprint = dataset_catalog.hash_contents(open_csv_stream(upload, file_name), row_fingerprint=True)
+    upload.seek(0)
+    return content_hash, fingerprint
+# -------------------------------------------------------------------------------
+def get_target_name(file_name: str, is_traffic: bool) -> str:
+    """
+    Name of the stored file: traffic datasets become Parquet, other uploads keep (decompressed) CSV / Parquet.
+    """
+    base = os.path.basename(file_name)
+    for suffix in (".gz", ".zip", ".parquet", ".csv"):
+        if base.lower().endswith(suffix):
+            base = base[:-len(suffix)]
+    if is_traffic or get_upload_format(file_name) == "parquet":
+        return base + ".parquet"
+    return base + ".csv"
+# -------------------------------------------------------------------------------
+def _write_validated(upload, file_name: str, columns: list, target_path: str, report: dict, progress,
+                     schema: pa.Schema | None = None) -> None:
+    # Validates the upload chunk by chunk and writes the valid rows to a Parquet file (in the given
+    # schema, default get_traffic_arrow_schema), counting the invalid values into the report
+    upload.seek(0, os.SEEK_END)
+    total_bytes = upload.tell()
+    schema = schema or get_traffic_arrow_schema(columns)
+    with pq.ParquetWriter(target_path, schema) as writer:
+        for batch in iter_chunks(upload, file_name, columns):
+            typed, invalid = validate_chunk(batch)
+            if invalid:
+                bad_rows = np.logical_or.reduce(list(invalid.values()))
+                report['invalid_rows'] += int(bad_rows.sum())
+                for col, mask in invalid.items():
+                    report['invalid_by_column'][col] = report['invalid_by_column'].get(col, 0) + int(mask.sum())
+                    for row in np.flatnonzero(mask)[:MAX_REPORTED_EXAMPLES - len(report['examples'])]:
+                        # Row numbers as in a spreadsheet: the header is line 1
+                        report['examples'].append((report['rows'] + int(row) + 2, col, batch.column(col)[int(row)].as_py()))
+                typed = typed.filter(pa.array(~bad_rows))
+            report['rows'] += batch.num_rows
+            writer.write_table(typed.select(schema.names).cast(schema), row_group_size=INGEST_CHUNK_ROWS)
+            report['rows_written'] += typed.num_rows
+            progress(min(upload.tell() / total_bytes, 1.0) if total_bytes else 1.0, report['rows'])
+# -------------------------------------------------------------------------------
+def ingest_upload(upload, file_name: str, traffic_dir: str, other_dir: str, skip_invalid_rows: bool = True,
+                  progress_callback=None) -> dict:
+    """
+    Validates and stores an upload, one chunk at a time.
+
+    Traffic datasets (every TRAFFIC_VIOLATION_COLUMNS column present) are type-checked chunk by
+    chunk and written to a typed Parquet file in traffic_dir; rows with invalid values are skipped
+    (or, with skip_invalid_rows=False, the upload is cancelled). Other datasets are stored in
+    other_dir without validation.
+
+    Args:
+        upload: The uploaded file (binary file object).
+        file_name (str): Name of the upload (its extension selects the format, see UPLOAD_TYPES).
+        traffic_dir (str): Folder for traffic datasets.
+        other_dir (str): Folder for other datasets.
+        skip_invalid_rows (bool): Skip invalid rows (True) or cancel the upload when there are any (False).
+        progress_callback (callable): Optional progress_callback(fraction_done, rows_read).
+
+    Returns:
+        dict: {'path': stored file (None if cancelled), 'is_traffic', 'rows': rows read, 'rows_written',
+               'invalid_rows', 'invalid_by_column': {column: count}, 'examples': [(row, column, value)]}
+    """
+    progress = progress_callback or (lambda fraction, rows: None)
+    columns = list(read_preview(upload, file_name, rows=0).columns)
+    is_traffic = is_traffic_dataset(columns)
+    report = {'path': None, 'is_traffic': is_traffic, 'rows': 0, 'rows_written': 0,
+              'invalid_rows': 0, 'invalid_by_column': {}, 'examples': []}
+
+    save_dir = traffic_dir if is_traffic else other_dir
+    os.makedirs(save_dir, exist_ok=True)
+    target_path = os.path.join(save_dir, get_target_name(file_name, is_traffic))
+    # Write into a private temporary file, so the dataset list never shows half an upload
+    tmp_path = f"{target_path}.tmp-{os.getpid()}"
+
+    try:
+        if not is_traffic:
+            _copy_upload(upload, file_name, tmp_path)
+            os.replace(tmp_path, target_path)
+            report['path'] = target_path
+            progress(1.0, 0)
+            return report
+
+        _write_validated(upload, file_name, columns, tmp_path, report, progress)
+        if report['invalid_rows'] and not skip_invalid_rows:
+            return report
+        os.replace(tmp_path, target_path)
+        report['path'] = target_path
+        progress(1.0, report['rows'])
+        return report
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        upload.seek(0)
+# -------------------------------------------------------------------------------
+def _refresh_compacted(path: str) -> None:
+    # Runs in the compaction thread: rebuilds the copies derived from the rewritten dataset file,
+    # so the next page load finds them current instead of rebuilding them itself
+    dataset_store.write_ipc(path)
+    dataset_catalog.get_entry(path)
+# -------------------------------------------------------------------------------
+def schedule_compaction(path: str) -> bool:
+    """
+    Queues the merge of a dataset's appended rows into its file in the background
+    (see dataset_deltas.compact). Returns False if it is already queued.
+    """
+    return dataset_deltas.schedule_compaction(path, on_done=_refresh_compacted)
+# -------------------------------------------------------------------------------
+def append_upload(upload, file_name: str, dataset_path: str, skip_invalid_rows: bool = True,
+                  progress_callback=None) -> dict:
+    """
+    Validates an upload and appends its rows to an existing traffic dataset as a delta file
+    (see dataset_deltas.add_delta). Only the uploaded rows are parsed and written; readers see
+    them right away and the deltas are merged into the dataset file in the background once
+    enough of them have piled up (see dataset_deltas.needs_compaction).
+
+    Args:
+        upload: The uploaded file (binary file object).
+        file_name (str): Name of the upload (its extension selects the format, see UPLOAD_TYPES).
+        dataset_path (str): The Parquet traffic dataset to append to (see dataset_deltas.can_append).
+        skip_invalid_rows (bool): Skip invalid rows (True) or cancel the append when there are any (False).
+        progress_callback (callable): Optional progress_callback(fraction_done, rows_read).
+
+    Returns:
+        dict: Same report as ingest_upload ('path' is dataset_path, None if cancelled), plus
+              'delta': the delta entry and 'compacting': whether a compaction was queued.
+
+    Raises:
+        ValueError: The dataset cannot be appended to, the upload's columns differ from the
+            dataset's, or the same upload was already appended.
+    """
+    progress = progress_callback or (lambda fraction, rows: None)
+    if not dataset_deltas.can_append(dataset_path):
+        raise ValueError(f"'{os.path.basename(dataset_path)}' does not accept appended rows (only Parquet traffic datasets do)")
+    columns = list(read_preview(upload, file_name, rows=0).columns)
+    schema = dataset_deltas.get_storage_schema(dataset_path)
+    if set(columns) != set(schema.names):
+        missing = [col for col in schema.names if col not in columns]
+        extra = [col for col in columns if col not in schema.names]
+        raise ValueError(f"The upload's columns do not match the dataset (missing: {missing or 'none'}, extra: {extra or 'none'})")
+    content_hash, _ = hash_upload(upload, file_name)
+    if dataset_deltas.was_appended(dataset_path, content_hash):
+        raise ValueError(f"This file was already appended to '{os.path.basename(dataset_path)}'")
+
+    report = {'path': None, 'is_traffic': True, 'rows': 0, 'rows_written': 0,
+              'invalid_rows': 0, 'invalid_by_column': {}, 'examples': [], 'delta': None, 'compacting': False}
+    tmp_path = dataset_deltas.get_delta_tmp_path(dataset_path)
+    try:
+        _write_validated(upload, file_name, columns, tmp_path, report, progress, schema=schema)
+        if (report['invalid_rows'] and not skip_invalid_rows) or not report['rows_written']:
+            return report
+        report['delta'] = dataset_deltas.add_delta(dataset_path, tmp_path, content_hash)
+        report['path'] = dataset_path
+        if dataset_deltas.needs_compaction(dataset_path):
+            report['compacting'] = schedule_compaction(dataset_path)
+        progress(1.0, report['rows'])
+        return report
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        upload.seek(0)
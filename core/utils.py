@@ -1,7 +1,8 @@
+import os
 import streamlit as st
 import pandas as pd
 from streamlit_folium import st_folium
-from core import map_plot
+from core import map_plot, date_index, data_schema, time_features, paginated_table, chunked_aggregation, compute_backend, data_profile, dataset_cache
 """
 All Fields in the dataset:
     Violation_ID                  object
@@ -38,6 +39,16 @@ All Fields in the dataset:
     Previous_Violations            int64
     Comments                      object
 """
+# ---------------------------------------------------------
+# CHUNKED AGGREGATION THRESHOLD
+# ---------------------------------------------------------
+# The grouped tables of Block 2 read dataset files larger than this chunk by chunk from disk
+# (see core/chunked_aggregation.py) instead of grouping the in-memory frame, so the grouping
+# itself never needs a second full-size copy of the data. Streaming is slower than an in-memory
+# groupby, so only large files use it (override with the CHUNKED_AGGREGATION_MIN_MB env variable);
+# the streamed tables are cached per dataset version and day range, so a rerun does not stream again.
+CHUNKED_AGGREGATION_MIN_MB = int(os.environ.get("CHUNKED_AGGREGATION_MIN_MB", 1024))
+
 # ==================================================================================
 # Block 0: Basic and Classic Data Processing Functions
 # ==================================================================================
@@ -78,8 +89,15 @@ def filter_the_dataset(df: pd.DataFrame) -> pd.DataFrame:
         Comments                      object
     """
     # Date and Time Filteration
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df['Time'] = pd.to_datetime(df['Time'], errors='coerce', format='mixed')
+    # Each distinct Date string is parsed once (see data_schema.parse_unique) and the time of day
+    # is parsed once per dataset version (see time_features.get_time_of_day), so re-running this
+    # on the cached dataset costs almost nothing.
+    # A view of df: only the replaced columns are new, the caller's frame is not changed.
+    df = df.copy(deep=False)
+    df['Date'] = data_schema.parse_unique(df['Date'], data_schema.DATE_FORMATS)
+    if not pd.api.types.is_datetime64_any_dtype(df['Time']):
+        # Same values as pd.to_datetime(..., format='mixed'): the time of day on today's date
+        df['Time'] = pd.Timestamp.now().normalize() + time_features.get_time_of_day(df)
 
     #===================
     # More refiners if required
@@ -99,8 +117,7 @@ def get_last_n_days_data(df: pd.DataFrame, n: int) -> pd.DataFrame:
     """
     today = pd.Timestamp.now().normalize()
     n_days_ago = today - pd.Timedelta(days=n)
-    filtered_df = df[(df['Date'] >= n_days_ago) & (df['Date'] <= today)]
-    return filtered_df.copy()
+    return date_index.date_range_slice(df, n_days_ago, today)
 # ----------------------------------------------------------------------------
 def find_location_columns(df, known_locations, sample_size=20, threshold=0.8) -> list:
     """
@@ -117,8 +134,8 @@ def find_location_columns(df, known_locations, sample_size=20, threshold=0.8) ->
     """
     potential_location_cols = []
     
-    # Consider only object/categorical columns
-    categorical_cols = df.select_dtypes(include=['object']).columns
+    # Consider only text/categorical columns
+    categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns
     
     for col in categorical_cols:
         # Drop nulls and get unique values
@@ -149,49 +166,22 @@ def find_location_columns(df, known_locations, sample_size=20, threshold=0.8) ->
 # Block 1: Data Quality Analysis Functions
 # ===================== Data Quality Analysis Functions ============================
 
-def get_data_quality_analysis(df: pd.DataFrame) -> pd.DataFrame:
+def get_data_quality_analysis(df: pd.DataFrame | str | dict, approximate: bool = False) -> pd.DataFrame:
     """
-    Calculates missing, unique, and duplicate statistics for each column.
-    
+    Calculates missing, unique, duplicate and outlier (IQR method) statistics for each column.
+
+    All metrics of a column come from one pass over it (see core.data_profile), and the report
+    is cached per dataset version. A dataset path / chunked source is streamed chunk by chunk.
+
+    Args:
+        df (pd.DataFrame | str | dict): The dataset, or a path / chunked_aggregation source.
+        approximate (bool): Use HyperLogLog distinct counts and t-digest quartiles (mergeable
+            across chunks, always used for paths / sources).
+
     Returns:
         pd.DataFrame: A formatted DataFrame with percentage metrics.
     """
-    total_rows = len(df)
-    report = []
-    
-    for col in df.columns:
-        missing_count = df[col].isnull().sum()
-        unique_count = df[col].nunique()
-        redundant_count = total_rows - unique_count
-        
-        # present_pct = ((total_rows - missing_count) / total_rows) * 100
-        missing_pct = (missing_count / total_rows) * 100
-        unique_pct = (unique_count / total_rows) * 100
-        duplicate_pct = (redundant_count / total_rows) * 100
-        
-        # Outlier Calculation (IQR Method) for numeric columns
-        outlier_pct = 0.0
-        if pd.api.types.is_numeric_dtype(df[col]):
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-            outlier_pct = (len(outliers) / total_rows) * 100
-
-        report.append({
-            'Column Name': col,
-            # 'Present (%)': round(present_pct, 2),
-            'Missing (%)': round(missing_pct, 2),
-            'Unique (%)': round(unique_pct, 2),
-            'Duplicate (%)': round(duplicate_pct, 2),
-            'Outlier (%)': round(outlier_pct, 2)
-        })
-        
-
-    return pd.DataFrame(report)
+    return data_profile.get_quality_report(df, approximate=approximate)
 
 # ===================== End of Data Quality Analysis Functions =====================
 
@@ -200,14 +190,56 @@ def get_data_quality_analysis(df: pd.DataFrame) -> pd.DataFrame:
 # Block 2: Numerical Analysis Functions (Tabular/Grouped)
 # ===================== Numerical Analysis Functions ===============================
 
-def get_violation_stats_table(df: pd.DataFrame) -> pd.DataFrame:
+def get_table_input(df: pd.DataFrame, start_day=None, end_day=None) -> pd.DataFrame | dict:
+    """
+    Returns what the grouped tables below should aggregate for df, the rows of a loaded
+    dataset dated start_day..end_day (all rows when no dates are given).
+
+    Args:
+        df (pd.DataFrame): The date-filtered rows of a dataset returned by dataset_cache.get_dataset.
+        start_day: First day of the filter (None = no lower bound).
+        end_day: Last day of the filter, inclusive (None = no upper bound).
+
+    Returns:
+        pd.DataFrame | dict: A chunked_aggregation source over the dataset file when the file is
+        larger than CHUNKED_AGGREGATION_MIN_MB, otherwise df itself.
+    """
+    path = df.attrs.get(dataset_cache.DATASET_KEY_ATTR, (None,))[0]
+    try:
+        if path is None or os.path.getsize(path) < CHUNKED_AGGREGATION_MIN_MB * 1024 * 1024:
+            return df
+    except OSError:
+        return df
+    return chunked_aggregation.make_source(path, start_day, end_day)
+# -------------------------------------------------------------------------------
+def _get_columns(df) -> list:
+    # Column names of an in-memory frame or of a dataset streamed by core.chunked_aggregation
+    if chunked_aggregation.is_source(df):
+        return chunked_aggregation.get_source_columns(df)
+    return list(df.columns)
+# -------------------------------------------------------------------------------
+def _group_aggregate(df, group_cols: list, agg_dict: dict, prepare=None, columns: list | None = None) -> pd.DataFrame:
+    # df.groupby(...).agg(...) in memory (see core.compute_backend), or chunk by chunk when df is a dataset path / source
+    if chunked_aggregation.is_source(df):
+        return chunked_aggregation.aggregate(df, group_cols, agg_dict, prepare, columns)
+    if prepare is not None:
+        df = prepare(df)
+    return compute_backend.group_agg(df, group_cols, agg_dict)
+# -------------------------------------------------------------------------------
+def get_violation_stats_table(df: pd.DataFrame | str | dict) -> pd.DataFrame:
     """
     Aggregates Fine Amount by Violation Type (Count, Sum, Mean, Min, Max).
+    df may also be a dataset path (or a chunked_aggregation.make_source() dict), which is
+    aggregated chunk by chunk without loading it (same for the tables below).
     """
-    if 'Violation_Type' not in df.columns or 'Fine_Amount' not in df.columns:
+    columns = _get_columns(df)
+    if 'Violation_Type' not in columns or 'Fine_Amount' not in columns:
         return pd.DataFrame()
     
-    stats = df.groupby('Violation_Type')['Fine_Amount'].agg(['count', 'sum', 'mean', 'min', 'max']).reset_index()
+    stats = _group_aggregate(df, ['Violation_Type'], {'Fine_Amount': ['count', 'sum', 'mean', 'min', 'max']})
+    if stats.empty:
+        return pd.DataFrame()
+    stats = stats['Fine_Amount'].reset_index()
     stats.columns = ['Violation Type', 'Total Incidents', 'Total Fines', 'Average Fine', 'Min Fine', 'Max Fine']
     stats = stats.sort_values(by='Total Fines', ascending=False)
     return stats
@@ -219,52 +251,62 @@ def get_demographic_pivot(df: pd.DataFrame) -> pd.DataFrame:
     if 'Violation_Type' not in df.columns or 'Driver_Gender' not in df.columns:
         return pd.DataFrame()
     
-    pivot = df.pivot_table(index='Violation_Type', columns='Driver_Gender', values='Violation_ID', aggfunc='count', fill_value=0)
+    pivot = df.pivot_table(index='Violation_Type', columns='Driver_Gender', values='Violation_ID', aggfunc='count', fill_value=0, observed=True)
     pivot['Total'] = pivot.sum(axis=1)
     pivot = pivot.sort_values(by='Total', ascending=False)
     return pivot
 # -------------------------------------------------------------------------------
-def get_vehicle_analysis_table(df: pd.DataFrame) -> pd.DataFrame:
+def get_vehicle_analysis_table(df: pd.DataFrame | str | dict) -> pd.DataFrame:
     """
     Aggregates fines and counts by Vehicle Type and Model Year.
     """
     cols_needed = ['Vehicle_Type', 'Vehicle_Model_Year', 'Fine_Amount']
-    if not all(col in df.columns for col in cols_needed):
+    columns = _get_columns(df)
+    if not all(col in columns for col in cols_needed):
         return pd.DataFrame()
         
-    stats = df.groupby(['Vehicle_Type', 'Vehicle_Model_Year'])['Fine_Amount'].agg(['count', 'mean']).reset_index()
+    stats = _group_aggregate(df, ['Vehicle_Type', 'Vehicle_Model_Year'], {'Fine_Amount': ['count', 'mean']})
+    if stats.empty:
+        return pd.DataFrame()
+    stats = stats['Fine_Amount'].reset_index()
     stats.columns = ['Vehicle Type', 'Model Year', 'Violation Count', 'Avg Fine']
     stats = stats.sort_values(by='Violation Count', ascending=False)
     return stats
 # -------------------------------------------------------------------------------
-def get_speeding_analysis_by_zone(df: pd.DataFrame) -> pd.DataFrame:
+def _speeding_rows(df: pd.DataFrame) -> pd.DataFrame:
+    df_speed = df[['Speed_Limit', 'Recorded_Speed']].copy()
+    df_speed['Excess_Speed'] = df_speed['Recorded_Speed'] - df_speed['Speed_Limit']
+    return df_speed[df_speed['Excess_Speed'] > 0] # Only actual speeding
+# -------------------------------------------------------------------------------
+def get_speeding_analysis_by_zone(df: pd.DataFrame | str | dict) -> pd.DataFrame:
     """
     Analyzes speeding violations grouped by Speed Limit zones.
     """
     cols_needed = ['Speed_Limit', 'Recorded_Speed']
-    if not all(col in df.columns for col in cols_needed):
+    if not all(col in _get_columns(df) for col in cols_needed):
         return pd.DataFrame()
     
-    df_speed = df.copy()
-    df_speed['Excess_Speed'] = df_speed['Recorded_Speed'] - df_speed['Speed_Limit']
-    df_speed = df_speed[df_speed['Excess_Speed'] > 0] # Only actual speeding
-    
-    if df_speed.empty:
+    stats = _group_aggregate(df, ['Speed_Limit'], {'Excess_Speed': ['count', 'mean', 'max']}, prepare=_speeding_rows, columns=cols_needed)
+    if stats.empty:
         return pd.DataFrame()
 
-    stats = df_speed.groupby('Speed_Limit')['Excess_Speed'].agg(['count', 'mean', 'max']).reset_index()
+    stats = stats['Excess_Speed'].reset_index()
     stats.columns = ['Speed Limit Zone', 'Speeding Incidents', 'Avg Excess Speed', 'Max Excess Speed']
     return stats
 # -------------------------------------------------------------------------------
-def get_environmental_stats(df: pd.DataFrame) -> pd.DataFrame:
+def get_environmental_stats(df: pd.DataFrame | str | dict) -> pd.DataFrame:
     """
     Grouped analysis of violations by Weather Condition and Road Condition.
     """
     cols_needed = ['Weather_Condition', 'Road_Condition']
-    if not all(col in df.columns for col in cols_needed):
+    if not all(col in _get_columns(df) for col in cols_needed):
         return pd.DataFrame()
         
-    stats = df.groupby(['Weather_Condition', 'Road_Condition']).size().reset_index(name='Violation Count')
+    if chunked_aggregation.is_source(df):
+        counts = chunked_aggregation.count_rows(df, cols_needed)
+    else:
+        counts = compute_backend.group_size(df, cols_needed)
+    stats = counts.reset_index(name='Violation Count')
     stats = stats.sort_values(by='Violation Count', ascending=False)
     return stats
 # -------------------------------------------------------------------------------
@@ -275,22 +317,22 @@ def get_hourly_patterns_table(df: pd.DataFrame) -> pd.DataFrame:
     if 'Time' not in df.columns or 'Date' not in df.columns:
         return pd.DataFrame()
         
-    temp_df = df.copy()
-    # Fix UserWarning: parse dates/times with format='mixed' to handle inconsistencies
-    temp_df['Hour'] = pd.to_datetime(temp_df['Time'], format='mixed', errors='coerce').dt.hour
-    temp_df['Day'] = pd.to_datetime(temp_df['Date'], format='mixed', errors='coerce').dt.day_name()
-    
-    # Order days correctly
-    days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    temp_df['Day'] = pd.Categorical(temp_df['Day'], categories=days_order, ordered=True)
+    # Hour and weekday are read from the per-dataset time features (no per-row parsing)
+    features = time_features.get_time_features(df)
+    temp_df = pd.DataFrame({
+        'Violation_ID': df['Violation_ID'],
+        'Hour': features['Hour'],
+        'Day': features['DayOfWeek'],
+    })
     
     # Fix FutureWarning: specify observed=False for categorical data
     pivot = temp_df.pivot_table(index='Day', columns='Hour', values='Violation_ID', aggfunc='count', fill_value=0, observed=False)
     return pivot
 # -------------------------------------------------------------------------------
-def get_custom_grouping(df: pd.DataFrame, group_cols: list, agg_cols: list, agg_funcs: list) -> pd.DataFrame:
+def get_custom_grouping(df: pd.DataFrame | str | dict, group_cols: list, agg_cols: list, agg_funcs: list) -> pd.DataFrame:
     """
     Dynamically groups the dataframe based on user input.
+    A dataset path / source is aggregated chunk by chunk (functions of chunked_aggregation.SUPPORTED_FUNCS).
     """
     if not group_cols or not agg_cols or not agg_funcs:
         return pd.DataFrame()
@@ -299,7 +341,7 @@ def get_custom_grouping(df: pd.DataFrame, group_cols: list, agg_cols: list, agg_
     agg_dict = {col: agg_funcs for col in agg_cols}
     
     try:
-        grouped_df = df.groupby(group_cols).agg(agg_dict).reset_index()
+        grouped_df = _group_aggregate(df, group_cols, agg_dict).reset_index()
         
         # Flatten MultiIndex columns (e.g., ('Fine_Amount', 'sum') -> 'Fine_Amount_sum')
         new_cols = []
@@ -384,6 +426,6 @@ def render_choropleth_map_on_page(map_data, geojson_data, location_col, value_co
         
         # View Full Data Expander
         with st.expander("Full Data"):
-            st.dataframe(map_data, hide_index=True, width='stretch')
+            paginated_table.show_paginated_table(map_data, key=f"full_data_{title.replace(' ', '_')}", hide_index=True, show_filter=False)
 
 # ===================== End of Map Visualization Functions =======================
\ No newline at end of file
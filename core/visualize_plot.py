@@ -2,6 +2,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import matplotlib.ticker as mtick
+from core.data_schema import value_counts_observed, drop_unused_categories, to_plain_index
+from core.severity import calc_severity_scores, SEVERITY_SCORE_COLUMN
+from core import compute_backend
 
 # ---------------------------------------------------------
 # UNIFORM STYLE CONFIGURATION
@@ -60,7 +63,7 @@ def plot_speed_exceeded_vs_weather(df):
 
     fig, ax = plt.subplots(figsize=FIG_SIZE)
 
-    avg_speed = df.groupby('Weather_Condition')['Speed_Exceeded'].mean().sort_values(ascending=False)
+    avg_speed = to_plain_index(compute_backend.group_reduce(df, 'Weather_Condition', 'Speed_Exceeded', 'mean')).sort_values(ascending=False)
 
     sns.barplot(
         x=avg_speed.index,
@@ -91,7 +94,7 @@ def plot_avg_fine_by_violation_type(df):
     apply_plot_style()
     fig, ax = plt.subplots(figsize=FIG_SIZE)
 
-    avg_fines = df.groupby('Violation_Type')['Fine_Amount'].mean().sort_values(ascending=False)
+    avg_fines = to_plain_index(compute_backend.group_reduce(df, 'Violation_Type', 'Fine_Amount', 'mean')).sort_values(ascending=False)
 
     sns.scatterplot(
         x=avg_fines.index, 
@@ -120,8 +123,9 @@ def plot_bar_or_count(df, x_col, y_col):
     apply_plot_style()
     fig, ax = plt.subplots(figsize=FIG_SIZE)
 
+    df = drop_unused_categories(df, [x_col])
     if y_col == 'Count':
-        sns.countplot(x=x_col, data=df, ax=ax, order=df[x_col].value_counts().index, palette=UNI_PALETTE)
+        sns.countplot(x=x_col, data=df, ax=ax, order=value_counts_observed(df[x_col]).index, palette=UNI_PALETTE)
         ax.set_title(f"Count of {x_col}")
         ax.set_ylabel("Count")
     else:
@@ -170,7 +174,7 @@ def plot_correlation_heatmap(df, numerical_cols):
 def plot_top_5_locations_violation(df):
     apply_plot_style()
     fig = plt.figure(figsize=FIG_SIZE)
-    Location_Count = df['Location'].value_counts().head(5)
+    Location_Count = value_counts_observed(df['Location']).head(5)
     sns.barplot(x=Location_Count.index, y=Location_Count.values, hue=Location_Count.index, legend=False, palette="viridis")
     plt.title("Top 5 Locations (Violations)")
     plt.xlabel("Location")
@@ -183,7 +187,7 @@ def plot_top_5_locations_violation(df):
 def plot_vehicle_type_vs_violation_type(df):
     apply_plot_style()
     fig = plt.figure(figsize=FIG_SIZE)
-    sns.countplot(data=df, x='Violation_Type', hue='Vehicle_Type', palette=UNI_PALETTE)
+    sns.countplot(data=drop_unused_categories(df, ['Violation_Type', 'Vehicle_Type']), x='Violation_Type', hue='Vehicle_Type', palette=UNI_PALETTE)
     plt.title('Vehicle Type vs Violation Type')
     plt.xlabel('Violation Type')
     plt.ylabel('Number of Violations')
@@ -200,7 +204,7 @@ def plot_vehicle_type_vs_violation_type(df):
 
 def plot_violation_type_percentage(df):
     apply_plot_style()
-    violation_counts = df['Violation_Type'].value_counts()
+    violation_counts = value_counts_observed(df['Violation_Type'])
     fig = plt.figure(figsize=FIG_SIZE)
     
     # Use distinct colors
@@ -248,7 +252,7 @@ def plot_repeat_offenders(df):
 
 def plot_violation_by_location_pie(df):
     apply_plot_style()
-    location_counts = df["Location"].value_counts()
+    location_counts = value_counts_observed(df["Location"])
     if len(location_counts) > 10:
         top_n = location_counts.head(10)
         others_count = location_counts.iloc[10:].sum()
@@ -295,7 +299,7 @@ def plot_speeding_vs_road_condition(df):
         df['Speeding'] = df['Recorded_Speed'] - df['Speed_Limit']
         speed_df = df[df['Speeding'] > 0]
         
-        avg_speeding = speed_df.groupby('Road_Condition')['Speeding'].mean().reset_index()
+        avg_speeding = to_plain_index(compute_backend.group_reduce(speed_df, 'Road_Condition', 'Speeding', 'mean')).reset_index()
         
         fig = plt.figure(figsize=FIG_SIZE)
         sns.barplot(
@@ -319,7 +323,7 @@ def plot_speeding_vs_road_condition(df):
 def plot_fines_vs_weather_severity(df):
     apply_plot_style()
     fig = plt.figure(figsize=FIG_SIZE)
-    df_severity = df.groupby('Weather_Condition')['Fine_Amount'].mean().sort_values()
+    df_severity = to_plain_index(compute_backend.group_reduce(df, 'Weather_Condition', 'Fine_Amount', 'mean')).sort_values()
     
     sns.barplot(
         x=df_severity.values,
@@ -344,27 +348,14 @@ def plot_severity_heatmap_by_location(df):
     apply_plot_style()
     df = df.copy()
     
-    def calc_severity_score(row):
-        severity = 0
-        if pd.notnull(row.get('Fine_Amount')): severity += row['Fine_Amount'] / 1000
-        if pd.notnull(row.get('Penalty_Points')): severity += row['Penalty_Points'] 
-        if pd.notnull(row.get('Recorded_Speed')) and pd.notnull(row.get('Speed_Limit')):
-            overspeed = row['Recorded_Speed'] - row['Speed_Limit']
-            if overspeed > 0: severity += overspeed /10
-        if pd.notnull(row.get('Alcohol_Level')): severity += row['Alcohol_Level'] * 10
-        if row.get('Helmet_Worn') == 'No': severity += 10
-        if row.get('Seatbelt_Worn') == 'No': severity += 10
-        if row.get('Traffic_Light_Status') == 'Red': severity += 15
-        if pd.notnull(row.get('Previous_Violations')): severity += row['Previous_Violations'] * 1.5
-        return severity
-
-    df['Violation_Severity_Score'] = df.apply(calc_severity_score, axis=1)
+    df[SEVERITY_SCORE_COLUMN] = calc_severity_scores(df)
     
     location_heatmap = df.pivot_table(
-        values='Violation_Severity_Score',
+        values=SEVERITY_SCORE_COLUMN,
         index='Location',
         columns='Violation_Type',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     )
 
     fig = plt.figure(figsize=FIG_SIZE)
@@ -396,7 +387,7 @@ def plot_avg_fine_by_violation_type_2(df):
 
 def plot_violation_by_road_condition(df):
     apply_plot_style()
-    road_counts = df['Road_Condition'].value_counts()
+    road_counts = value_counts_observed(df['Road_Condition'])
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     
@@ -436,7 +427,8 @@ def plot_weather_impact_heatmap(df):
         columns="Weather_Condition",
         values="Violation_ID",
         aggfunc="count",
-        fill_value=0
+        fill_value=0,
+        observed=True
     )
     fig = plt.figure(figsize=FIG_SIZE)
     sns.heatmap(
@@ -462,7 +454,8 @@ def plot_weather_impact_heatmap(df):
 
 def plot_vehicle_risk_countplot(df):
     apply_plot_style()
-    vehicle_counts = df['Vehicle_Type'].value_counts().index
+    df = drop_unused_categories(df, ['Vehicle_Type'])
+    vehicle_counts = value_counts_observed(df['Vehicle_Type']).index
     fig = plt.figure(figsize=FIG_SIZE)
     sns.countplot(
         y=df['Vehicle_Type'],
@@ -521,7 +514,7 @@ def plot_age_alcohol_heatmap(df):
 
 def plot_fine_vs_vehicle_pie(df):
     apply_plot_style()
-    fine_data = df.groupby('Vehicle_Type')['Fine_Amount'].sum()
+    fine_data = compute_backend.group_reduce(df, 'Vehicle_Type', 'Fine_Amount', 'sum')
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     
     wedges, texts, autotexts = ax.pie(
@@ -550,7 +543,7 @@ def plot_fine_vs_vehicle_pie(df):
 
 def plot_license_validity_by_gender(df):
     apply_plot_style()
-    validity_gender = df.groupby(['License_Validity', 'Driver_Gender']).size().unstack(fill_value=0)
+    validity_gender = compute_backend.group_size(df, ['License_Validity', 'Driver_Gender']).unstack(fill_value=0)
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     validity_gender.plot(
@@ -572,7 +565,7 @@ def plot_fine_amount_distribution_vs_weather(df):
     apply_plot_style()
     plt.figure(figsize=FIG_SIZE)
     sns.violinplot(
-        data=df, 
+        data=drop_unused_categories(df, ['Weather_Condition']), 
         x='Weather_Condition', 
         y='Fine_Amount', 
         inner='box', 
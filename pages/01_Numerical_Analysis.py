@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from core.sidebar import render_sidebar
-from core import utils
+from core import utils, date_index, paginated_table, dataset_cache, sql_engine
 
 # ------------------------------
 # PAGE CONFIG
@@ -149,7 +149,7 @@ except Exception as e:
 # ------------------------------
 with st.expander("Filters", expanded=True):
     start_date, end_date = None, None
-    df = df_original.copy() # Work with a copy
+    df = df_original.copy(deep=False) # Work on a view: replaced columns do not change df_original
 
     try:
         if 'Date' in df.columns:
@@ -175,7 +175,7 @@ with st.expander("Filters", expanded=True):
         if start_date > end_date:
             st.error("Error: End date must fall after start date.")
             st.stop()
-        df_filtered = df[(df['Date'].dt.date >= start_date) & (df['Date'].dt.date <= end_date)]
+        df_filtered = date_index.day_range_slice(df, start_date, end_date)
     else:
         df_filtered = df
 
@@ -184,6 +184,9 @@ with st.expander("Filters", expanded=True):
         df_filtered['Violation_ID'] = df_filtered['Violation_ID'].astype(str)
         
     st.write(f"### Showing data for `{df_filtered.shape[0]}`x`{df_filtered.shape[1]}` records based on the selected filters.")
+
+# Grouped tables of large dataset files are streamed from disk (see utils.get_table_input)
+table_input = utils.get_table_input(df_filtered, start_date, end_date)
 st.markdown("---")
 
 st.markdown('<h2 id="dataset-info" style="text-align: center;">Dataset Information</h3>', unsafe_allow_html=True)
@@ -192,7 +195,8 @@ st.markdown('<h2 id="dataset-info" style="text-align: center;">Dataset Informati
 # -----------------------------------
 st.subheader("Missing Duplicate Value Analysis")
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
-data_quality_df = utils.get_data_quality_analysis(df)
+approximate_quality = st.toggle("≈ Approximate statistics", value=False, key="data_quality_approximate", help="Distinct counts from HyperLogLog sketches and quartiles from t-digests, built chunk by chunk: within about 1% of the exact values.")
+data_quality_df = utils.get_data_quality_analysis(df, approximate=approximate_quality)
 st.dataframe(data_quality_df, width='stretch', hide_index=True)   
 # -----------------------------------
 # 5 Sample Rows
@@ -238,7 +242,7 @@ st.markdown("---")
 st.markdown('<h2 id="violation-stats" style="text-align: center;">Violation Statistics & Fine Analysis</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Analysis by Violation Type", expanded=True):
-    violation_stats = utils.get_violation_stats_table(df_filtered)
+    violation_stats = utils.get_violation_stats_table(table_input)
     if not violation_stats.empty:
         # Format currency columns if they exist
         format_dict = {}
@@ -260,7 +264,7 @@ st.markdown("---")
 st.markdown('<h2 id="vehicle-analysis" style="text-align: center;">Vehicle & Fine Analysis</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Fines by Vehicle Type & Year", expanded=True):
-    vehicle_stats = utils.get_vehicle_analysis_table(df_filtered)
+    vehicle_stats = utils.get_vehicle_analysis_table(table_input)
     if not vehicle_stats.empty:
         format_dict = {}
         if "Avg Fine" in vehicle_stats.columns:
@@ -280,7 +284,7 @@ st.markdown("---")
 st.markdown('<h2 id="environmental-impact" style="text-align: center;">Environmental Impact</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Violations by Weather & Road Condition", expanded=True):
-    env_stats = utils.get_environmental_stats(df_filtered)
+    env_stats = utils.get_environmental_stats(table_input)
     if not env_stats.empty:
         st.dataframe(env_stats, width='stretch', hide_index=True)
     else:
@@ -306,9 +310,13 @@ st.markdown("---")
 st.markdown('<h2 id="custom-analysis" style="text-align: center;">Custom Tabular Analysis</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 
+# The SQL engine (optional `duckdb` package) reads the shared columnar copy of the selected dataset
+dataset_path = df_original.attrs.get(dataset_cache.DATASET_KEY_ATTR, (None,))[0]
+sql_available = sql_engine.is_available() and dataset_path is not None
+
 with st.expander("🛠️ Custom Grouping & Aggregation", expanded=True):
     # Separate columns by type
-    cat_cols = df_filtered.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+    cat_cols = df_filtered.select_dtypes(include=['object', 'string', 'category', 'bool']).columns.tolist()
     num_cols = df_filtered.select_dtypes(include=['number']).columns.tolist()
 
     c1, c2, c3 = st.columns(3)
@@ -319,12 +327,25 @@ with st.expander("🛠️ Custom Grouping & Aggregation", expanded=True):
     with c3:
         selected_funcs = st.multiselect("3. Select Aggregation Functions", ['count', 'sum', 'mean', 'min', 'max', 'std'], default=['count', 'mean'])
 
+    use_sql_engine = False
+    if sql_available:
+        use_sql_engine = st.toggle("⚡ Use the SQL engine", value=True, key="custom_grouping_sql", help="Runs the grouping as one DuckDB query that only scans the selected dates and columns.")
+
     if selected_group_cols and selected_agg_cols and selected_funcs:
-        custom_df = utils.get_custom_grouping(df_filtered, selected_group_cols, selected_agg_cols, selected_funcs)
+        custom_df = None
+        if use_sql_engine:
+            try:
+                custom_df = sql_engine.get_custom_grouping(dataset_path, selected_group_cols, selected_agg_cols, selected_funcs, start_date, end_date)
+            except Exception as e:
+                # e.g. a text Date column that the SQL engine cannot filter: use pandas instead
+                st.warning(f"The SQL engine could not run this grouping ({e}); using pandas instead.")
+        if custom_df is None:
+            custom_df = utils.get_custom_grouping(table_input, selected_group_cols, selected_agg_cols, selected_funcs)
         
         if not custom_df.empty:
             st.write(f"### Resulting Table: {custom_df.shape[0]} rows")
-            st.dataframe(custom_df, width='stretch')
+            # Grouping by identifier columns can give millions of rows: show them page by page
+            paginated_table.show_paginated_table(custom_df, key="custom_grouping")
             
             # Download button
             csv = custom_df.to_csv(index=False).encode('utf-8')
@@ -337,4 +358,29 @@ with st.expander("🛠️ Custom Grouping & Aggregation", expanded=True):
     else:
         st.info("Please select at least one Grouping Column, one Aggregation Column, and one Function to generate the table.")
 
+with st.expander("🧮 SQL Query (read-only)", expanded=False):
+    if not sql_available:
+        st.info("Install the optional `duckdb` package (`pip install duckdb`) to query the dataset with SQL.")
+    else:
+        st.write(
+            f"Query the filtered data as the `{sql_engine.SQL_TABLE_NAME}` table. One read-only SELECT statement runs at a time; "
+            f"results are limited to {sql_engine.MAX_RESULT_ROWS:,} rows and queries stop after {sql_engine.QUERY_TIMEOUT_SECONDS} seconds."
+        )
+        sql_text = st.text_area("SQL", value=sql_engine.EXAMPLE_QUERY, height=150, key="sql_query_text")
+        if st.button("▶️ Run Query", key="run_sql_query"):
+            try:
+                result, truncated = sql_engine.run_query(dataset_path, sql_text, start_date, end_date)
+                st.session_state['sql_query_result'] = {'result': result, 'truncated': truncated}
+            except (ValueError, TimeoutError) as e:
+                st.session_state.pop('sql_query_result', None)
+                st.error(str(e))
+
+        # The last result is kept so that paging through it does not re-run the query
+        if 'sql_query_result' in st.session_state:
+            query_result = st.session_state['sql_query_result']
+            if query_result['truncated']:
+                st.warning(f"Only the first {sql_engine.MAX_RESULT_ROWS:,} rows are shown.")
+            st.write(f"### Query Result: {query_result['result'].shape[0]} rows")
+            paginated_table.show_paginated_table(query_result['result'], key="sql_query")
+
 st.markdown("---")
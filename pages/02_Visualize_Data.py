@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 from core.sidebar import render_sidebar
 import core.visualize_plot as visualize_plot
-import matplotlib.pyplot as plt
+from core import dataset_cache, date_index, figure_cache
+from core.data_schema import value_counts_observed
 import seaborn as sns
 
 # ------------------------------
@@ -189,10 +190,104 @@ except Exception as e:
     st.error(f"An error occurred while loading the data: {e}")
     st.stop()
 
+# ===========================================================================================
+# LAZY SECTION RENDERING
+# ===========================================================================================
+# With lazy rendering on, only open sections are computed on a page run and the first section
+# starts open; plots of closed sections are queued once per dataset for background rendering,
+# so opening them later is served from the figure render cache (core/figure_cache.py).
+SECTIONS = {
+    "locations": ("Locations Analysis", "locations-analysis"),
+    "vehicles": ("Vehicle Insights", "vehicle-insights"),
+    "fines": ("Fines Amounts", "fines-amounts"),
+    "risk": ("Risk & Severity Analysis", "risk-and-severity-analysis"),
+    "environmental": ("Environmental & Road Analysis", "environmental-and-road-analysis"),
+    "custom": ("Custom Visualizations", "custom-visualizations"),
+}
+
+lazy_rendering = st.sidebar.toggle(
+    "Lazy section rendering",
+    value=False,
+    help="Only render the sections you open. Turn off to render every section on each run."
+)
+# (dataset key, section) pairs whose plots this session already queued for pre-rendering
+prerendered_sections = st.session_state.setdefault("prerendered_sections", set())
+
+
+def render_section_header(section_key):
+    """
+    Renders the heading of a page section and returns True if the section should be rendered.
+    """
+    title, anchor = SECTIONS[section_key]
+    st.markdown("---")
+    st.markdown(f'<h2 id="{anchor}" style="text-align: center;">{title}</h2>', unsafe_allow_html=True)
+    if not lazy_rendering:
+        return True
+    return st.toggle(f"Show {title}", value=(section_key == "locations"), key=f"section_{section_key}")
+
+
+def render_section(section_key, plot_items, df_local):
+    """
+    Renders the plots of a section if it is open, otherwise pre-renders them in the background.
+
+    Args:
+        plot_items (list): (title, insight, plot_func, team_member_name, key_suffix) per plot.
+    """
+    if render_section_header(section_key):
+        for title, insight, plot_func, team_member_name, key_suffix in plot_items:
+            render_plot_item(title, insight, plot_func, team_member_name, df_local, key_suffix)
+        return
+
+    # Closed section: queue its plots with the default (full) date range, once per dataset version
+    queued_key = (df_local.attrs.get(dataset_cache.DATASET_KEY_ATTR), section_key)
+    if queued_key[0] is None or queued_key in prerendered_sections:
+        return
+    prerendered_sections.add(queued_key)
+    min_d, max_d = get_plot_date_bounds(df_local)
+    plot_input = filter_plot_input(df_local, min_d, max_d)
+    if not plot_input.empty:
+        for _, _, plot_func, _, _ in plot_items:
+            figure_cache.prerender(plot_func, plot_input)
+
+
 # ===========================================================================================
 # TEAM CONTRIBUTED PLOTS
 # ===========================================================================================
 
+def compute_plot_date_bounds(df_local):
+    """
+    Returns the first and last date of the data (None, None if there is no usable 'Date' column).
+    """
+    if 'Date' in df_local.columns:
+        try:
+            temp_dates = pd.to_datetime(df_local['Date'], errors='coerce').dropna()
+            if not temp_dates.empty:
+                return temp_dates.min().date(), temp_dates.max().date()
+        except:
+            pass
+    return None, None
+
+
+def get_plot_date_bounds(df_local):
+    """
+    Date bounds of the data, computed once per dataset version (see compute_plot_date_bounds).
+    """
+    return dataset_cache.get_artifact(df_local, "plot_date_bounds", compute_plot_date_bounds)
+
+
+def filter_plot_input(df_local, s_date, e_date):
+    """
+    Returns the rows of df_local between s_date and e_date (all rows if no dates are given).
+    """
+    filtered_df = df_local.copy(deep=False)
+    if s_date and e_date:
+        if filtered_df['Date'].dtype == 'object':
+                filtered_df['Date'] = pd.to_datetime(filtered_df['Date'], errors='coerce')
+        
+        filtered_df = date_index.day_range_slice(filtered_df, s_date, e_date)
+    return filtered_df
+
+
 def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_suffix):
     """
     Renders a single plot item in an expander with independent date filtering.
@@ -203,28 +298,14 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
     expander_title = f"{title}"
     
     with st.expander(expander_title, expanded=True):
-        # Ensure fresh state for plots
-        try:
-            plt.close('all')
-        except:
-            pass
-
         # --- Date Filter for this SPECIFIC Plot ---
         key_start = f"start_{key_suffix}"
         key_end = f"end_{key_suffix}"
         
-        filtered_df = df_local.copy()
+        filtered_df = df_local
         
         # Determine min/max date if possible
-        min_d, max_d = None, None
-        if 'Date' in df_local.columns:
-            try:
-                temp_dates = pd.to_datetime(df_local['Date'], errors='coerce').dropna()
-                if not temp_dates.empty:
-                    min_d = temp_dates.min().date()
-                    max_d = temp_dates.max().date()
-            except:
-                pass
+        min_d, max_d = get_plot_date_bounds(df_local)
 
         # Date Inputs
         s_date, e_date = None, None
@@ -239,13 +320,7 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
                 if s_date > e_date:
                     st.error("Start Date must be before End Date.")
                 else:
-                    if filtered_df['Date'].dtype == 'object':
-                            filtered_df['Date'] = pd.to_datetime(filtered_df['Date'], errors='coerce')
-                    
-                    filtered_df = filtered_df[
-                        (filtered_df['Date'].dt.date >= s_date) & 
-                        (filtered_df['Date'].dt.date <= e_date)
-                    ]
+                    filtered_df = filter_plot_input(df_local, s_date, e_date)
         
         if filtered_df.empty:
             st.warning("No data available for the selected range.")
@@ -258,10 +333,8 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
             
             with col_plot:
                 try:
-                    fig = plot_func(filtered_df)
-                    if fig:
-                        st.pyplot(fig, width='stretch')
-                    else:
+                    # Served from the figure render cache when the same plot was drawn before
+                    if not figure_cache.show_plot(plot_func, filtered_df):
                         st.write("Plot could not be generated with the selected data.")
                 except Exception as e:
                     st.error(f"Error generating plot: {e}")
@@ -277,15 +350,14 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
 # ===========================================================================================
 # 📍 LOCATIONS
 # ===========================================================================================
-st.markdown("---")
-st.markdown('<h2 id="top-5-locations-violations" style="text-align: center;">Locations Analysis</h3>', unsafe_allow_html=True)
-
-render_plot_item(
-    "Top 5 Locations (Violations)", 
-    "This plot identifies the top 5 locations with the highest number of reported violations. These 'hotspots' indicate areas where traffic enforcement should be prioritized to reduce incident frequency.",
-    visualize_plot.plot_top_5_locations_violation,
-    "Monika", df, "monika_1"
-)
+render_section("locations", [
+    (
+        "Top 5 Locations (Violations)", 
+        "This plot identifies the top 5 locations with the highest number of reported violations. These 'hotspots' indicate areas where traffic enforcement should be prioritized to reduce incident frequency.",
+        visualize_plot.plot_top_5_locations_violation,
+        "Monika", "monika_1"
+    ),
+], df)
 
 # render_plot_item(
 #     "Violations by Location (%)", 
@@ -299,22 +371,20 @@ render_plot_item(
 # ===========================================================================================
 # 🚗 VEHICLES
 # ===========================================================================================
-st.markdown("---")
-st.markdown('<h2 id="vehicle-type-vs-violation-type" style="text-align: center;">Vehicle Insights</h3>', unsafe_allow_html=True)
-
-render_plot_item(
-    "Vehicle Type vs Violation Type", 
-    "This stacked bar chart correlates vehicle categories with specific violation types. By understanding which vehicles commit which offenses, authorities can strip-profile offender behaviors.",
-    visualize_plot.plot_vehicle_type_vs_violation_type,
-    "Monika", df, "monika_2"
-)
-
-render_plot_item(
-    "Vehicle Type vs Fine Paid", 
-    "This pie chart displays the share of total fines contributed by each vehicle type. It helps identify which vehicle categories are responsible for the highest financial penalties.",
-    visualize_plot.plot_fine_vs_vehicle_pie,
-    "Ishwari", df, "ishwari_1"
-)
+render_section("vehicles", [
+    (
+        "Vehicle Type vs Violation Type", 
+        "This stacked bar chart correlates vehicle categories with specific violation types. By understanding which vehicles commit which offenses, authorities can strip-profile offender behaviors.",
+        visualize_plot.plot_vehicle_type_vs_violation_type,
+        "Monika", "monika_2"
+    ),
+    (
+        "Vehicle Type vs Fine Paid", 
+        "This pie chart displays the share of total fines contributed by each vehicle type. It helps identify which vehicle categories are responsible for the highest financial penalties.",
+        visualize_plot.plot_fine_vs_vehicle_pie,
+        "Ishwari", "ishwari_1"
+    ),
+], df)
 
 # ========================================= Removed Plots ====================================
 
@@ -329,9 +399,6 @@ render_plot_item(
 # ===========================================================================================
 # 💰 FINES
 # ===========================================================================================
-st.markdown("---")
-st.markdown('<h2 id="total-fines-per-year" style="text-align: center;">Fines Amounts</h3>', unsafe_allow_html=True)
-
 # =========================================== Removed Plots ======================================= 
 # render_plot_item(
 #     "Fine Amount by Violation Type", 
@@ -348,19 +415,18 @@ st.markdown('<h2 id="total-fines-per-year" style="text-align: center;">Fines Amo
 # )
 # ========================================= End of Removed Plots ====================================== 
 
-render_plot_item(
-    "Violation Type Percentage", 
-    "This donut/pie chart breaks down the proportion of each violation type relative to the total. It serves as a quick overview to see the most dominating traffic infractions.",
-    visualize_plot.plot_violation_type_percentage,
-    "Amith", df, "amith_1"
-)
+render_section("fines", [
+    (
+        "Violation Type Percentage", 
+        "This donut/pie chart breaks down the proportion of each violation type relative to the total. It serves as a quick overview to see the most dominating traffic infractions.",
+        visualize_plot.plot_violation_type_percentage,
+        "Amith", "amith_1"
+    ),
+], df)
 
 # ===========================================================================================
 # 🔥 RISK & DEMOGRAPHICS
 # ===========================================================================================
-st.markdown("---")
-st.markdown('<h2 id="severity-and-risk-analysis" style="text-align: center;">Risk & Severity Analysis</h3>', unsafe_allow_html=True)
-
 # ====================== Removed Plots ====================== 
 # render_plot_item(
 #     "Violation Severity Heatmap", 
@@ -384,40 +450,38 @@ st.markdown('<h2 id="severity-and-risk-analysis" style="text-align: center;">Ris
 # )
 # ======================End of Removed Plots ====================== 
 
-render_plot_item(
-    "Driver Risk by Age Group", 
-    "This plot breaks down the calculated risk level for different driver age groups. It reveals which demographics are statistically more likely to engage in risky driving behaviors.",
-    visualize_plot.plot_driver_risk_by_age,
-    "Saniya", df, "saniya_2"
-)
-
-render_plot_item(
-    "Age vs Alcohol Heatmap", 
-    "This heatmap correlates driver age groups with recorded alcohol levels. It effectively highlights which demographic groups are most at risk for DUI-related incidents.",
-    visualize_plot.plot_age_alcohol_heatmap,
-    "Sanjana", df, "sanjana_2"
-)
+render_section("risk", [
+    (
+        "Driver Risk by Age Group", 
+        "This plot breaks down the calculated risk level for different driver age groups. It reveals which demographics are statistically more likely to engage in risky driving behaviors.",
+        visualize_plot.plot_driver_risk_by_age,
+        "Saniya", "saniya_2"
+    ),
+    (
+        "Age vs Alcohol Heatmap", 
+        "This heatmap correlates driver age groups with recorded alcohol levels. It effectively highlights which demographic groups are most at risk for DUI-related incidents.",
+        visualize_plot.plot_age_alcohol_heatmap,
+        "Sanjana", "sanjana_2"
+    ),
+], df)
 
 # ===========================================================================================
 # 🌍 ENVIRONMENTAL & ROAD IMPACT
 # ===========================================================================================
-st.markdown("---")
-st.markdown('<h2 id="environmental-and-road-analysis" style="text-align: center;">Environmental & Road Analysis</h3>', unsafe_allow_html=True)
-
-render_plot_item(
-    "Speeding vs Road Condition", 
-    "This bar chart displays the average speed exceeded over the limit under different road conditions. It highlights where drivers are most likely to drive dangerously fast.",
-    visualize_plot.plot_speeding_vs_road_condition,
-    "Darsana", df, "darsana_1"
-)
-
-
-render_plot_item(
-    "Speed Exceeded vs Weather", 
-    "This plot measures the average speed above the limit during different weather conditions. It shows exactly when (weather-wise) drivers are most likely to ignore speed limits.",
-    visualize_plot.plot_speed_exceeded_vs_weather_2,
-    "Poojitha", df, "poojitha_1"
-)
+render_section("environmental", [
+    (
+        "Speeding vs Road Condition", 
+        "This bar chart displays the average speed exceeded over the limit under different road conditions. It highlights where drivers are most likely to drive dangerously fast.",
+        visualize_plot.plot_speeding_vs_road_condition,
+        "Darsana", "darsana_1"
+    ),
+    (
+        "Speed Exceeded vs Weather", 
+        "This plot measures the average speed above the limit during different weather conditions. It shows exactly when (weather-wise) drivers are most likely to ignore speed limits.",
+        visualize_plot.plot_speed_exceeded_vs_weather_2,
+        "Poojitha", "poojitha_1"
+    ),
+], df)
 # ========================== Removed Plots ===================================================
 
 # render_plot_item(
@@ -456,80 +520,77 @@ render_plot_item(
 # CUSTOM VISUALIZATIONS
 # ==========================================================================================================    
 
-st.markdown("---")
-st.markdown('<h2 id="custom-visualizations" style="text-align: center;">Custom Visualizations</h3>', unsafe_allow_html=True)
-
-st.markdown("### Custom Bar/Count Plot")
-with st.expander("Custom Bar/Count Plot", expanded=True):
-    st.markdown("Create a bar plot to compare a numerical value across categories, or a count plot for category frequencies.")
+if render_section_header("custom"):
+    st.markdown("### Custom Bar/Count Plot")
+    with st.expander("Custom Bar/Count Plot", expanded=True):
+        st.markdown("Create a bar plot to compare a numerical value across categories, or a count plot for category frequencies.")
     
-    with st.form(key="bar_plot_form"):
-        # --- Bar Plot Controls ---
-        all_categorical_cols = [col for col in df.columns if df[col].dtype == 'object' and df[col].nunique() < 100]
-        all_numerical_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        with st.form(key="bar_plot_form"):
+            # --- Bar Plot Controls ---
+            all_categorical_cols = [col for col in df.columns if df[col].dtype.name in ('object', 'string', 'category') and df[col].nunique() < 100]
+            all_numerical_cols = df.select_dtypes(include=['number']).columns.tolist()
 
-        if not all_categorical_cols:
-            st.warning("No suitable categorical columns found for the X-axis of a bar plot.")
-        else:
-            # --- Axis Selectors ---
-            col1, col2 = st.columns(2)
-            with col1:
-                x_col_bar = st.selectbox("Select X-axis (Categorical)", options=all_categorical_cols, key="bar_x")
-            with col2:
-                y_options = ['Count'] + all_numerical_cols
-                y_col_bar = st.selectbox("Select Y-axis (Numerical or Count)", options=y_options, key="bar_y")
-
-            # --- Date Range Selector ---
-            bar_start_date, bar_end_date = None, None
-            plot_df_bar = df.copy()
-            # Date filtering setup (simplified for form context if needed, but keeping logic)
-            # Note: Inputs in form is fine.
-
-            # Determine date range defaults outside if possible or inside. 
-            # Ideally we calculate min/max once, but logic is intertwined. 
-            # We'll just wrap the inputs.
+            if not all_categorical_cols:
+                st.warning("No suitable categorical columns found for the X-axis of a bar plot.")
+            else:
+                # --- Axis Selectors ---
+                col1, col2 = st.columns(2)
+                with col1:
+                    x_col_bar = st.selectbox("Select X-axis (Categorical)", options=all_categorical_cols, key="bar_x")
+                with col2:
+                    y_options = ['Count'] + all_numerical_cols
+                    y_col_bar = st.selectbox("Select Y-axis (Numerical or Count)", options=y_options, key="bar_y")
+
+                # --- Date Range Selector ---
+                bar_start_date, bar_end_date = None, None
+                plot_df_bar = df.copy(deep=False)
+                # Date filtering setup (simplified for form context if needed, but keeping logic)
+                # Note: Inputs in form is fine.
+
+                # Determine date range defaults outside if possible or inside. 
+                # Ideally we calculate min/max once, but logic is intertwined. 
+                # We'll just wrap the inputs.
             
-            try:
-                if 'Date' in df.columns:
-                    plot_df_bar['Date'] = pd.to_datetime(plot_df_bar['Date'], errors='coerce')
-                    plot_df_bar.dropna(subset=['Date'], inplace=True)
-                    if not plot_df_bar['Date'].empty:
-                        min_date_bar = plot_df_bar['Date'].min().date()
-                        max_date_bar = plot_df_bar['Date'].max().date()
+                try:
+                    if 'Date' in df.columns:
+                        plot_df_bar['Date'] = pd.to_datetime(plot_df_bar['Date'], errors='coerce')
+                        plot_df_bar.dropna(subset=['Date'], inplace=True)
+                        if not plot_df_bar['Date'].empty:
+                            min_date_bar = plot_df_bar['Date'].min().date()
+                            max_date_bar = plot_df_bar['Date'].max().date()
                         
-                        c1, c2 = st.columns(2)
-                        with c1:
-                            bar_start_date = st.date_input("Start date", min_date_bar, min_value=min_date_bar, max_value=max_date_bar, key="bar_start")
-                        with c2:
-                            bar_end_date = st.date_input("End date", max_date_bar, min_value=min_date_bar, max_value=max_date_bar, key="bar_end")
-                else:
-                    st.info("No 'Date' column found or date conversion failed. Cannot filter by date.")
-            except Exception as e:
-                st.error(f"Error processing 'Date' column for Bar Plot: {e}")
+                            c1, c2 = st.columns(2)
+                            with c1:
+                                bar_start_date = st.date_input("Start date", min_date_bar, min_value=min_date_bar, max_value=max_date_bar, key="bar_start")
+                            with c2:
+                                bar_end_date = st.date_input("End date", max_date_bar, min_value=min_date_bar, max_value=max_date_bar, key="bar_end")
+                    else:
+                        st.info("No 'Date' column found or date conversion failed. Cannot filter by date.")
+                except Exception as e:
+                    st.error(f"Error processing 'Date' column for Bar Plot: {e}")
 
-        submit_bar = st.form_submit_button("Generate Bar Plot")
+            submit_bar = st.form_submit_button("Generate Bar Plot")
 
-    if submit_bar:
-        # --- Plotting Logic ---
-        if bar_start_date and bar_end_date and bar_start_date > bar_end_date:
-            st.error("Error: End date must fall after start date.")
-        else:
-            # Filter by date if applicable
-            if bar_start_date and bar_end_date:
-                plot_df_bar = plot_df_bar[(plot_df_bar['Date'].dt.date >= bar_start_date) & (plot_df_bar['Date'].dt.date <= bar_end_date)]
-            
-            if plot_df_bar.empty:
-                st.warning("No data available for the selected criteria.")
+        if submit_bar:
+            # --- Plotting Logic ---
+            if bar_start_date and bar_end_date and bar_start_date > bar_end_date:
+                st.error("Error: End date must fall after start date.")
             else:
-                fig = visualize_plot.plot_bar_or_count(plot_df_bar, x_col_bar, y_col_bar)
-                st.pyplot(fig, width='stretch')
-
-                # Display the underlying data in an expander
-                with st.expander("View Data"):
-                    if y_col_bar == 'Count':
-                        st.dataframe(plot_df_bar[x_col_bar].value_counts())
-                    else:
-                        st.dataframe(plot_df_bar.groupby(x_col_bar)[y_col_bar].mean())
+                # Filter by date if applicable
+                if bar_start_date and bar_end_date:
+                    plot_df_bar = date_index.day_range_slice(plot_df_bar, bar_start_date, bar_end_date)
+            
+                if plot_df_bar.empty:
+                    st.warning("No data available for the selected criteria.")
+                else:
+                    figure_cache.show_plot(visualize_plot.plot_bar_or_count, plot_df_bar, x_col_bar, y_col_bar)
+
+                    # Display the underlying data in an expander
+                    with st.expander("View Data"):
+                        if y_col_bar == 'Count':
+                            st.dataframe(value_counts_observed(plot_df_bar[x_col_bar]))
+                        else:
+                            st.dataframe(plot_df_bar.groupby(x_col_bar, observed=True)[y_col_bar].mean())
 
 # ====================================== Removed Plots =======================================================
 
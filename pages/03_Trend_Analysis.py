@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 from core.sidebar import render_sidebar
 import core.trend_plot as trend_plot
-import matplotlib.pyplot as plt
+from core import date_index, figure_cache, time_features, bitmap_index
+from core.data_schema import to_plain_index
 
 # ------------------------------
 # PAGE CONFIG
@@ -168,8 +169,8 @@ def render_hardcoded_trend_plots(df):
     if 'Date' not in df.columns:
          return
     
-    # Create working copy
-    df_plot = df.copy()
+    # Working view: the replaced Date column does not change df
+    df_plot = df.copy(deep=False)
     df_plot['Date'] = pd.to_datetime(df_plot['Date'], errors='coerce')
     df_plot = df_plot.dropna(subset=['Date'])
     
@@ -223,16 +224,16 @@ def render_hardcoded_trend_plots(df):
         # The values `sel_viol`, `start_d` etc. are updated.
 
         # Filter Date
-        data_filtered = dataset.copy()
+        data_filtered = dataset.copy(deep=False)
         if start_d and end_d:
             if start_d > end_d:
                 st.error("End Date must be after Start Date")
                 return
-            data_filtered = data_filtered[(data_filtered['Date'].dt.date >= start_d) & (data_filtered['Date'].dt.date <= end_d)]
+            data_filtered = date_index.day_range_slice(data_filtered, start_d, end_d)
 
         # Filter Violation
         if sel_viol:
-            data_filtered = data_filtered[data_filtered['Violation_Type'].isin(sel_viol)]
+            data_filtered = bitmap_index.filter_rows(data_filtered, 'Violation_Type', sel_viol)
 
         if data_filtered.empty:
             st.info(f"No data available for {title} with current filters.")
@@ -240,24 +241,21 @@ def render_hardcoded_trend_plots(df):
 
         # --- Plotting Logic ---
         if timeframe_col == 'Month':
-            data_filtered['Month'] = data_filtered['Date'].dt.month_name()
-            counts = data_filtered.groupby(['Month', 'Violation_Type']).size().reset_index(name='Count')
+            data_filtered = time_features.add_time_features(data_filtered, ['Month'])
+            counts = data_filtered.groupby(['Month', 'Violation_Type'], observed=True).size().reset_index(name='Count')
             if not counts.empty:
-                pivot_data = counts.pivot(index='Month', columns='Violation_Type', values='Count').fillna(0)
-                month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-                pivot_data = pivot_data.reindex(month_order).dropna()
-                fig = trend_plot.plot_trend_analysis_line(pivot_data, plot_func_x_label, "Violation_Type")
-                st.pyplot(fig, width='stretch')
+                pivot_data = to_plain_index(counts.pivot(index='Month', columns='Violation_Type', values='Count').fillna(0))
+                pivot_data = pivot_data.reindex(time_features.MONTH_NAMES).dropna()
+                figure_cache.show_plot(trend_plot.plot_trend_analysis_line, pivot_data, plot_func_x_label, "Violation_Type")
             else:
                 st.info("No data to plot.")
 
         elif timeframe_col == 'Year':
-            data_filtered['Year'] = data_filtered['Date'].dt.year
-            counts = data_filtered.groupby(['Year', 'Violation_Type']).size().reset_index(name='Count')
+            data_filtered = time_features.add_time_features(data_filtered, ['Year'])
+            counts = data_filtered.groupby(['Year', 'Violation_Type'], observed=True).size().reset_index(name='Count')
             if not counts.empty:
                 pivot_data = counts.pivot(index='Year', columns='Violation_Type', values='Count').fillna(0)
-                fig = trend_plot.plot_trend_analysis_line(pivot_data, plot_func_x_label, "Violation_Type")
-                st.pyplot(fig, width='stretch')
+                figure_cache.show_plot(trend_plot.plot_trend_analysis_line, pivot_data, plot_func_x_label, "Violation_Type")
             else:
                  st.info("No data to plot.")
 
@@ -277,15 +275,10 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
     expander_title = f"{title}"
     
     with st.expander(expander_title, expanded=True):
-        try:
-            plt.close('all')
-        except:
-            pass
-
         key_start = f"start_{key_suffix}"
         key_end = f"end_{key_suffix}"
         
-        filtered_df = df_local.copy()
+        filtered_df = df_local.copy(deep=False)
         
         min_d, max_d = None, None
         if 'Date' in df_local.columns:
@@ -312,10 +305,7 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
                     if filtered_df['Date'].dtype == 'object':
                             filtered_df['Date'] = pd.to_datetime(filtered_df['Date'], errors='coerce')
                     
-                    filtered_df = filtered_df[
-                        (filtered_df['Date'].dt.date >= s_date) & 
-                        (filtered_df['Date'].dt.date <= e_date)
-                    ]
+                    filtered_df = date_index.day_range_slice(filtered_df, s_date, e_date)
         
         if filtered_df.empty:
             st.warning("No data available for the selected range.")
@@ -327,10 +317,8 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
             
             with col_plot:
                 try:
-                    fig = plot_func(filtered_df)
-                    if fig:
-                        st.pyplot(fig, width='stretch')
-                    else:
+                    # Served from the figure render cache when the same plot was drawn before
+                    if not figure_cache.show_plot(plot_func, filtered_df):
                         st.write("Plot could not be generated with the selected data.")
                 except Exception as e:
                     st.error(f"Error generating plot: {e}")
@@ -427,27 +415,21 @@ def render_trend_analysis_line_plot_section():
                 st.error("No categorical columns available in the dataset to use for trend lines.")
                 st.stop()
 
-            start_date_dt = pd.to_datetime(start_date)
-            end_date_dt = pd.to_datetime(end_date)
-            df_filtered = df[(df['Date'] >= start_date_dt) & (df['Date'] <= end_date_dt)].copy()
+            df_filtered = date_index.day_range_slice(df, start_date, end_date).copy()
 
             # --- Apply Multi-Filter ---
             if selected_filter_values:
-                df_filtered = df_filtered[df_filtered[Lines].isin(selected_filter_values)]
+                df_filtered = bitmap_index.filter_rows(df_filtered, Lines, selected_filter_values)
 
             if df_filtered.empty:
                 st.warning("No data available for the selected date range.")
                 st.stop()
 
-            if X_axis == 'Year':
-                df_filtered['Year'] = df_filtered['Date'].dt.year
-            elif X_axis == 'Month':
-                df_filtered['Month'] = df_filtered['Date'].dt.month_name()
-            elif X_axis == "Year_Month":
-                df_filtered['Year_Month'] = df_filtered['Date'].dt.to_period('M')
+            if X_axis in ['Year', 'Month', 'Year_Month']:
+                df_filtered = time_features.add_time_features(df_filtered, [X_axis])
 
             try:
-                attribute_based_counts = df_filtered.groupby([X_axis, Lines]).size().reset_index(name='Count')
+                attribute_based_counts = df_filtered.groupby([X_axis, Lines], observed=True).size().reset_index(name='Count')
             except KeyError:
                 st.error(f"The selected columns '{X_axis}' or '{Lines}' are not found in the dataset.")
                 st.stop()
@@ -458,19 +440,14 @@ def render_trend_analysis_line_plot_section():
 
             attribute_based_pivot = attribute_based_counts.pivot(index=X_axis, columns=Lines, values='Count').fillna(0)
 
-            if isinstance(attribute_based_pivot.index, pd.PeriodIndex):
-                attribute_based_pivot.index = attribute_based_pivot.index.to_timestamp()
-
             if X_axis == 'Month':
-                month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-                attribute_based_pivot = attribute_based_pivot.reindex(month_order).dropna()
+                attribute_based_pivot = to_plain_index(attribute_based_pivot).reindex(time_features.MONTH_NAMES).dropna()
 
             st.markdown(f"## `{Lines.replace('_',' ').title()}` Trend based on `{X_axis.replace('_',' ').title()}`")
             st.markdown(f"##### Date Range: `{start_date}` to `{end_date}`")
 
             if plot_type == "Matplotlib":
-                fig = trend_plot.plot_trend_analysis_line(attribute_based_pivot, X_axis, Lines)
-                st.pyplot(fig, width='stretch')
+                figure_cache.show_plot(trend_plot.plot_trend_analysis_line, attribute_based_pivot, X_axis, Lines)
             elif plot_type == "Streamlit Default":
                 st.line_chart(attribute_based_pivot,width='stretch',x_label= X_axis, y_label="Count")
             else:
@@ -488,7 +465,7 @@ def render_categorical_heatmap_section():
     st.markdown("Analyze the percentage of a specific outcome (e.g., 'Court Appearance Required') across different categories.")
 
     with st.expander("Configure Categorical Heatmap", expanded=False):
-        all_categorical_cols = [col for col in df.columns if df[col].dtype == 'object' and df[col].nunique() > 1 and df[col].nunique() < 50]
+        all_categorical_cols = [col for col in df.columns if df[col].dtype.name in ('object', 'string', 'category') and df[col].nunique() > 1 and df[col].nunique() < 50]
         
         if not all_categorical_cols:
             st.warning("No suitable categorical columns found for this analysis.")
@@ -544,27 +521,25 @@ def render_categorical_heatmap_section():
                 if start_date_cat > end_date_cat:
                     st.error("Error: End date must fall after start date.")
                     st.stop()
-                df_filtered = df[(df['Date'].dt.date >= start_date_cat) & (df['Date'].dt.date <= end_date_cat)].copy()
+                df_filtered = date_index.day_range_slice(df, start_date_cat, end_date_cat).copy()
             else:
-                df_filtered = df.copy()
+                df_filtered = df.copy(deep=False)
 
             # --- Merged plotting logic ---
             df_copy = df_filtered
             if x_col in ['Year', 'Month', 'DayOfWeek'] and 'Date' in df_copy.columns:
-                # Date conversion already done, just extract parts
-                if x_col == 'Year':
-                    df_copy[x_col] = df_copy['Date'].dt.year
-                elif x_col == 'Month':
-                    df_copy[x_col] = df_copy['Date'].dt.month_name()
-                elif x_col == 'DayOfWeek':
-                    df_copy[x_col] = df_copy['Date'].dt.day_name()
+                # Date parts come from the per-dataset time features
+                df_copy = time_features.add_time_features(df_copy, [x_col])
 
             df_copy['_flag'] = df_copy[category_col].astype(str).str.lower()
             
-            totals = df_copy.groupby([group_col, x_col]).size().reset_index(name='Total')
-            positive_cases = df_copy[df_copy['_flag'] == str(positive_value).lower()].groupby([group_col, x_col]).size().reset_index(name='Yes')
+            totals = df_copy.groupby([group_col, x_col], observed=True).size().reset_index(name='Total')
+            positive_cases = df_copy[df_copy['_flag'] == str(positive_value).lower()].groupby([group_col, x_col], observed=True).size().reset_index(name='Yes')
             
             merged = totals.merge(positive_cases, on=[group_col, x_col], how='left')
+            if isinstance(merged[x_col].dtype, pd.CategoricalDtype):
+                # Plain labels, so the heatmap columns keep their alphabetical order
+                merged[x_col] = merged[x_col].astype(merged[x_col].cat.categories.dtype)
             merged['Yes'] = merged['Yes'].fillna(0)
             merged['Percent'] = (merged['Yes'] / merged['Total']) * 100
             
@@ -573,10 +548,9 @@ def render_categorical_heatmap_section():
             
             annot = yes_pivot.astype(int).astype(str) + "\n(" + percent_pivot.round(1).astype(str) + "%)"
             
-            fig = trend_plot.plot_categorical_heatmap(percent_pivot, annot, x_col, group_col)
             st.markdown(f"## {category_col} ('{positive_value}') — Count & Percentage Heatmap")
             st.markdown(f"##### Date Range: `{start_date_cat}` to `{end_date_cat}`")
-            st.pyplot(fig, width='stretch')
+            figure_cache.show_plot(trend_plot.plot_categorical_heatmap, percent_pivot, annot, x_col, group_col)
         else:
             st.info("Configure the plot options above and click 'Generate Categorical Heatmap' to see the analysis.")
 
@@ -7,7 +7,9 @@ from core.utils import (
     
 )
 import core.map_plot as map_plot
+from core import date_index
 from core.data_variables import TRAFFIC_VIOLATION_COLUMNS
+from core.data_schema import value_counts_observed, to_plain_index
 
 # ------------------------------
 # PAGE CONFIG
@@ -50,9 +52,9 @@ if set(TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)) is False:
 min_year, max_year = 2000, 2024
 if 'Date' in df.columns:
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    if not df['Date'].isna().all():
-        min_year = int(df['Date'].dt.year.min())
-        max_year = int(df['Date'].dt.year.max())
+    year_bounds = date_index.get_year_bounds(df)
+    if year_bounds is not None:
+        min_year, max_year = year_bounds
 
 
 # ------------------------------
@@ -70,7 +72,7 @@ valid_location_cols = find_location_columns(df, known_states)
 
 if not valid_location_cols:
     # Fallback to categorical columns
-    valid_location_cols = [col for col in df.select_dtypes(include=['object']).columns if df[col].nunique() < 50]
+    valid_location_cols = [col for col in df.select_dtypes(include=['object', 'string', 'category']).columns if df[col].nunique() < 50]
     if not valid_location_cols:
         st.error("No suitable location/categorical column found.")
         st.stop()
@@ -93,11 +95,10 @@ else:
     sel_years_viol = st.slider("Filter by Year", min_year, max_year, (min_year, max_year), key="viol_slider")
 
 # Filter
-mask_viol = (df['Date'].dt.year >= sel_years_viol[0]) & (df['Date'].dt.year <= sel_years_viol[1])
-df_viol = df[mask_viol]
+df_viol = date_index.year_range_slice(df, *sel_years_viol)
 
 try:
-    map_data_count = df_viol[default_loc_col].value_counts().reset_index()
+    map_data_count = value_counts_observed(df_viol[default_loc_col]).reset_index()
     map_data_count.columns = [default_loc_col, 'Count']
     render_choropleth_map_on_page(map_data_count, geojson_data, default_loc_col, 'Count', state_prop_name, color_theme="YlOrRd", title="Violations Count")
 except Exception as e:
@@ -119,12 +120,11 @@ if 'Driver_Age' in df.columns:
             sel_years_age = st.slider("Filter by Year", min_year, max_year, (min_year, max_year), key="age_slider")
 
         # Filter
-        mask_age = (df['Date'].dt.year >= sel_years_age[0]) & (df['Date'].dt.year <= sel_years_age[1])
-        df_age = df[mask_age].copy()
+        df_age = date_index.year_range_slice(df, *sel_years_age).copy()
 
         # Ensure numeric
         df_age['Driver_Age'] = pd.to_numeric(df_age['Driver_Age'], errors='coerce')
-        map_data_age = df_age.groupby(default_loc_col)['Driver_Age'].mean().reset_index()
+        map_data_age = to_plain_index(df_age.groupby(default_loc_col, observed=True)['Driver_Age'].mean()).reset_index()
         map_data_age.columns = [default_loc_col, 'Avg Age']
         #All Color Themes Options: OrRd, YlOrRd, PuBuGn, YlGnBu, RdBu, BrBG, PiYG, PRGn, PuOr, Set1, Set2, Set3, Pastel1, Pastel2, Accent, Dark2, Paired, Set1, Set2, Set3, Pastel1, Pastel2, Accent, Dark2, Paired
         render_choropleth_map_on_page(map_data_age, geojson_data, default_loc_col, 'Avg Age', state_prop_name, color_theme="BrBG", title="Average Driver's Age")
@@ -155,7 +155,7 @@ with st.expander("Configure Custom Map", expanded=True):
         # end_date input removed
 
         
-        numerical_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        numerical_cols = df.select_dtypes(include=['number']).columns.tolist()
         # Exclude Fine_Amount_Num helper if exists
         numerical_cols = [c for c in numerical_cols if c != 'Fine_Amount_Num']
         
@@ -171,17 +171,16 @@ with st.expander("Configure Custom Map", expanded=True):
 
     if st.button("Generate Custom Map"):
         # Filter
-        mask_custom = (df['Date'].dt.year >= sel_years_custom[0]) & (df['Date'].dt.year <= sel_years_custom[1])
-        plot_df = df[mask_custom].copy()
+        plot_df = date_index.year_range_slice(df, *sel_years_custom).copy()
 
         # Aggregate
         if value_col == 'Count of Violations':
-            custom_map_data = plot_df[location_col].value_counts().reset_index()
+            custom_map_data = value_counts_observed(plot_df[location_col]).reset_index()
             custom_map_data.columns = [location_col, 'Count']
             viz_val_col = 'Count'
         else:
             agg_map = {'Mean': 'mean', 'Sum': 'sum', 'Median': 'median'}
-            custom_map_data = plot_df.groupby(location_col)[value_col].agg(agg_map[agg_func]).reset_index()
+            custom_map_data = to_plain_index(plot_df.groupby(location_col, observed=True)[value_col].agg(agg_map[agg_func])).reset_index()
             viz_val_col = value_col
         
         # Store in Session State
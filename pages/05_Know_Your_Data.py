@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from core import paginated_table
 
 st.set_page_config(
     page_title="Auto Data Analyzer", 
@@ -25,7 +26,7 @@ if uploaded:
     df.columns = df.columns.str.replace('"', '').str.strip()
 
     for col in df.columns:
-        if df[col].dtype == 'object':
+        if df[col].dtype.name in ('object', 'string'):
             df[col] = df[col].str.replace('"', '').str.strip()
 
     for col in df.columns:
@@ -54,7 +55,7 @@ if uploaded:
         df['Violation_ID'] = df['Violation_ID'].astype(str)
 
     st.subheader("Data Preview")
-    st.dataframe(df, width='stretch')
+    paginated_table.show_paginated_table(df, key="data_preview")
 
     # Identify numeric & categoric cols
     col1, col2 = st.columns(2)
@@ -4,7 +4,9 @@ from datetime import datetime
 import streamlit as st
 import pandas as pd
 import numpy as np
-from core.data_generator import generate_dataset_by_days
+import pyarrow.parquet as pq
+from core.data_generator import generate_dataset_to_file
+from core import dataset_cache, dataset_catalog, dataset_deltas, dataset_export, dataset_store, upload_ingest
 
 # ------------------------------
 # PAGE CONFIG
@@ -39,114 +41,167 @@ with st.expander("🤖 Generate Fake Traffic Dataset"):
     with col2:
         min_records_per_day = st.number_input("Enter the minimum number of records per day:", min_value=1, max_value=100, value=1, step=1)
         max_records_per_day = st.number_input("Enter the maximum number of records per day:", min_value=1, max_value=100, value=10, step=1)
+        seed = st.number_input("Random seed (optional, same seed gives the same dataset):", min_value=0, value=None, step=1)
+        file_format = st.radio("File format", ["CSV", "Parquet"], horizontal=True).lower()
 
 
 
     if st.button("Generate and Save Dataset"):
-        with st.spinner("Generating dataset ..."):
-            df = pd.DataFrame(
-                generate_dataset_by_days(
+        # --- Pick the file name of the generated dataset ---
+        save_dir = f"generated_fake_traffic_datasets/{datetime.now().strftime('%Y-%m-%d')}"
+        os.makedirs(save_dir, exist_ok=True)
+        
+        dataset_id = 1
+        while (dataset_id <= 99) and any(os.path.exists(os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.{ext}")) for ext in ("csv", "parquet")):
+            dataset_id += 1
+        
+        if dataset_id <= 99:
+            file_path = os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.{file_format}")
+
+            # --- Generate in chunks on a process pool, streaming each chunk to disk ---
+            progress_bar = st.progress(0.0, text="Generating dataset ...")
+            def update_progress(rows_written, total_rows):
+                progress_bar.progress(rows_written / total_rows if total_rows else 1.0, text=f"Generated {rows_written:,} of {total_rows:,} records ...")
+
+            try:
+                total_rows = generate_dataset_to_file(
+                    file_path,
                     start_date=start_date.strftime('%Y-%m-%d'), 
                     end_date=end_date.strftime('%Y-%m-%d'), 
                     min_records_per_day=min_records_per_day, 
-                    max_records_per_day=max_records_per_day
+                    max_records_per_day=max_records_per_day,
+                    seed=seed,
+                    file_format=file_format,
+                    progress_callback=update_progress
                 )
-            )
-        with st.spinner("Saving dataset ..."):
-            # --- Save the generated dataset ---
-            save_dir = f"generated_fake_traffic_datasets/{datetime.now().strftime('%Y-%m-%d')}"
-            os.makedirs(save_dir, exist_ok=True)
-            
-            dataset_id = 1
-            while (dataset_id <= 99) and (os.path.exists(os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.csv"))):
-                dataset_id += 1
-            
-            if dataset_id <= 99:
-                file_path = os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.csv")
-                df.to_csv(file_path, index=False)
-                st.success(f"Successfully generated and saved '{os.path.basename(file_path)}' in the `{save_dir}` directory.")
-                st.dataframe(df.head())
-            else:
-                st.warning("Dataset generation limit (99) reached for today. Please try again tomorrow.")
+                progress_bar.empty()
+                st.success(f"Successfully generated and saved '{os.path.basename(file_path)}' ({total_rows:,} records) in the `{save_dir}` directory.")
+                if file_format == "parquet":
+                    st.dataframe(next(pq.ParquetFile(file_path).iter_batches(batch_size=5)).to_pandas())
+                else:
+                    st.dataframe(pd.read_csv(file_path, nrows=5))
+            except Exception as e:
+                progress_bar.empty()
+                st.error(f"An error occurred while generating the dataset: {e}")
+        else:
+            st.warning("Dataset generation limit (99) reached for today. Please try again tomorrow.")
 
 st.markdown("---")
 st.markdown("### Upload and save new datasets")
 
-# --- Gather existing datasets for duplicate check ---
+# --- Dataset folders (duplicates are looked up in the dataset catalog by content hash) ---
 root_upload_dir = "uploaded_datasets"
 local_dataset_dir = "dataset"
-all_dataset_paths = []
-if os.path.exists(local_dataset_dir):
-    for file_name in os.listdir(local_dataset_dir):
-        if file_name.endswith('.csv'):
-            all_dataset_paths.append(os.path.join(local_dataset_dir, file_name))
-if os.path.exists(root_upload_dir):
-    for root, _, files in os.walk(root_upload_dir):
-        for file_name in files:
-            if file_name.endswith('.csv'):
-                all_dataset_paths.append(os.path.join(root, file_name))
-
-# --- Traffic Violation Columns ---
-TRAFFIC_VIOLATION_COLUMNS = [
-    'Violation_ID', 'Violation_Type', 'Fine_Amount', 'Location', 'Date', 'Time', 
-    'Vehicle_Type', 'Vehicle_Color', 'Vehicle_Model_Year', 'Registration_State', 
-    'Driver_Age', 'Driver_Gender', 'License_Type', 'Penalty_Points', 
-    'Weather_Condition', 'Road_Condition', 'Officer_ID', 'Issuing_Agency', 
-    'License_Validity', 'Number_of_Passengers', 'Helmet_Worn', 'Seatbelt_Worn', 
-    'Traffic_Light_Status', 'Speed_Limit', 'Recorded_Speed', 'Alcohol_Level', 
-    'Breathalyzer_Result', 'Towed', 'Fine_Paid', 'Payment_Method', 
-    'Court_Appearance_Required', 'Previous_Violations', 'Comments'
-]
 
 # --- File Uploader ---
-uploaded_file = st.file_uploader("Choose a CSV file to upload", type="csv", key="datasets_page_uploader")
+uploaded_file = st.file_uploader(
+    "Choose a dataset file to upload (CSV, gzip / zip compressed CSV or Parquet)",
+    type=upload_ingest.UPLOAD_TYPES, key="datasets_page_uploader"
+)
 
 if uploaded_file is not None:
     st.markdown("#### Preview of Uploaded Data")
     try:
-        preview_df = pd.read_csv(uploaded_file, nrows=5)
+        preview_df = upload_ingest.read_preview(uploaded_file, uploaded_file.name)
         st.dataframe(preview_df)
-        uploaded_file.seek(0)
 
-        if st.button("Upload and Save Dataset"):
-            # ... (duplicate check and save logic)
+        # New rows of an existing dataset (e.g. one day of violations) are appended as a small delta file
+        # instead of being saved as another full copy (see core/dataset_deltas.py)
+        append_targets = {
+            entry['name']: entry['path'] for entry in dataset_catalog.list_datasets([dataset_catalog.RELATED_UPLOADS_FOLDER])
+            if entry['path'].endswith('.parquet') and entry['is_traffic'] and set(entry['columns']) == set(preview_df.columns)
+        }
+        upload_mode = st.radio(
+            "Save as", ["A new dataset", "New rows of an existing dataset"], horizontal=True,
+            disabled=not append_targets, help=None if append_targets else "No uploaded traffic dataset has the same columns as this file."
+        )
+        append_target = None
+        if upload_mode == "New rows of an existing dataset" and append_targets:
+            append_target = append_targets[st.selectbox("Dataset to append the rows to", list(append_targets))]
+        else:
+            detect_reordered = st.checkbox(
+                "Also detect copies with the rows in a different order",
+                help="Compares a row-order-insensitive fingerprint of the file as well as its exact contents."
+            )
+        skip_invalid_rows = st.radio(
+            "Rows with invalid values (e.g. text in a numeric column, unreadable dates)",
+            ["Skip them and save the rest", "Cancel the upload"], horizontal=True
+        ) == "Skip them and save the rest"
+
+        if append_target is not None and st.button("Append Rows to Dataset"):
+            # Only the uploaded rows are validated and written; the dataset file is merged with them in the background
+            progress_bar = st.progress(0.0, text="Appending rows ...")
+            try:
+                report = upload_ingest.append_upload(
+                    uploaded_file, uploaded_file.name, append_target,
+                    skip_invalid_rows=skip_invalid_rows,
+                    progress_callback=lambda fraction, rows: progress_bar.progress(fraction, text=f"Checked {rows:,} rows ...")
+                )
+                progress_bar.empty()
+
+                if report['invalid_rows']:
+                    st.warning(f"{report['invalid_rows']:,} of {report['rows']:,} rows have invalid values.")
+                    st.dataframe(pd.DataFrame({
+                        'Column': list(report['invalid_by_column']),
+                        'Invalid Values': list(report['invalid_by_column'].values())
+                    }), hide_index=True)
+
+                if report['path'] is None:
+                    st.error("Append cancelled because of the invalid rows." if report['invalid_rows'] else "Append cancelled: the file has no valid rows.")
+                else:
+                    st.success(f"Appended {report['rows_written']:,} rows to `{append_target}`."
+                               + (" The dataset file is being merged with its appended rows in the background." if report['compacting'] else ""))
+            except Exception as e:
+                progress_bar.empty()
+                st.error(f"An error occurred while appending the rows: {e}")
+
+        if append_target is None and st.button("Upload and Save Dataset"):
+            # One streaming pass hashes the upload; duplicates are then one lookup in the catalog index
             is_duplicate = False
+            content_hash, row_fingerprint = None, None
             try:
-                for existing_path in all_dataset_paths:
-                    existing_basename = os.path.basename(existing_path)
-                    parts = existing_basename.split('_', 1)
-                    unprefixed_name = parts[1] if len(parts) == 2 and parts[0].isdigit() else existing_basename
-                    if unprefixed_name == uploaded_file.name:
-                        existing_df_head = pd.read_csv(existing_path, nrows=5)
-                        if preview_df.equals(existing_df_head):
-                            is_duplicate = True
-                            st.error(f"Duplicate of '{existing_basename}' found. Upload cancelled.")
-                            break
+                content_hash, row_fingerprint = upload_ingest.hash_upload(uploaded_file, uploaded_file.name, row_fingerprint=detect_reordered)
+                duplicates = dataset_catalog.find_duplicates(content_hash, row_fingerprint, columns=list(preview_df.columns))
+                if duplicates:
+                    is_duplicate = True
+                    exact = content_hash in (duplicates[0]['content_hash'], duplicates[0].get('source_hash'))
+                    st.error(f"{'Duplicate of' if exact else 'Same rows (in a different order) as'} '{duplicates[0]['path']}' found. Upload cancelled.")
             except Exception as e:
                 st.error(f"An error occurred during duplicate check: {e}")
                 is_duplicate = True
 
             if not is_duplicate:
+                # Streamed in chunks: traffic datasets are validated and written to typed Parquet,
+                # other datasets are stored as they are
+                progress_bar = st.progress(0.0, text="Saving dataset ...")
                 try:
-                    # Check columns to decide the folder
-                    uploaded_df = pd.read_csv(uploaded_file)
-                    uploaded_file.seek(0) # Reset file pointer
-                    uploaded_columns = set(uploaded_df.columns)
-                    
-                    if set(TRAFFIC_VIOLATION_COLUMNS).issubset(uploaded_columns):
-                        save_dir = "uploded_file_relateds"
-                    else:
-                        save_dir = "uploded_file_others"
+                    report = upload_ingest.ingest_upload(
+                        uploaded_file, uploaded_file.name,
+                        traffic_dir=dataset_catalog.RELATED_UPLOADS_FOLDER,
+                        other_dir=dataset_catalog.OTHER_UPLOADS_FOLDER,
+                        skip_invalid_rows=skip_invalid_rows,
+                        progress_callback=lambda fraction, rows: progress_bar.progress(fraction, text=f"Checked {rows:,} rows ...")
+                    )
+                    progress_bar.empty()
 
-                    os.makedirs(save_dir, exist_ok=True)
-                    
-                    file_path = os.path.join(save_dir, uploaded_file.name)
+                    if report['invalid_rows']:
+                        st.warning(f"{report['invalid_rows']:,} of {report['rows']:,} rows have invalid values.")
+                        st.dataframe(pd.DataFrame({
+                            'Column': list(report['invalid_by_column']),
+                            'Invalid Values': list(report['invalid_by_column'].values())
+                        }), hide_index=True)
+                        with st.expander("Examples of invalid values"):
+                            st.dataframe(pd.DataFrame(report['examples'], columns=['Line', 'Column', 'Value']).astype({'Value': str}), hide_index=True)
 
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    st.success(f"File '{uploaded_file.name}' saved successfully in `{save_dir}`.")
+                    if report['path'] is None:
+                        st.error("Upload cancelled because of the invalid rows.")
+                    else:
+                        dataset_catalog.register_file(report['path'], content_hash, row_fingerprint)
+                        saved = f" ({report['rows_written']:,} rows)" if report['is_traffic'] else ""
+                        st.success(f"File '{uploaded_file.name}' saved successfully as `{report['path']}`{saved}.")
                 
                 except Exception as e:
+                    progress_bar.empty()
                     st.error(f"An error occurred while saving the file: {e}")
     except Exception as e:
         st.error(f"Error processing file: {e}")
@@ -155,88 +210,113 @@ if uploaded_file is not None:
 st.markdown("---")
 st.markdown("### View Previously Uploaded Datasets")
 
-dataset_options = {}
-if os.path.exists(local_dataset_dir):
-    for file_name in os.listdir(local_dataset_dir):
-        if file_name.endswith('.csv'):
-            dataset_options[f"[Sample] / {file_name}"] = os.path.join(local_dataset_dir, file_name)
-
-# Function to scan a directory and add to options
-def scan_and_add_datasets(directory, prefix):
-    if os.path.exists(directory):
-        # Scan for date-based directories (for generated data)
-        if "generated" in directory:
-            for date_dir in sorted(os.listdir(directory), reverse=True):
-                full_date_dir = os.path.join(directory, date_dir)
-                if os.path.isdir(full_date_dir):
-                    for file_name in sorted(os.listdir(full_date_dir)):
-                        if file_name.endswith('.csv'):
-                            display_name = f"[{prefix} - {date_dir}] / {file_name}"
-                            dataset_options[display_name] = os.path.join(full_date_dir, file_name)
-        else: # Original logic for other directories
-            for file_name in sorted(os.listdir(directory)):
-                if file_name.endswith('.csv'):
-                    dataset_options[f"[{prefix}] / {file_name}"] = os.path.join(directory, file_name)
-
-# Scan new directories
-scan_and_add_datasets("uploded_file_relateds", "Traffic Related")
-scan_and_add_datasets("generated_fake_traffic_datasets", "Generated")
-scan_and_add_datasets("uploded_file_others", "Other CSVs")
-
-
-
-if not os.path.exists(root_upload_dir) and not dataset_options and not os.path.exists("uploded_file_relateds") and not os.path.exists("uploded_file_others"):
+# Datasets come from the catalog: listing only stats the folders, new or changed files are profiled once
+dataset_labels = {
+    dataset_catalog.SAMPLE_FOLDER: lambda entry: f"[Sample] / {entry['name']}",
+    dataset_catalog.RELATED_UPLOADS_FOLDER: lambda entry: f"[Traffic Related] / {entry['name']}",
+    dataset_catalog.GENERATED_FOLDER: lambda entry: f"[Generated - {entry['group']}] / {entry['name']}",
+    dataset_catalog.OTHER_UPLOADS_FOLDER: lambda entry: f"[Other CSVs] / {entry['name']}",
+}
+dataset_entries = {
+    dataset_labels[entry['folder']](entry): entry
+    for entry in dataset_catalog.list_datasets(list(dataset_labels))
+}
+
+# Summary of the text / categorical columns (describe() raises if there are none)
+def describe_categorical(df):
+    categorical_df = df.select_dtypes(include=['object', 'string', 'category'])
+    return categorical_df.describe() if not categorical_df.empty else pd.DataFrame()
+
+if not os.path.exists(root_upload_dir) and not dataset_entries and not os.path.exists("uploded_file_relateds") and not os.path.exists("uploded_file_others"):
     st.info("No datasets have been uploaded or found locally.")
 else:
-    if os.path.exists(root_upload_dir):
-        date_dirs = [d for d in os.listdir(root_upload_dir) if os.path.isdir(os.path.join(root_upload_dir, d)) and d.startswith("Date(")]
-        def get_date_from_dir_name(dir_name):
-            date_str = dir_name.replace("Date(", "").replace(")", "")
-            return datetime.strptime(date_str, "%d-%m-%Y")
-        sorted_date_dirs = sorted(date_dirs, key=get_date_from_dir_name, reverse=True)
-        for date_dir in sorted_date_dirs:
-            dir_path = os.path.join(root_upload_dir, date_dir)
-            files = sorted([f for f in os.listdir(dir_path) if f.endswith('.csv')])
-            for file_name in files:
-                dataset_options[f"[Legacy] {date_dir.replace('Date(', '').replace(')', '')} / {file_name}"] = os.path.join(dir_path, file_name)
+    # Legacy uploads: one `Date(dd-mm-yyyy)` folder per upload day, newest first
+    def get_date_from_dir_name(dir_name):
+        date_str = dir_name.replace("Date(", "").replace(")", "")
+        return datetime.strptime(date_str, "%d-%m-%Y")
+    legacy_entries = [
+        entry for entry in dataset_catalog.list_datasets([dataset_catalog.LEGACY_UPLOADS_FOLDER])
+        if entry['group'].startswith("Date(") and os.path.dirname(entry['path']) == os.path.join(root_upload_dir, entry['group'])
+    ]
+    for entry in sorted(legacy_entries, key=lambda entry: get_date_from_dir_name(entry['group']), reverse=True):
+        dataset_entries[f"[Legacy] {entry['group'].replace('Date(', '').replace(')', '')} / {entry['name']}"] = entry
+    dataset_options = {name: entry['path'] for name, entry in dataset_entries.items()}
 
     selected_dataset_display_name = st.selectbox("Select a dataset to view", options=["-"] + list(dataset_options.keys()))
 
     if selected_dataset_display_name != "-":
         file_path = dataset_options[selected_dataset_display_name]
+        catalog_entry = dataset_entries[selected_dataset_display_name]
         st.markdown(f"### Statistics for: `{selected_dataset_display_name}`")
+        if not catalog_entry['is_traffic']:
+            st.warning("This dataset does not have every traffic violation column; the analysis pages will not work with it.")
         
         try:
-            df_view = pd.read_csv(file_path)
             tab1, tab2, tab3, tab4 = st.tabs(["📋 Overview", "🔢 Numerical Summary", "🔠 Categorical Summary", "📄 Data Preview & Actions"])
 
             with tab1:
+                # Shape, schema and Date range come from the catalog, without loading the dataset
                 st.markdown("#### Dataset Shape")
-                st.write(f"Rows: `{df_view.shape[0]}`	||	Columns: `{df_view.shape[1]}`")
-                st.dataframe(df_view.dtypes.reset_index().rename(columns={'index': 'Column', 0: 'Data Type'}))
+                st.write(f"Rows: `{catalog_entry['rows']}`	||	Columns: `{len(catalog_entry['columns'])}`")
+                if catalog_entry['date_min'] is not None:
+                    st.write(f"Dates: `{catalog_entry['date_min']}` to `{catalog_entry['date_max']}`")
+                if catalog_entry.get('pending_deltas'):
+                    # Appended rows are already part of the dataset; merging them only speeds up fresh loads
+                    if dataset_deltas.is_compacting(file_path):
+                        st.info(f"{catalog_entry['pending_deltas']} appended upload(s) are being merged into the dataset file.")
+                    else:
+                        st.info(f"{catalog_entry['pending_deltas']} appended upload(s) are kept as separate delta files.")
+                        if st.button("🗜️ Merge Appended Rows Now"):
+                            upload_ingest.schedule_compaction(file_path)
+                            st.rerun()
+                st.dataframe(pd.DataFrame({'Column': list(catalog_entry['schema']), 'Data Type': list(catalog_entry['schema'].values())}))
+            # Shared, cached copy of the dataset (see core/dataset_cache.py) instead of a fresh read on every rerun
+            df_view = dataset_cache.get_dataset(file_path)
             with tab2:
                 st.markdown("#### Descriptive Statistics for Numerical Columns")
-                st.dataframe(df_view.describe(include=np.number))
+                # Summaries are computed once per dataset version and cached with it
+                st.dataframe(dataset_cache.get_artifact(df_view, "describe_numerical", lambda base: base.describe(include=np.number)))
             with tab3:
                 st.markdown("#### Summary for Categorical Columns")
-                cat_summary = df_view.describe(include='object')
+                cat_summary = dataset_cache.get_artifact(df_view, "describe_categorical", describe_categorical)
                 if not cat_summary.empty: st.dataframe(cat_summary)
                 else: st.info("No categorical columns found.")
             with tab4:
                 st.markdown("#### First 10 Rows")
-                st.dataframe(df_view.head(10))
+                # The first rows of the file itself (the cached copy is sorted by Date)
+                if file_path.endswith('.parquet'):
+                    st.dataframe(next(pq.ParquetFile(file_path).iter_batches(batch_size=10)).to_pandas())
+                else:
+                    st.dataframe(pd.read_csv(file_path, nrows=10))
                 st.markdown("---")
                 st.markdown("#### Actions")
                 
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.download_button(
-                        label="⬇️ Download Full Dataset",
-                        data=df_view.to_csv(index=False).encode('utf-8'),
-                        file_name=os.path.basename(file_path),
-                        mime='text/csv',
-                        width='stretch'
-                    )
+                    # The export is only encoded when requested, then cached on disk per dataset version
+                    export_format = st.radio("Download format", list(dataset_export.EXPORT_FORMATS), horizontal=True, key="export_format")
+                    if dataset_export.is_export_current(file_path, export_format):
+                        export_path = dataset_export.get_export_path(file_path, export_format)
+                        with open(export_path, "rb") as export_file:
+                            st.download_button(
+                                label="⬇️ Download Full Dataset",
+                                data=export_file,
+                                file_name=dataset_export.get_download_name(file_path, export_format),
+                                mime=dataset_export.EXPORT_FORMATS[export_format]['mime'],
+                                width='stretch'
+                            )
+                    elif st.button("📦 Prepare Download", width='stretch'):
+                        progress_bar = st.progress(0.0, text=f"Encoding {export_format} ...")
+                        try:
+                            dataset_export.build_export(
+                                file_path, export_format,
+                                progress_callback=lambda fraction: progress_bar.progress(fraction, text=f"Encoding {export_format} ... {fraction:.0%}")
+                            )
+                            progress_bar.empty()
+                            st.rerun()
+                        except Exception as e:
+                            progress_bar.empty()
+                            st.error(f"An error occurred while preparing the download: {e}")
                 with col2:
                     # Do not allow deleting sample or generated datasets
                     if not file_path.startswith(local_dataset_dir) and "generated_fake_traffic_datasets" not in file_path:
@@ -264,7 +344,11 @@ if st.session_state.file_to_delete:
             if st.button("✅ Confirm Deletion", width='stretch', type="primary"):
                 if secret_code == "123456789":
                     try:
+                        dataset_export.clear_exports(file_path_to_delete)
+                        dataset_deltas.clear_deltas(file_path_to_delete)
+                        dataset_store.clear_store(file_path_to_delete)
                         os.remove(file_path_to_delete)
+                        dataset_catalog.remove_entry(file_path_to_delete)
                         st.success(f"Successfully deleted `{os.path.basename(file_path_to_delete)}`.")
                         st.session_state.file_to_delete = None
                         st.rerun()
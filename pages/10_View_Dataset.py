@@ -2,7 +2,10 @@ import streamlit as st
 import pandas as pd
 from core import (
     sidebar,
-    data_variables
+    data_variables,
+    bitmap_index,
+    search_index,
+    paginated_table
 )
 
 # ------------------------------
@@ -29,6 +32,7 @@ if "search_violation" not in st.session_state: st.session_state.search_violation
 if "search_gender" not in st.session_state: st.session_state.search_gender = ""
 if "search_age" not in st.session_state: st.session_state.search_age = ""
 if "search_license" not in st.session_state: st.session_state.search_license = ""
+if "search_query" not in st.session_state: st.session_state.search_query = ""
 # Default to all columns if not set
 if "selected_columns" not in st.session_state or not st.session_state.selected_columns: 
     st.session_state.selected_columns = list(df.columns)
@@ -38,6 +42,7 @@ def clear_filters():
     st.session_state.search_gender = ""
     st.session_state.search_age = ""
     st.session_state.search_license = ""
+    st.session_state.search_query = ""
     st.session_state.selected_columns = list(df.columns)
 
 # Filter columns present check (using existing logic)
@@ -60,10 +65,18 @@ if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)):
                 col1, col2 = st.columns(2)
                 with col1:
                     st.text_input("Violations Type Search", help="Search by Violation Type", key="search_violation")
-                    st.text_input("Driver Age Search", help="Search by Driver Age", key="search_age")
+                    st.text_input("Driver Age Search", help="Search by Driver Age: an age (30) or a range (25-40)", key="search_age")
                 with col2:
                     st.text_input("Driver Gender Search", help="Search by Driver Gender", key="search_gender")
                     st.text_input("Driver License Search", help="Search by License Type", key="search_license")
+                st.text_input(
+                    "Advanced Search",
+                    placeholder='e.g. Driver_Age:25-40 Location:delhi "drunk driving"',
+                    help="Space-separated terms, all of which must match. `Column:value` searches one column "
+                         "(text: contains the value, numbers: exact value or range like 25-40); "
+                         "plain words match the start of a word in any text column.",
+                    key="search_query"
+                )
             
             # Search Button (Form Submit)
             submitted = st.form_submit_button("Search / Apply Filters", type="primary")
@@ -72,35 +85,41 @@ if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)):
         st.button("🔄 Reset Filters", on_click=clear_filters)
 
 # Filter the dataset logic using Session State values
-df_filtered = df.copy()
+df_filtered = df
+display_columns = None
 
 if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)):
     # Apply Filters based on Session State (which holds the submitted form values)
-    if st.session_state.search_violation:
-        df_filtered = df_filtered[df_filtered['Violation_Type'].astype(str).str.contains(st.session_state.search_violation, case=False, na=False)]
-    if st.session_state.search_gender:
-        df_filtered = df_filtered[df_filtered['Driver_Gender'].astype(str).str.contains(st.session_state.search_gender, case=False, na=False)]
-    if st.session_state.search_age:
-        df_filtered = df_filtered[df_filtered['Driver_Age'].astype(str).str.contains(st.session_state.search_age, case=False, na=False)]
-    if st.session_state.search_license:
-        df_filtered = df_filtered[df_filtered['License_Type'].astype(str).str.contains(st.session_state.search_license, case=False, na=False)]
+    # Searches run on inverted / sorted indexes of the dataset (see core/search_index.py) and
+    # return row bitmaps, which are combined with one bitwise AND
+    searches = {
+        'Violation_Type': st.session_state.search_violation,
+        'Driver_Gender': st.session_state.search_gender,
+        'Driver_Age': st.session_state.search_age,
+        'License_Type': st.session_state.search_license,
+    }
+    try:
+        search_bitmaps = [search_index.field_bitmap(df_filtered, col, query) for col, query in searches.items() if query.strip()]
+        query_bitmap = search_index.query_bitmap(df_filtered, st.session_state.search_query)
+        if query_bitmap is not None:
+            search_bitmaps.append(query_bitmap)
+        if search_bitmaps:
+            df_filtered = bitmap_index.select_rows(df_filtered, bitmap_index.bitmap_and(*search_bitmaps))
+    except ValueError as e:
+        st.error(f"Invalid search: {e}")
 
     # Apply Column Selection
     if st.session_state.selected_columns:
         # Filter to only selected columns (ensure they exist)
         valid_cols = [c for c in st.session_state.selected_columns if c in df_filtered.columns]
         if valid_cols:
-            df_filtered = df_filtered[valid_cols]
+            display_columns = valid_cols
         else:
             st.warning("No valid columns selected. Showing all.")
-            df_filtered = df
 
     st.write(f"## Search Results: `{df_filtered.shape[0]}` Records Found")
 else:
     st.error("Dataset does not contain required columns for advanced filtering.")
 
-# CRITICAL FIX: Ensure Violation_ID is string to prevent PyArrow serialization errors
-if 'Violation_ID' in df_filtered.columns:
-    df_filtered['Violation_ID'] = df_filtered['Violation_ID'].astype(str)
-
-st.data_editor(df_filtered, width='stretch')
\ No newline at end of file
+# Only the visible page is sent to the browser; sorting and paging run on the server
+paginated_table.show_paginated_table(df_filtered, key="view_dataset", columns=display_columns, editor=True)
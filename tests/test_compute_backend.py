@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core import compute_backend
+from core.data_schema import apply_schema
+
+# Parity tests: every aggregation must give the same frame on the pandas and the Polars backend
+
+pytest.importorskip("polars")
+
+SAMPLE_PATH = "dataset/Indian_Traffic_Violations.csv"
+
+
+# ==================================================================================
+# Block 0: Fixtures
+# ==================================================================================
+@pytest.fixture(autouse=True)
+def small_frames_on_polars(monkeypatch):
+    # The sample is far below the default threshold, so make every frame eligible for Polars
+    monkeypatch.setattr(compute_backend, "POLARS_MIN_ROWS", 0)
+# -------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def sample() -> pd.DataFrame:
+    # Typed like the pages see it: categorical keys, narrow integers, parsed dates
+    df = apply_schema(pd.read_csv(SAMPLE_PATH), True)
+    # Missing keys in a categorical, a text and a numeric key column
+    df.loc[df.index[::7], 'Vehicle_Type'] = np.nan
+    df.loc[df.index[::11], 'Location'] = np.nan
+    df['Speed_Band'] = (df['Recorded_Speed'] // 20).astype('float64')
+    df.loc[df.index[::13], 'Speed_Band'] = np.nan
+    # A categorical key with unused categories (observed=True leaves them out)
+    df['Violation_Type'] = df['Violation_Type'].cat.add_categories(['Unused'])
+    return df
+# -------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def empty(sample) -> pd.DataFrame:
+    return sample.head(0)
+# -------------------------------------------------------------------------------
+def run_both(monkeypatch, func, *args, **kwargs):
+    # func(*args, **kwargs) with COMPUTE_BACKEND=pandas, then with COMPUTE_BACKEND=polars
+    results = []
+    for backend in ("pandas", "polars"):
+        monkeypatch.setattr(compute_backend, "COMPUTE_BACKEND", backend)
+        assert compute_backend.get_backend_name() == backend
+        results.append(func(*args, **kwargs))
+    return results
+# -------------------------------------------------------------------------------
+def assert_same(expected, result):
+    if isinstance(expected, pd.Series):
+        expected, result = expected.to_frame(), result.to_frame()
+    pd.testing.assert_frame_equal(result, expected)
+
+
+# ==================================================================================
+# Block 1: Tests
+# ==================================================================================
+KEYS = [
+    ['Violation_Type'],                    # categorical
+    ['Vehicle_Type'],                      # categorical with missing values
+    ['Location'],                          # text with missing values
+    ['Speed_Band'],                        # float with missing values
+    ['Violation_Type', 'Vehicle_Type'],
+    ['Location', 'Speed_Band', 'Vehicle_Type'],
+]
+
+
+@pytest.mark.parametrize("keys", KEYS)
+@pytest.mark.parametrize("dropna", [True, False])
+def test_group_agg(monkeypatch, sample, keys, dropna):
+    agg_dict = {'Fine_Amount': ['sum', 'mean', 'count'], 'Penalty_Points': ['min', 'max', 'std', 'size']}
+    assert_same(*run_both(monkeypatch, compute_backend.group_agg, sample, keys, agg_dict, dropna=dropna))
+# -------------------------------------------------------------------------------
+@pytest.mark.parametrize("keys", KEYS)
+@pytest.mark.parametrize("dropna", [True, False])
+def test_group_named_agg(monkeypatch, sample, keys, dropna):
+    named_aggs = {
+        'Total_Fines': ('Fine_Amount', 'sum'),
+        'Avg_Speed': ('Recorded_Speed', 'mean'),
+        'Violations': ('Violation_ID', 'count'),
+        'Max_Alcohol': ('Alcohol_Level', 'max'),
+    }
+    assert_same(*run_both(monkeypatch, compute_backend.group_named_agg, sample, keys, named_aggs, dropna=dropna))
+# -------------------------------------------------------------------------------
+@pytest.mark.parametrize("keys", KEYS)
+@pytest.mark.parametrize("col, func", [
+    ('Fine_Amount', 'sum'), ('Fine_Amount', 'mean'), ('Penalty_Points', 'max'),
+    ('Recorded_Speed', 'min'), ('Alcohol_Level', 'std'), ('Location', 'count'),
+])
+def test_group_reduce(monkeypatch, sample, keys, col, func):
+    assert_same(*run_both(monkeypatch, compute_backend.group_reduce, sample, keys, col, func))
+# -------------------------------------------------------------------------------
+@pytest.mark.parametrize("keys", KEYS)
+@pytest.mark.parametrize("dropna", [True, False])
+def test_group_size(monkeypatch, sample, keys, dropna):
+    assert_same(*run_both(monkeypatch, compute_backend.group_size, sample, keys, dropna=dropna))
+# -------------------------------------------------------------------------------
+@pytest.mark.parametrize("keys", [['Violation_Type'], ['Location', 'Speed_Band']])
+def test_empty_frame(monkeypatch, empty, keys):
+    assert_same(*run_both(monkeypatch, compute_backend.group_agg, empty, keys, {'Fine_Amount': ['sum', 'mean']}))
+    assert_same(*run_both(monkeypatch, compute_backend.group_named_agg, empty, keys, {'Fines': ('Fine_Amount', 'count')}))
+    assert_same(*run_both(monkeypatch, compute_backend.group_reduce, empty, keys, 'Fine_Amount', 'max'))
+    assert_same(*run_both(monkeypatch, compute_backend.group_size, empty, keys))
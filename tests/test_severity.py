@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.data_schema import apply_schema
+from core.severity import calc_severity_scores, SEVERITY_SCORE_COLUMN
+
+# Parity tests: the vectorized severity score must match the original row-by-row calculation exactly
+
+SAMPLE_PATH = "dataset/Indian_Traffic_Violations.csv"
+
+
+# ==================================================================================
+# Block 0: Reference (the original row-wise calculation of the severity heatmaps)
+# ==================================================================================
+def calc_severity_score(row):
+    severity = 0
+    if pd.notnull(row.get('Fine_Amount')): severity += row['Fine_Amount'] / 1000
+    if pd.notnull(row.get('Penalty_Points')): severity += row['Penalty_Points']
+    if pd.notnull(row.get('Recorded_Speed')) and pd.notnull(row.get('Speed_Limit')):
+        if row['Recorded_Speed'] > row['Speed_Limit']:
+            severity += (row['Recorded_Speed'] - row['Speed_Limit']) / 10
+    if pd.notnull(row.get('Alcohol_Level')): severity += row['Alcohol_Level'] * 10
+    if row.get('Helmet_Worn') == 'No': severity += 10
+    if row.get('Seatbelt_Worn') == 'No': severity += 10
+    if row.get('Traffic_Light_Status') == 'Red': severity += 15
+    if pd.notnull(row.get('Previous_Violations')): severity += row['Previous_Violations'] * 1.5
+    return severity
+# -------------------------------------------------------------------------------
+def assert_same_scores(df: pd.DataFrame):
+    expected = df.apply(calc_severity_score, axis=1).astype('float64').rename(SEVERITY_SCORE_COLUMN)
+    pd.testing.assert_series_equal(calc_severity_scores(df), expected, check_exact=True)
+
+
+# ==================================================================================
+# Block 1: Fixtures
+# ==================================================================================
+# apply_schema types frames in place, so tests type a copy of the shared fixtures
+@pytest.fixture(scope="module")
+def sample() -> pd.DataFrame:
+    return pd.read_csv(SAMPLE_PATH)
+# -------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def sample_with_nans(sample) -> pd.DataFrame:
+    # Every third row of each numeric/flag column is missing, shifted per column
+    df = sample.copy()
+    columns = ['Fine_Amount', 'Penalty_Points', 'Recorded_Speed', 'Speed_Limit', 'Alcohol_Level',
+               'Helmet_Worn', 'Seatbelt_Worn', 'Traffic_Light_Status', 'Previous_Violations']
+    for shift, col in enumerate(columns):
+        df.loc[df.index[shift % 3::3], col] = np.nan
+    return df
+
+
+# ==================================================================================
+# Block 2: Tests
+# ==================================================================================
+def test_sample_matches_row_wise(sample):
+    assert_same_scores(sample)
+# -------------------------------------------------------------------------------
+def test_typed_sample_matches_row_wise(sample):
+    # The pages score frames typed by apply_schema (categories, narrow integers)
+    assert_same_scores(apply_schema(sample.copy(), True))
+# -------------------------------------------------------------------------------
+def test_nan_values_match_row_wise(sample_with_nans):
+    assert_same_scores(sample_with_nans)
+    assert_same_scores(apply_schema(sample_with_nans.copy(), True))
+# -------------------------------------------------------------------------------
+@pytest.mark.parametrize("missing", [
+    ['Speed_Limit'],
+    ['Recorded_Speed', 'Seatbelt_Worn'],
+    ['Fine_Amount', 'Alcohol_Level', 'Traffic_Light_Status', 'Previous_Violations'],
+])
+def test_missing_columns_match_row_wise(sample_with_nans, missing):
+    assert_same_scores(sample_with_nans.drop(columns=missing))
+# -------------------------------------------------------------------------------
+def test_all_columns_missing_scores_zero(sample):
+    df = sample[['Violation_ID', 'Location']]
+    assert_same_scores(df)
+    assert (calc_severity_scores(df) == 0).all()
+# -------------------------------------------------------------------------------
+def test_unknown_category_values_match_row_wise(sample):
+    df = sample.head(300).copy()
+    df.loc[df.index[::4], 'Helmet_Worn'] = 'Unknown'
+    df.loc[df.index[1::4], 'Seatbelt_Worn'] = 'no'
+    df.loc[df.index[2::4], 'Traffic_Light_Status'] = 'Flashing'
+    assert_same_scores(df)
+    # Values that are not among the categories of a typed frame (set after typing)
+    typed = apply_schema(sample.head(300).copy(), True)
+    for col in ['Helmet_Worn', 'Seatbelt_Worn', 'Traffic_Light_Status']:
+        typed[col] = typed[col].cat.add_categories(['Unknown'])
+        typed.loc[typed.index[::5], col] = 'Unknown'
+    assert_same_scores(typed)
+# -------------------------------------------------------------------------------
+def test_empty_frame(sample):
+    scores = calc_severity_scores(sample.head(0))
+    assert scores.empty and scores.dtype == np.float64